@@ -0,0 +1,108 @@
+"""
+Compares peak RSS and wall time of the in-memory and the streaming VAD
+chunking modes of ChunkingConversionUtil on synthetic multi-hour wav files.
+
+Run from the packages directory:
+    python benchmarks/chunking_benchmark.py --hours 1 4
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+BLOCK_SECONDS = 4
+VOICED_SECONDS = 3
+
+
+def write_synthetic_wav(path, hours, seed=0):
+    """Writes 3s noise bursts separated by 1s of near silence, block by block."""
+    random_state = np.random.RandomState(seed)
+    blocks = int(hours * 3600 / BLOCK_SECONDS)
+    with contextlib.closing(wave.open(path, "wb")) as wave_file:
+        wave_file.setnchannels(1)
+        wave_file.setsampwidth(2)
+        wave_file.setframerate(SAMPLE_RATE)
+        for _ in range(blocks):
+            block = random_state.normal(0, 30, SAMPLE_RATE * BLOCK_SECONDS)
+            block[: SAMPLE_RATE * VOICED_SECONDS] *= 100
+            wave_file.writeframes(np.clip(block, -32768, 32767).astype("<i2").tobytes())
+
+
+def run_mode(wav_file_path, streaming):
+    from ekstep_data_pipelines.common.audio_commons.chunking_conversion_util import (
+        ChunkingConversionUtil,
+    )
+
+    output_dir = tempfile.mkdtemp(prefix="chunks_")
+    start = time.time()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        ChunkingConversionUtil().create_audio_clips(
+            2,
+            15,
+            wav_file_path,
+            output_dir,
+            f"{output_dir}/vad.txt",
+            "synthetic.wav",
+            is_rechunking=False,
+            streaming=streaming,
+        )
+    elapsed = time.time() - start
+    chunks = len([f for f in os.listdir(output_dir) if f.endswith(".wav")])
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        json.dumps({"seconds": elapsed, "peak_rss_mb": peak_rss_mb, "chunks": chunks})
+    )
+
+
+def measure(wav_file_path, streaming):
+    output = subprocess.check_output(
+        [sys.executable, __file__, "--run", wav_file_path]
+        + (["--streaming"] if streaming else []),
+        stderr=subprocess.DEVNULL,
+    )
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", nargs="+", type=float, default=[1, 4])
+    parser.add_argument("--run", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--streaming", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_mode(args.run, args.streaming)
+        return
+
+    for hours in args.hours:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            wav_file_path = f"{tmp_dir}/synthetic_{hours}h.wav"
+            write_synthetic_wav(wav_file_path, hours)
+            size_mb = os.path.getsize(wav_file_path) / (1024 * 1024)
+            for streaming in (False, True):
+                result = measure(wav_file_path, streaming)
+                print(
+                    "{}h ({:.0f} MB) {:<9} peak_rss={:.0f} MB time={:.1f}s chunks={}".format(
+                        hours,
+                        size_mb,
+                        "streaming" if streaming else "in-memory",
+                        result["peak_rss_mb"],
+                        result["seconds"],
+                        result["chunks"],
+                    )
+                )
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
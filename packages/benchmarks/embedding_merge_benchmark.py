@@ -0,0 +1,104 @@
+"""
+Compares merging batch .npz embedding files by concatenating them in memory
+and saving a compressed .npz (the previous concatenate_embed_files) with
+merge_embed_files, which appends them to a memory mapped .npy. Each way runs
+in its own process so peak RSS is measured separately. Pages of the
+memory mapped output count towards RSS too, although they are file backed
+and can be dropped by the kernel at any time.
+
+Run from the packages directory:
+    python benchmarks/embedding_merge_benchmark.py --embeddings 200000 --batches 80
+"""
+
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+def write_batches(tmp_dir, num_embeddings, num_batches):
+    random_state = np.random.RandomState(0)
+    for batch_no, rows in enumerate(
+        np.array_split(np.arange(num_embeddings), num_batches)
+    ):
+        np.savez_compressed(
+            f"{tmp_dir}/batch_{batch_no}.npz",
+            embeds=random_state.rand(len(rows), 256).astype(np.float32),
+            file_paths=np.array([f"source/{row}_utterance.wav" for row in rows]),
+        )
+
+
+def merge_in_memory(npz_files, embed_file_dest):
+    loaded_files = [np.load(npz_file) for npz_file in npz_files]
+    final_embeds = np.concatenate([file["embeds"] for file in loaded_files])
+    final_file_paths = np.concatenate([file["file_paths"] for file in loaded_files])
+    np.savez_compressed(
+        embed_file_dest, embeds=final_embeds, file_paths=final_file_paths
+    )
+
+
+def run_merge(tmp_dir, mode):
+    from ekstep_data_pipelines.common.audio_commons.embedding_files import (
+        merge_embed_files,
+    )
+
+    npz_files = sorted(glob.glob(f"{tmp_dir}/batch_*.npz"))
+    rss_before_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.time()
+    if mode == "npz":
+        merge_in_memory(npz_files, f"{tmp_dir}/merged.npz")
+    else:
+        merge_embed_files(npz_files, f"{tmp_dir}/merged.npy")
+    elapsed = time.time() - start
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        json.dumps(
+            {"seconds": elapsed, "peak_rss_growth_mb": peak_rss_mb - rss_before_mb}
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embeddings", type=int, default=200000)
+    parser.add_argument("--batches", type=int, default=80)
+    parser.add_argument("--run", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--mode", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_merge(args.run, args.mode)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        write_batches(tmp_dir, args.embeddings, args.batches)
+        for mode, description in (
+            ("npz", "concatenate + savez_compressed"),
+            ("npy", "merge_embed_files (memmap .npy)"),
+        ):
+            output = subprocess.check_output(
+                [sys.executable, __file__, "--run", tmp_dir, "--mode", mode],
+                stderr=subprocess.DEVNULL,
+            )
+            result = json.loads(output.decode("utf-8").strip().splitlines()[-1])
+            print(
+                "{} embeddings in {} batches, {:<32} {:.1f}s peak RSS growth={:.0f} MB".format(
+                    args.embeddings,
+                    args.batches,
+                    description,
+                    result["seconds"],
+                    result["peak_rss_growth_mb"],
+                )
+            )
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
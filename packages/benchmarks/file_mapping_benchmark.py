@@ -0,0 +1,88 @@
+"""
+Compares mapping clustered embeddings back to their files by searching
+the embedding list (the former Map.find_index) with gathering file paths
+by the row indices the clustering pipeline now carries.
+
+Run from the packages directory:
+    python benchmarks/file_mapping_benchmark.py --sizes 10000 100000 500000
+
+The search is quadratic, so above --max-full-search embeddings it is timed
+on --sample lookups and extrapolated to all of them.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+
+def search_mapping(embeddings, file_paths, clusters, sample=None):
+    """
+    The mapping as it was done before row indices were carried. Returns
+    the seconds spent converting the embeddings to lists, the seconds spent
+    searching and the number of embeddings looked up.
+    """
+    start = time.time()
+    list_em = [list(i) for i in embeddings]
+    build_seconds = time.time() - start
+
+    start = time.time()
+    looked_up = 0
+    for cluster in clusters:
+        cluster_indices = []
+        for embed in embeddings[cluster]:
+            cluster_indices.append(list_em.index(list(embed)))
+            looked_up += 1
+            if sample is not None and looked_up >= sample:
+                return build_seconds, time.time() - start, looked_up
+        [file_paths[ind] for ind in cluster_indices]
+    return build_seconds, time.time() - start, looked_up
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000, 500000])
+    parser.add_argument("--cluster-size", type=int, default=50)
+    parser.add_argument("--max-full-search", type=int, default=10000)
+    parser.add_argument("--sample", type=int, default=200)
+    args = parser.parse_args()
+
+    from ekstep_data_pipelines.audio_analysis.speaker_analysis.create_file_mappings import (
+        Map,
+    )
+
+    random_state = np.random.RandomState(0)
+    for size in args.sizes:
+        embeddings = random_state.random_sample((size, 256)).astype(np.float32)
+        file_paths = np.array(["source/{}_file.wav".format(i) for i in range(size)])
+        clusters = np.array_split(
+            random_state.permutation(size), max(1, size // args.cluster_size)
+        )
+
+        start = time.time()
+        map_obj = Map(file_paths)
+        [map_obj.find_file(cluster) for cluster in clusters]
+        gather_seconds = time.time() - start
+
+        sample = None if size <= args.max_full_search else args.sample
+        build_seconds, lookup_seconds, looked_up = search_mapping(
+            embeddings, file_paths, clusters, sample
+        )
+        search_seconds = build_seconds + lookup_seconds * size / looked_up
+
+        print(
+            "{:>7} embeddings: search {:>10.2f}s{} gather {:.4f}s speedup {:.0f}x".format(
+                size,
+                search_seconds,
+                " (extrapolated)" if sample else "",
+                gather_seconds,
+                search_seconds / gather_seconds,
+            )
+        )
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
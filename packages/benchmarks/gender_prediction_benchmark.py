@@ -0,0 +1,86 @@
+"""
+Times gender prediction over random embeddings with the previous per row
+joblib path and with get_prediction_from_npz_file's block prediction, and
+checks that both give the same labels.
+
+Run from the packages directory:
+    python benchmarks/gender_prediction_benchmark.py --embeddings 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+from joblib import Parallel, delayed
+
+MODEL_PATH = "ekstep_data_pipelines/audio_analysis/models/clf_svc.sav"
+
+
+def predict_per_row(model, embeds):
+    from ekstep_data_pipelines.audio_analysis.audio_embeddings.gender_inference import (
+        get_prediction_for_embed,
+    )
+
+    predicted_gender = Parallel(n_jobs=-1)(
+        delayed(get_prediction_for_embed)(model, embed.reshape(1, -1))
+        for embed in embeds
+    )
+    return ["m" if x == 0 else "f" for x in predicted_gender]
+
+
+def main():
+    from ekstep_data_pipelines.audio_analysis.audio_embeddings.gender_inference import (
+        get_prediction_from_npz_file,
+        load_model,
+    )
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embeddings", type=int, default=100000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    model = load_model(MODEL_PATH)
+    random_state = np.random.RandomState(0)
+    embeds = np.abs(random_state.normal(size=(args.embeddings, 256))).astype(np.float32)
+    embeds /= np.linalg.norm(embeds, axis=1, keepdims=True)
+    file_paths = np.array(["src/{}.wav".format(index) for index in range(len(embeds))])
+    print("cpus available: {}".format(os.cpu_count()))
+
+    start = time.time()
+    expected = dict(zip(file_paths, predict_per_row(model, embeds)))
+    per_row_seconds = time.time() - start
+    print(
+        "{} embeddings, per row joblib: {:.1f}s".format(
+            args.embeddings, per_row_seconds
+        )
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        npz_file_path = os.path.join(tmp_dir, "embed_file.npz")
+        np.savez(npz_file_path, embeds=embeds, file_paths=file_paths)
+        for workers in args.workers:
+            start = time.time()
+            file_vs_gender_dict = get_prediction_from_npz_file(
+                model, npz_file_path, workers=workers
+            )
+            seconds = time.time() - start
+            print(
+                "{} embeddings, blocks with workers={}: {:.1f}s ({:.1f}x), "
+                "same labels: {}".format(
+                    args.embeddings,
+                    workers,
+                    seconds,
+                    per_row_seconds / seconds,
+                    file_vs_gender_dict == expected,
+                )
+            )
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
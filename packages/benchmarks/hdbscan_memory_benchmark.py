@@ -0,0 +1,139 @@
+"""
+Compares peak RSS and wall time of the cosine (precomputed distance matrix)
+and euclidean (normalized embeddings, tree based) partial set clustering
+modes on a synthetic speaker corpus, and how well their labels agree.
+
+Run from the packages directory:
+    python benchmarks/hdbscan_memory_benchmark.py --embeddings 11122 --partial-set-size 11122
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+def write_synthetic_corpus(path, num_embeddings, num_speakers, seed=0):
+    """Unit norm, non negative embeddings around one centroid per speaker."""
+    random_state = np.random.RandomState(seed)
+    centroids = np.abs(random_state.normal(size=(num_speakers, 256)))
+    centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+    speaker_weights = 1.0 / np.arange(1, num_speakers + 1)
+    speakers = random_state.choice(
+        num_speakers, num_embeddings, p=speaker_weights / speaker_weights.sum()
+    )
+    embeddings = np.abs(
+        centroids[speakers]
+        + random_state.normal(scale=0.04, size=(num_embeddings, 256))
+    )
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    np.save(path, embeddings.astype(np.float32))
+
+
+def run_mode(embeddings_path, metric, partial_set_size, labels_path):
+    from ekstep_data_pipelines.audio_analysis.speaker_analysis.clustering import (
+        Clustering,
+    )
+
+    embeddings = np.load(embeddings_path)
+    start = time.time()
+    _, noise_indices, all_cluster_indices = Clustering(
+        metric
+    ).run_partial_set_clusterings(
+        embeddings, min_cluster_size=4, partial_set_size=partial_set_size, min_samples=1
+    )
+    elapsed = time.time() - start
+
+    labels = np.full(len(embeddings), -1)
+    for label, cluster in enumerate(all_cluster_indices):
+        labels[cluster] = label
+    np.save(labels_path, labels)
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        json.dumps(
+            {
+                "seconds": elapsed,
+                "peak_rss_mb": peak_rss_mb,
+                "clusters": len(all_cluster_indices),
+                "noise": len(noise_indices),
+            }
+        )
+    )
+
+
+def measure(embeddings_path, metric, partial_set_size, labels_path):
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            __file__,
+            "--run",
+            embeddings_path,
+            "--metric",
+            metric,
+            "--partial-set-size",
+            str(partial_set_size),
+            "--labels",
+            labels_path,
+        ],
+        stderr=subprocess.DEVNULL,
+    )
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embeddings", type=int, default=11122)
+    parser.add_argument("--speakers", type=int, default=40)
+    parser.add_argument("--partial-set-size", type=int, default=11122)
+    parser.add_argument("--metric", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--run", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--labels", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_mode(args.run, args.metric, args.partial_set_size, args.labels)
+        return
+
+    from sklearn.metrics import adjusted_rand_score
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        embeddings_path = f"{tmp_dir}/embeddings.npy"
+        write_synthetic_corpus(embeddings_path, args.embeddings, args.speakers)
+
+        labels = {}
+        for metric in ("cosine", "euclidean"):
+            labels_path = f"{tmp_dir}/{metric}_labels.npy"
+            result = measure(
+                embeddings_path, metric, args.partial_set_size, labels_path
+            )
+            labels[metric] = np.load(labels_path)
+            print(
+                "{} embeddings, partial sets of {}, {:<9} peak_rss={:.0f} MB "
+                "time={:.1f}s clusters={} noise={}".format(
+                    args.embeddings,
+                    args.partial_set_size,
+                    metric,
+                    result["peak_rss_mb"],
+                    result["seconds"],
+                    result["clusters"],
+                    result["noise"],
+                )
+            )
+
+        print(
+            "adjusted rand index between the modes: {:.4f}".format(
+                adjusted_rand_score(labels["cosine"], labels["euclidean"])
+            )
+        )
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
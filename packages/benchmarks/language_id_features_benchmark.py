@@ -0,0 +1,78 @@
+"""
+Compares the language identification feature extraction of utils.load_data
+(librosa load and stft per file) with utils.load_data_batch (raw PCM reads
+and one stft over the whole batch).
+
+Run from the packages directory:
+    python benchmarks/language_id_features_benchmark.py --files 256 --batch-size 32
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def write_synthetic_chunks(chunk_dir, count, seed=0):
+    random_state = np.random.RandomState(seed)
+    paths = []
+    for index in range(count):
+        samples = random_state.normal(
+            0, 3000, int(random_state.uniform(3, 15) * SAMPLE_RATE)
+        )
+        path = f"{chunk_dir}/{index}_synthetic.wav"
+        with contextlib.closing(wave.open(path, "wb")) as wave_file:
+            wave_file.setnchannels(1)
+            wave_file.setsampwidth(2)
+            wave_file.setframerate(SAMPLE_RATE)
+            wave_file.writeframes(
+                np.clip(samples, -32768, 32767).astype("<i2").tobytes()
+            )
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    from ekstep_data_pipelines.audio_language_identification.utils import utils
+
+    with tempfile.TemporaryDirectory() as chunk_dir:
+        paths = write_synthetic_chunks(chunk_dir, args.files)
+
+        start = time.time()
+        for path in paths:
+            utils.load_data(path)
+        per_file_seconds = time.time() - start
+
+        start = time.time()
+        for batch_start in range(0, len(paths), args.batch_size):
+            utils.load_data_batch(paths[batch_start : batch_start + args.batch_size])
+        batch_seconds = time.time() - start
+
+    print(
+        "load_data:       {:.1f} features/s ({:.2f}s)".format(
+            len(paths) / per_file_seconds, per_file_seconds
+        )
+    )
+    print(
+        "load_data_batch: {:.1f} features/s ({:.2f}s, batch size {})".format(
+            len(paths) / batch_seconds, batch_seconds, args.batch_size
+        )
+    )
+    print("speedup: {:.2f}x".format(per_file_seconds / batch_seconds))
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
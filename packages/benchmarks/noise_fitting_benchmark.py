@@ -0,0 +1,72 @@
+"""
+Measures Merge.fit_noise_points on random embeddings, reporting wall time
+and the peak memory it allocates next to the size the full noise x clusters distance matrix
+would have had.
+
+Run from the packages directory:
+    python benchmarks/noise_fitting_benchmark.py --noise 100000 --clusters 5000
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+
+def main():
+    from ekstep_data_pipelines.audio_analysis.speaker_analysis.cluster_store import (
+        ClusterStore,
+    )
+    from ekstep_data_pipelines.audio_analysis.speaker_analysis.merging import Merge
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--noise", type=int, default=100000)
+    parser.add_argument("--clusters", type=int, default=5000)
+    parser.add_argument("--cluster-size", type=int, default=4)
+    parser.add_argument("--similarity", type=float, default=0.80)
+    args = parser.parse_args()
+
+    num_clustered = args.clusters * args.cluster_size
+    random_state = np.random.RandomState(0)
+    embeddings = np.abs(
+        random_state.normal(size=(num_clustered + args.noise, 256))
+    ).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    cluster_store = ClusterStore(embeddings)
+    cluster_store.add_clusters(np.array_split(np.arange(num_clustered), args.clusters))
+    noise_indices = np.arange(num_clustered, len(embeddings))
+
+    tracemalloc.start()
+    start = time.time()
+    unallocated_noise_indices = Merge(cluster_store).fit_noise_points(
+        noise_indices, max_sim_allowed=args.similarity
+    )
+    elapsed = time.time() - start
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        "{} noise points x {} clusters: {:.2f}s ({:.0f} points/s), "
+        "{} allocated".format(
+            args.noise,
+            args.clusters,
+            elapsed,
+            args.noise / elapsed,
+            args.noise - len(unallocated_noise_indices),
+        )
+    )
+    print(
+        "peak memory allocated {:.0f} MB, a full float32 distance matrix "
+        "would take {:.0f} MB".format(
+            peak_bytes / 2**20, args.noise * args.clusters * 4 / 2**20
+        )
+    )
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
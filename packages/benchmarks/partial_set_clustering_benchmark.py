@@ -0,0 +1,73 @@
+"""
+Times Clustering.run_partial_set_clusterings with a growing number of
+workers on a synthetic speaker corpus and checks that every run returns the
+same clusters as the sequential one.
+
+Run from the packages directory:
+    python benchmarks/partial_set_clustering_benchmark.py --embeddings 20000 --workers 1 2 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+
+def synthetic_embeddings(num_embeddings, num_speakers, seed=0):
+    random_state = np.random.RandomState(seed)
+    centroids = np.abs(random_state.normal(size=(num_speakers, 256)))
+    centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+    speakers = random_state.randint(0, num_speakers, num_embeddings)
+    embeddings = np.abs(
+        centroids[speakers]
+        + random_state.normal(scale=0.04, size=(num_embeddings, 256))
+    )
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings.astype(np.float32)
+
+
+def main():
+    from ekstep_data_pipelines.audio_analysis.speaker_analysis.clustering import (
+        Clustering,
+    )
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embeddings", type=int, default=20000)
+    parser.add_argument("--speakers", type=int, default=40)
+    parser.add_argument("--partial-set-size", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    embeddings = synthetic_embeddings(args.embeddings, args.speakers)
+    print("cpus available: {}".format(os.cpu_count()))
+
+    sequential_means = None
+    for workers in args.workers:
+        start = time.time()
+        mean_embeddings, _, _ = Clustering(workers=workers).run_partial_set_clusterings(
+            embeddings,
+            min_cluster_size=4,
+            partial_set_size=args.partial_set_size,
+            min_samples=1,
+        )
+        elapsed = time.time() - start
+
+        if sequential_means is None:
+            sequential_means = mean_embeddings
+        print(
+            "{} embeddings, partial sets of {}, workers={}: {:.2f}s, "
+            "same clusters as first run: {}".format(
+                args.embeddings,
+                args.partial_set_size,
+                workers,
+                elapsed,
+                np.array_equal(sequential_means, mean_embeddings),
+            )
+        )
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
@@ -0,0 +1,158 @@
+"""
+Sanitizes synthetic transcripts of every language the way
+sanitize_transcription does for each utterance, once in the
+four passes the sanitizers used to make (strip, ':' check, punctuation
+translate and regex substitution, with precompiled patterns), once with the
+table driven sanitize and once with sanitize_many in batches of BATCH_SIZE,
+and checks that all give the same transcripts and errors.
+
+Logging is disabled, as the sanitizers log every transcript.
+
+Run from the packages directory:
+    python benchmarks/sanitizer_benchmark.py --transcripts 1000000
+"""
+
+import argparse
+import logging
+import os
+import random
+import re
+import sys
+import time
+
+INVALID_CHARS = ["x", ":", "#", "漢"]
+
+# transcripts per sanitize_many call, about the utterances of an audio_id
+BATCH_SIZE = 500
+
+
+class LegacySanitizer:
+    """The sanitize of a language as it was before the character tables."""
+
+    def __init__(self, sanitizer):
+        self.sanitizer = sanitizer
+        self.valid_chars_pattern = re.compile(sanitizer.VALID_CHARS)
+        self.punctuation_table = str.maketrans(dict.fromkeys(sanitizer.PUNCTUATION))
+
+    def sanitize(self, transcription):
+        from ekstep_data_pipelines.audio_transcription.transcription_sanitizers.audio_transcription_errors import (
+            TranscriptionSanitizationError,
+        )
+
+        transcription = transcription.strip()
+
+        if self.sanitizer.REJECTS_COLON and ":" in transcription:
+            raise TranscriptionSanitizationError("transcription has :")
+
+        if "-" in transcription:
+            transcription = transcription.replace("-", " ")
+        transcription = transcription.translate(self.punctuation_table).strip()
+
+        if len(transcription) == 0:
+            raise TranscriptionSanitizationError("transcription is empty")
+
+        rejected_string = self.valid_chars_pattern.sub("", transcription)
+        if len(rejected_string.strip()) > 0:
+            raise TranscriptionSanitizationError(self.sanitizer.INVALID_CHARS_ERROR)
+
+        return transcription
+
+
+def make_transcripts(sanitizer, count, distinct=2000, seed=0):
+    """
+    Words of valid characters of the language with some punctuation, and
+    one transcript in twenty with a character the language rejects.
+    """
+    valid_chars = [
+        char
+        for char in map(chr, range(0x21, 0x3000))
+        if sanitizer.valid_chars_pattern.fullmatch(char)
+        and char not in sanitizer.PUNCTUATION
+    ]
+    random_state = random.Random(seed)
+    transcripts = []
+    for index in range(distinct):
+        words = [
+            "".join(random_state.choices(valid_chars, k=random_state.randint(2, 8)))
+            for _ in range(random_state.randint(3, 15))
+        ]
+        if index % 20 == 0:
+            words.insert(1, random_state.choice(INVALID_CHARS))
+        transcripts.append(" ".join(words) + random_state.choice(["", ".", " ।", ","]))
+    return [transcripts[index % distinct] for index in range(count)]
+
+
+def sanitize_all(sanitizer, transcripts):
+    from ekstep_data_pipelines.audio_transcription.transcription_sanitizers.audio_transcription_errors import (
+        TranscriptionSanitizationError,
+    )
+
+    results = []
+    for transcript in transcripts:
+        try:
+            results.append(sanitizer.sanitize(transcript))
+        except TranscriptionSanitizationError as error:
+            results.append(error.args)
+    return results
+
+
+def sanitize_many(sanitizer, transcripts, batch_size=BATCH_SIZE):
+    results = []
+    for start in range(0, len(transcripts), batch_size):
+        results.extend(
+            result.error.args if result.error else result.transcription
+            for result in sanitizer.sanitize_many(
+                transcripts[start : start + batch_size]
+            )
+        )
+    return results
+
+
+def timed(function, *args):
+    start = time.time()
+    result = function(*args)
+    return result, time.time() - start
+
+
+def main():
+    from ekstep_data_pipelines.audio_transcription.transcription_sanitizers import (
+        get_transcription_sanitizers,
+    )
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transcripts", type=int, default=1000000)
+    parser.add_argument("--languages", nargs="+", default=None)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    sanitizers = get_transcription_sanitizers()
+    languages = args.languages or sorted(set(sanitizers) - {"default"})
+
+    for language in languages:
+        sanitizer = sanitizers[language]
+        transcripts = make_transcripts(sanitizer, args.transcripts)
+
+        expected, legacy_seconds = timed(
+            sanitize_all, LegacySanitizer(sanitizer), transcripts
+        )
+        results, seconds = timed(sanitize_all, sanitizer, transcripts)
+        batch_results, batch_seconds = timed(sanitize_many, sanitizer, transcripts)
+
+        print(
+            "{:<15} {} transcripts: four passes {:.1f}s, sanitize {:.1f}s ({:.1f}x), "
+            "sanitize_many {:.1f}s ({:.1f}x), same results: {}".format(
+                language,
+                len(transcripts),
+                legacy_seconds,
+                seconds,
+                legacy_seconds / seconds,
+                batch_seconds,
+                legacy_seconds / batch_seconds,
+                results == expected and batch_results == expected,
+            )
+        )
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
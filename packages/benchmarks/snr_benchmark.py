@@ -0,0 +1,109 @@
+"""
+Measures how SNR.process_files_list scales with the number of worker
+processes on a directory of chunk wav files.
+
+Run from the packages directory:
+    python benchmarks/snr_benchmark.py --chunk-dir /path/to/clean/chunks --workers 1 2 4 8
+
+Without --chunk-dir synthetic 5 to 15 second chunks are generated first.
+"""
+
+import argparse
+import contextlib
+import glob
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+TABLE_FILE_PATH = "ekstep_data_pipelines/binaries/WadaSNR/Exe/Alpha0.400000.txt"
+
+
+def write_synthetic_chunks(chunk_dir, count, seed=0):
+    random_state = np.random.RandomState(seed)
+    for index in range(count):
+        seconds = random_state.uniform(5, 15)
+        samples = random_state.gamma(0.4, 2000, int(seconds * SAMPLE_RATE))
+        samples *= random_state.choice([-1, 1], len(samples))
+        samples += random_state.normal(0, random_state.uniform(10, 1000), len(samples))
+        with contextlib.closing(
+            wave.open(f"{chunk_dir}/{index}_synthetic.wav", "wb")
+        ) as wave_file:
+            wave_file.setnchannels(1)
+            wave_file.setsampwidth(2)
+            wave_file.setframerate(SAMPLE_RATE)
+            wave_file.writeframes(
+                np.clip(samples, -32768, 32767).astype("<i2").tobytes()
+            )
+
+
+def run(chunk_files, engine, workers, chunk_size, table_file_path):
+    from ekstep_data_pipelines.common.audio_commons.snr_util import SNR
+
+    snr = SNR(
+        snr_engine=engine,
+        table_file_path=table_file_path,
+        workers=workers,
+        chunk_size=chunk_size,
+    )
+    start = time.time()
+    snr_file_dict = snr.process_files_list(chunk_files)
+    return time.time() - start, snr_file_dict
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk-dir", default=None)
+    parser.add_argument("--synthetic-chunks", type=int, default=2000)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--chunk-size", type=int, default=16)
+    parser.add_argument("--engine", default="native", choices=["native", "binary"])
+    parser.add_argument("--table-file-path", default=TABLE_FILE_PATH)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        chunk_dir = args.chunk_dir
+        if chunk_dir is None:
+            chunk_dir = tmp_dir
+            write_synthetic_chunks(chunk_dir, args.synthetic_chunks)
+
+        chunk_files = sorted(glob.glob(f"{chunk_dir}/*.wav"))
+        audio_seconds = sum(
+            (os.path.getsize(path) - 44) / (2 * SAMPLE_RATE) for path in chunk_files
+        )
+        print(
+            f"{len(chunk_files)} chunks, {audio_seconds / 3600:.2f}h of audio, "
+            f"engine={args.engine}, chunk_size={args.chunk_size}"
+        )
+
+        baseline_seconds = None
+        baseline_result = None
+        for workers in args.workers:
+            seconds, result = run(
+                chunk_files,
+                args.engine,
+                workers,
+                args.chunk_size,
+                args.table_file_path,
+            )
+            if baseline_seconds is None:
+                baseline_seconds, baseline_result = seconds, result
+            print(
+                "workers={:<3} time={:.2f}s files/s={:.0f} speedup={:.2f}x "
+                "same_result={}".format(
+                    workers,
+                    seconds,
+                    len(chunk_files) / seconds,
+                    baseline_seconds / seconds,
+                    list(result.items()) == list(baseline_result.items()),
+                )
+            )
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
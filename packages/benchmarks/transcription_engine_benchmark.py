@@ -0,0 +1,113 @@
+"""
+Transcribes copies of a test utterance through AudioTranscription against
+a local gRPC speech recognizer answering after a fixed latency, with one
+utterance at a time and with the transcription engine running several,
+and reports utterances/s.
+
+Run from the packages directory:
+    python benchmarks/transcription_engine_benchmark.py --utterances 200
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent import futures
+from unittest.mock import Mock
+
+import grpc
+
+
+def main():
+    from ekstep_data_pipelines.audio_transcription.audio_transcription import (
+        AudioTranscription,
+    )
+    from ekstep_data_pipelines.common.audio_commons.transcription_clients.ekstepmodel_transcription_client import (
+        EkstepTranscriptionClient,
+    )
+    from ekstep_data_pipelines.common.audio_commons.transcription_clients.stub.speech_recognition_open_api_pb2 import (
+        SpeechRecognitionResult,
+    )
+    from ekstep_data_pipelines.common.audio_commons.transcription_clients.stub.speech_recognition_open_api_pb2_grpc import (
+        SpeechRecognizerServicer,
+        add_SpeechRecognizerServicer_to_server,
+    )
+    from ekstep_data_pipelines.common.infra_commons.storage.local_storage import (
+        LocalStorage,
+    )
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--utterances", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 16])
+    args = parser.parse_args()
+
+    class SlowSpeechRecognizer(SpeechRecognizerServicer):
+        def recognize(self, request, context):
+            time.sleep(args.latency)
+            return SpeechRecognitionResult(transcript="अलग अलग होते है")
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=32))
+    add_SpeechRecognizerServicer_to_server(SlowSpeechRecognizer(), server)
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    transcription_client = EkstepTranscriptionClient(
+        server_host="localhost", port=str(port), language="hi"
+    )
+
+    tmp_dir = tempfile.mkdtemp()
+    remote_dir = f"{tmp_dir}/1/clean"
+    os.makedirs(remote_dir)
+    file_names = [f"{index}.wav" for index in range(args.utterances)]
+    for file_name in file_names:
+        shutil.copy("ekstep_pipelines_tests/resources/test1.wav", remote_dir)
+        os.rename(f"{remote_dir}/test1.wav", f"{remote_dir}/{file_name}")
+
+    catalogue_dao = Mock()
+    catalogue_dao.find_utterance_by_name.side_effect = lambda utterances, name: {
+        "name": name,
+        "status": "Clean",
+        "duration": 3,
+    }
+
+    try:
+        for concurrency in args.concurrency:
+            audio_transcription = AudioTranscription(
+                Mock(), Mock(), {"transcription_clients": {}}, catalogue_dao
+            )
+            audio_transcription.fs_interface = LocalStorage()
+            audio_transcription.audio_transcription_config = {
+                "transcription_engine": {"ekstep": {"max_concurrency": concurrency}}
+            }
+            audio_transcription.generate_transcription_for_all_utterenaces(
+                1,
+                file_names,
+                "hindi",
+                transcription_client,
+                [],
+                False,
+                remote_dir,
+                "ekstep",
+            )
+            engine = audio_transcription.get_transcription_engine("ekstep")
+            print(
+                "{} utterances, {}s stt latency, max_concurrency={}: "
+                "{:.1f}s, {:.1f} utterances/s".format(
+                    args.utterances,
+                    args.latency,
+                    concurrency,
+                    engine.seconds,
+                    engine.utterances_per_second,
+                )
+            )
+    finally:
+        server.stop(None)
+        shutil.rmtree(tmp_dir)
+        shutil.rmtree(f"/tmp/{tmp_dir}", ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
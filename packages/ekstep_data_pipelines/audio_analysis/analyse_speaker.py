@@ -6,6 +6,7 @@ from ekstep_data_pipelines.audio_analysis.speaker_analysis.file_cluster_mapping
 )
 from ekstep_data_pipelines.audio_analysis.speaker_analysis.speaker_clustering import (
     create_speaker_clusters,
+    update_speaker_clusters,
 )
 from ekstep_data_pipelines.common.utils import get_logger
 
@@ -19,16 +20,47 @@ def analyse_speakers(
     partial_set_size,
     min_samples,
     fit_noise_on_similarity,
+    cluster_metric="cosine",
+    workers=1,
+    speaker_state=None,
+    max_pending_noise=10000,
 ):
-    file_map_dict, noise_file_map_dict = create_speaker_clusters(
-        embed_file_path,
-        source,
-        min_cluster_size,
-        partial_set_size,
-        min_samples,
-        fit_noise_on_similarity,
-    )
-    Logger.info("Noise count:", len(noise_file_map_dict))
+    """
+    Clusters the utterances of a source into speakers. With a speaker_state
+    that already holds speakers or noise, only the utterances in
+    embed_file_path are added to the known speakers or to new ones, and only
+    they are returned. At most max_pending_noise utterances left in noise
+    are kept in speaker_state.
+    """
+    if speaker_state is not None and (
+        speaker_state.num_speakers or speaker_state.noise_file_paths
+    ):
+        file_map_dict, noise_file_map_dict = update_speaker_clusters(
+            embed_file_path,
+            source,
+            speaker_state,
+            min_cluster_size,
+            partial_set_size,
+            min_samples,
+            fit_noise_on_similarity,
+            cluster_metric,
+            workers,
+            max_pending_noise,
+        )
+    else:
+        file_map_dict, noise_file_map_dict = create_speaker_clusters(
+            embed_file_path,
+            source,
+            min_cluster_size,
+            partial_set_size,
+            min_samples,
+            fit_noise_on_similarity,
+            cluster_metric,
+            workers,
+            speaker_state,
+            max_pending_noise,
+        )
+    Logger.info("Noise count: %s", len(noise_file_map_dict))
     speaker_to_file_name = speaker_to_file_name_map(file_map_dict)
     Logger.info("total speakers:%s", str(len(speaker_to_file_name)))
     return speaker_to_file_name
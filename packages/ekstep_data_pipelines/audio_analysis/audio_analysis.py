@@ -1,6 +1,7 @@
 import sys
 import multiprocessing
 import os
+import shutil
 
 from ekstep_data_pipelines.audio_analysis.analyse_speaker import analyse_speakers
 from ekstep_data_pipelines.audio_analysis.analyse_gender import analyse_gender
@@ -15,6 +16,16 @@ from ekstep_data_pipelines.common import BaseProcessor, CatalogueDao
 from ekstep_data_pipelines.audio_analysis.speaker_analysis.create_embeddings import (
     concatenate_embed_files,
 )
+from ekstep_data_pipelines.audio_analysis.speaker_analysis.speaker_state import (
+    STATE_FILE_EXTENSION,
+    SpeakerState,
+)
+from ekstep_data_pipelines.common.audio_commons.embedding_files import (
+    file_paths_index_path,
+)
+from ekstep_data_pipelines.common.infra_commons.storage.file_downloader import (
+    FileDownloader,
+)
 
 
 MIN_SAMPLES = 1
@@ -25,6 +36,14 @@ MIN_CLUSTER_SIZE = 5
 
 FIT_NOISE_ON_SIMILARITY = 0.80
 
+CLUSTER_METRIC = "cosine"
+
+CLUSTERING_WORKERS = 1
+
+DOWNLOAD_WORKERS = 8
+
+MAX_PENDING_NOISE = 10000
+
 ESTIMATED_CPU_SHARE = 0.1
 
 LOGGER = get_logger("AudioSpeakerClusteringProcessor")
@@ -72,7 +91,7 @@ class AudioAnalysis(BaseProcessor):
         path_for_embeddings = f'{remote_base_path}/{source}'
 
         embed_file_path = (
-            f"{AudioAnalysis.DEFAULT_DOWNLOAD_PATH}/{source}_embed_file.npz"
+            f"{AudioAnalysis.DEFAULT_DOWNLOAD_PATH}/{source}_embed_file.npy"
         )
         local_audio_download_path = f"{AudioAnalysis.DEFAULT_DOWNLOAD_PATH}/{source}/"
         self.ensure_path(local_audio_download_path)
@@ -93,9 +112,14 @@ class AudioAnalysis(BaseProcessor):
         fit_noise_on_similarity = parameters.get(
             "fit_noise_on_similarity", FIT_NOISE_ON_SIMILARITY
         )
+        cluster_metric = parameters.get("cluster_metric", CLUSTER_METRIC)
+        workers = parameters.get("workers", CLUSTERING_WORKERS)
+        incremental = parameters.get("incremental", False)
+        max_pending_noise = parameters.get("max_pending_noise", MAX_PENDING_NOISE)
+        download_workers = parameters.get("download_workers", DOWNLOAD_WORKERS)
 
 
-        npz_destination_path = f"{remote_download_path}/{source}_embed_file.npz"
+        embed_destination_path = f"{remote_download_path}/{source}_embed_file.npy"
 
         analysis_options = self.get_analysis_options()
 
@@ -103,15 +127,56 @@ class AudioAnalysis(BaseProcessor):
         file_to_speaker_gender_mapping = None
 
 
-        self.ensure_path(local_embeddings_path)
+        speaker_state = None
+        new_embedding_files = []
+        speaker_state_path = (
+            f"{AudioAnalysis.DEFAULT_DOWNLOAD_PATH}/{source}{STATE_FILE_EXTENSION}"
+        )
+        remote_speaker_state_path = (
+            f"{remote_download_path}/{source}{STATE_FILE_EXTENSION}"
+        )
+
+        if incremental:
+            # only the embedding files that are not in the speaker state yet
+            # are downloaded and analysed
+            speaker_state = self.load_speaker_state(
+                speaker_state_path, remote_speaker_state_path
+            )
+            local_embeddings_path = (
+                f"{self.DEFAULT_DOWNLOAD_PATH}/new_embeddings/{source}/"
+            )
+            shutil.rmtree(local_embeddings_path, ignore_errors=True)
+            self.ensure_path(local_embeddings_path)
+
+            new_embedding_files = self.download_all_embedding(
+                path_for_embeddings,
+                local_embeddings_path,
+                skip_files=speaker_state.embedding_files,
+                max_workers=download_workers,
+            )
+            if not new_embedding_files:
+                LOGGER.info(f"No new embedding files found for {source}")
+                return
+
+            LOGGER.info(
+                f"Analysing {len(new_embedding_files)} new embedding files of "
+                f"{source} against {speaker_state.num_speakers} known speakers"
+            )
+            concatenate_embed_files(embed_file_path, local_embeddings_path)
+        else:
+            self.ensure_path(local_embeddings_path)
 
-        self.download_all_embedding(path_for_embeddings,local_embeddings_path)
+            self.download_all_embedding(
+                path_for_embeddings,
+                local_embeddings_path,
+                max_workers=download_workers,
+            )
 
-        self.merge_embeddings(
-            embed_file_path,
-            local_embeddings_path,
-            npz_destination_path
-        )
+            self.merge_embeddings(
+                embed_file_path,
+                local_embeddings_path,
+                embed_destination_path
+            )
 
         if analysis_options.get("speaker_analysis") == 1:
             speaker_to_file_name = analyse_speakers(
@@ -121,6 +186,10 @@ class AudioAnalysis(BaseProcessor):
                 partial_set_size,
                 min_samples,
                 fit_noise_on_similarity,
+                cluster_metric,
+                workers,
+                speaker_state,
+                max_pending_noise,
             )
 
         if analysis_options.get("gender_analysis") == 1:
@@ -133,32 +202,86 @@ class AudioAnalysis(BaseProcessor):
             source,
         )
 
-    def download_all_embedding(self,full_path,local_embeddings_path):
-        
-        all_blobs = self.fs_interface.list_blobs_in_a_path(full_path)
-        bucket_name = full_path.split('/')[0]
-
-        for blob in all_blobs:
-            print(blob.name)
-            if '.npz' in blob.name:
-                print(f'{local_embeddings_path}{os.path.basename(blob.name)}{blob.name},{blob}')
-                self.fs_interface.download_file_to_location(
-                    f'{bucket_name}/{blob.name}', f'{local_embeddings_path}{os.path.basename(blob.name)}'
-                )
+        if speaker_state is not None and speaker_to_file_name is not None:
+            speaker_state.embedding_files.extend(new_embedding_files)
+            self.save_speaker_state(
+                speaker_state, speaker_state_path, remote_speaker_state_path
+            )
+
+    def load_speaker_state(self, speaker_state_path, remote_speaker_state_path):
+        if self.fs_interface.path_exists(remote_speaker_state_path):
+            self.fs_interface.download_file_to_location(
+                remote_speaker_state_path, speaker_state_path
+            )
+            return SpeakerState.load(speaker_state_path)
+
+        LOGGER.info("No speaker state found, all the speakers will be clustered")
+        return SpeakerState()
+
+    def save_speaker_state(
+        self, speaker_state, speaker_state_path, remote_speaker_state_path
+    ):
+        speaker_state.save(speaker_state_path)
+        is_uploaded = self.fs_interface.upload_to_location(
+            speaker_state_path, remote_speaker_state_path
+        )
+        if is_uploaded:
+            LOGGER.info("speaker state uploaded to :" + remote_speaker_state_path)
+        else:
+            LOGGER.info(
+                "speaker state could not be uploaded to :" + remote_speaker_state_path
+            )
+
+    def download_all_embedding(
+        self,
+        full_path,
+        local_embeddings_path,
+        skip_files=(),
+        max_workers=DOWNLOAD_WORKERS,
+    ):
+        """
+        Downloads the .npz embedding files under full_path, except the ones
+        named in skip_files, max_workers at a time, and returns their names.
+        Files already in local_embeddings_path with the same size and md5
+        are kept as they are, so an interrupted download can be resumed.
+        """
+        skip_files = set(skip_files)
+        embedding_files = [
+            remote_file
+            for remote_file in self.fs_interface.list_files_with_checksums(full_path)
+            if remote_file.path.endswith('.npz')
+            and os.path.basename(remote_file.path) not in skip_files
+        ]
+        LOGGER.info(f"{len(embedding_files)} embedding files found in {full_path}")
+
+        downloader = FileDownloader.get_instance(self.fs_interface, max_workers)
+        return downloader.download(embedding_files, local_embeddings_path)
 
 
     def merge_embeddings(
         self,
         embed_file_path,
         local_embeddings_path,
-        npz_bucket_destination_path,
+        embed_bucket_destination_path,
     ):
+        """
+        Gets the merged .npy embeddings of the source and their file path
+        index, from the bucket if they were merged before or by merging the
+        downloaded .npz files.
+        """
+        file_paths_path = file_paths_index_path(embed_file_path)
+        file_paths_bucket_path = file_paths_index_path(embed_bucket_destination_path)
 
-        if self.fs_interface.path_exists(npz_bucket_destination_path):
+        if self.fs_interface.path_exists(
+            embed_bucket_destination_path
+        ) and self.fs_interface.path_exists(file_paths_bucket_path):
 
-            LOGGER.info("npz file is already present in bucket.")
+            LOGGER.info("merged embeddings are already present in bucket.")
+            self.fs_interface.download_file_to_location(
+                embed_bucket_destination_path, embed_file_path
+            )
             self.fs_interface.download_file_to_location(
-                npz_bucket_destination_path, embed_file_path
+                file_paths_bucket_path, file_paths_path
             )
         else:
             LOGGER.info(
@@ -166,14 +289,20 @@ class AudioAnalysis(BaseProcessor):
             )
             concatenate_embed_files(embed_file_path, local_embeddings_path)
 
-            is_uploaded = self.fs_interface.upload_to_location(
-                embed_file_path, npz_bucket_destination_path
+            embeds_uploaded = self.fs_interface.upload_to_location(
+                embed_file_path, embed_bucket_destination_path
             )
-            if is_uploaded:
-                LOGGER.info("npz file uploaded to :" + npz_bucket_destination_path)
+            file_paths_uploaded = self.fs_interface.upload_to_location(
+                file_paths_path, file_paths_bucket_path
+            )
+            if embeds_uploaded and file_paths_uploaded:
+                LOGGER.info(
+                    "merged embeddings uploaded to :" + embed_bucket_destination_path
+                )
             else:
                 LOGGER.info(
-                    "npz file could not be uploaded to :" + npz_bucket_destination_path
+                    "merged embeddings could not be uploaded to :"
+                    + embed_bucket_destination_path
                 )
 
     def update_info_in_db(
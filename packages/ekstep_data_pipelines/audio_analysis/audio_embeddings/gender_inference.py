@@ -9,6 +9,11 @@ from joblib import Parallel, delayed
 from resemblyzer import VoiceEncoder, preprocess_wav
 from tqdm import tqdm
 
+from ekstep_data_pipelines.common.audio_commons.embedding_files import load_embeddings
+
+# number of embeddings passed to model.predict at once
+PREDICTION_BLOCK_SIZE = 4096
+
 
 def get_parser():
     parser = argparse.ArgumentParser()
@@ -67,6 +72,28 @@ def get_prediction_for_embed(model, embed):
     return model.predict(embed)[0]
 
 
+def predict_in_blocks(model, embeds, block_size=PREDICTION_BLOCK_SIZE, workers=1):
+    """
+    Calls model.predict on contiguous blocks of block_size embeddings, spread
+    over workers processes when there is more than one, and returns the
+    predictions of all the embeddings in order.
+    """
+    blocks = [
+        np.asarray(embeds[start : start + block_size])
+        for start in range(0, len(embeds), block_size)
+    ]
+    if not blocks:
+        return np.array([])
+
+    if workers > 1 and len(blocks) > 1:
+        predictions = Parallel(n_jobs=workers)(
+            delayed(model.predict)(block) for block in blocks
+        )
+    else:
+        predictions = [model.predict(block) for block in tqdm(blocks)]
+    return np.concatenate(predictions)
+
+
 def get_prediction_csv_mode(voice_enc, model, csv_path, save_dir):
     data_frame = pd.read_csv(csv_path, header=None, names=["file_paths"])
     data_frame["predicted_gender"] = Parallel(n_jobs=-1)(
@@ -79,21 +106,23 @@ def get_prediction_csv_mode(voice_enc, model, csv_path, save_dir):
     print("Inference Completed")
 
 
-def get_prediction_from_npz_file(model, npz_file_path):
+def get_prediction_from_npz_file(
+    model, npz_file_path, *, block_size=PREDICTION_BLOCK_SIZE, workers=1
+):
     """
 
     :param model: (str) model file with extension .sav, stored in ../model/clf_svc.sav
-    :param npz_file_path: (str) path to binary .npz file containing embeddings and file_paths
+    :param npz_file_path: (str) path to a merged .npy embeddings file with its file path
+    index, or to a .npz file containing embeds and file_paths
+    :param block_size: (int) number of embeddings predicted at once
+    :param workers: (int) number of processes predicting blocks
     :return: (dict) : key-> file_path, value->predicted gender label ('m' or 'f')
     """
-    npz_file = np.load(npz_file_path)
-    embeds = npz_file["embeds"]
-    file_paths = npz_file["file_paths"]
-    predicted_gender = Parallel(n_jobs=-1)(
-        delayed(get_prediction_for_embed)(model, embed.reshape(1, -1))
-        for embed in tqdm(embeds)
+    embeds, file_paths = load_embeddings(npz_file_path)
+    predictions = predict_in_blocks(
+        model, embeds, block_size=block_size, workers=workers
     )
-    predicted_gender = list(map(lambda x: "m" if x == 0 else "f", predicted_gender))
+    predicted_gender = np.where(predictions == 0, "m", "f").tolist()
 
     if len(predicted_gender) == len(file_paths):
         file_vs_gender_dict = dict(zip(file_paths, predicted_gender))
@@ -113,8 +142,7 @@ def main(args):
 
         if args.npz_file_path:
             npz_file_path = args.npz_file_path
-            save_dir = args.save_dir
-            get_prediction_from_npz_file(model, npz_file_path, save_dir)
+            get_prediction_from_npz_file(model, npz_file_path)
 
         else:
             csv_path = args.csv_path
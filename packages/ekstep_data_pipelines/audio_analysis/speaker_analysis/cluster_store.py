@@ -0,0 +1,188 @@
+import numpy as np
+
+
+class ClusterStore:
+    """
+    Clusters over the rows of one embeddings matrix, kept as arrays instead
+    of one list or array per cluster:
+      - labels: cluster of each row, NO_CLUSTER for rows in no cluster
+      - positions: place of each row inside its cluster, so the rows of a
+        cluster are listed in the order they were added in
+      - was_noise: whether each row was fitted into its cluster as noise
+      - sums, counts and mean_embeddings: one row per cluster
+    """
+
+    NO_CLUSTER = -1
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        num_rows, dim = embeddings.shape
+        self.labels = np.full(num_rows, ClusterStore.NO_CLUSTER, dtype=np.int32)
+        self.positions = np.zeros(num_rows, dtype=np.int32)
+        self.was_noise = np.zeros(num_rows, dtype=bool)
+        self.sums = np.zeros((0, dim))
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.mean_embeddings = np.zeros((0, dim), dtype=embeddings.dtype)
+
+    @property
+    def num_clusters(self):
+        return len(self.counts)
+
+    def add_clusters(self, all_cluster_indices, mean_embeddings=None):
+        """
+        Appends clusters given as arrays of row indices, none of which may
+        already be in a cluster. Their means are computed from the
+        embeddings unless mean_embeddings is given.
+        """
+        if not len(all_cluster_indices):
+            return
+
+        sizes = np.array([len(cluster) for cluster in all_cluster_indices])
+        new_labels = self.num_clusters + np.arange(len(sizes))
+        rows = np.concatenate(all_cluster_indices).astype(int)
+        starts = np.cumsum(sizes) - sizes
+
+        self.labels[rows] = np.repeat(new_labels, sizes)
+        self.positions[rows] = np.arange(len(rows)) - np.repeat(starts, sizes)
+        self.was_noise[rows] = False
+
+        sums = np.array(
+            [
+                self.embeddings[cluster].sum(axis=0, dtype=np.float64)
+                for cluster in all_cluster_indices
+            ]
+        )
+        if mean_embeddings is None:
+            mean_embeddings = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+
+        self.sums = np.concatenate([self.sums, sums])
+        self.counts = np.concatenate([self.counts, sizes])
+        self.mean_embeddings = np.concatenate(
+            [self.mean_embeddings, np.asarray(mean_embeddings, self.embeddings.dtype)]
+        )
+
+    def add_previous_clusters(self, sums, counts):
+        """
+        Appends clusters whose rows are not in this embeddings matrix, like
+        the speakers of an earlier run, given by their sums and counts.
+        New rows can be added to them with add_to_clusters.
+        """
+        if not len(counts):
+            return
+
+        sums = np.asarray(sums, dtype=np.float64)
+        self.sums = np.concatenate([self.sums, sums])
+        self.counts = np.concatenate([self.counts, np.asarray(counts, dtype=np.int64)])
+        self.mean_embeddings = np.concatenate(
+            [
+                self.mean_embeddings,
+                (sums / np.linalg.norm(sums, axis=1, keepdims=True)).astype(
+                    self.embeddings.dtype
+                ),
+            ]
+        )
+
+    def cluster_indices(self, cluster_labels=None):
+        """
+        Returns the row indices of each cluster, or of the clusters in
+        cluster_labels, in the order the rows were added in.
+        """
+        if not self.num_clusters:
+            return []
+
+        in_cluster = np.flatnonzero(self.labels != ClusterStore.NO_CLUSTER)
+        rows = in_cluster[
+            np.lexsort((self.positions[in_cluster], self.labels[in_cluster]))
+        ]
+        sizes = np.bincount(self.labels[in_cluster], minlength=self.num_clusters)
+        all_cluster_indices = np.split(rows, np.cumsum(sizes)[:-1])
+        if cluster_labels is None:
+            return all_cluster_indices
+        return [all_cluster_indices[label] for label in cluster_labels]
+
+    def keep_clusters(self, is_kept):
+        """
+        Drops the clusters where is_kept is False and renumbers the rest in
+        their current order. Rows of dropped clusters end up in no cluster.
+        """
+        new_labels = np.full(self.num_clusters + 1, ClusterStore.NO_CLUSTER)
+        new_labels[:-1][is_kept] = np.arange(np.count_nonzero(is_kept))
+        # NO_CLUSTER indexes the last entry, so it maps to itself
+        self.labels = new_labels[self.labels].astype(np.int32)
+
+        self.sums = self.sums[is_kept]
+        self.counts = self.counts[is_kept]
+        self.mean_embeddings = self.mean_embeddings[is_kept]
+
+    def remove_clusters(self, cluster_labels):
+        is_kept = np.ones(self.num_clusters, dtype=bool)
+        is_kept[np.asarray(cluster_labels, dtype=int)] = False
+        self.keep_clusters(is_kept)
+
+    def merge_clusters(self, final_pairs_to_merge):
+        """
+        Takes a dict with a cluster label as key and the labels of the
+        clusters to merge into it as value. Rows of merged clusters follow
+        the rows of the key in the order of the value. Sums and counts are
+        added up and only the means of the keys are recomputed.
+        """
+        keys = np.array(list(final_pairs_to_merge.keys()), dtype=int)
+        values = [
+            np.asarray(value, dtype=int) for value in final_pairs_to_merge.values()
+        ]
+        clusters_lost = np.concatenate(values)
+        merged_into = np.repeat(keys, [len(value) for value in values])
+
+        # each merged cluster is moved behind its key and the clusters before
+        # it in the value
+        offsets = np.zeros(self.num_clusters, dtype=np.int64)
+        for key, value in zip(keys, values):
+            value_counts = self.counts[value]
+            offsets[value] = self.counts[key] + np.cumsum(value_counts) - value_counts
+
+        target_labels = np.arange(self.num_clusters)
+        target_labels[clusters_lost] = merged_into
+        in_cluster = self.labels != ClusterStore.NO_CLUSTER
+        row_labels = self.labels[in_cluster]
+        self.positions[in_cluster] += offsets[row_labels].astype(np.int32)
+        self.labels[in_cluster] = target_labels[row_labels]
+
+        np.add.at(self.sums, merged_into, self.sums[clusters_lost])
+        np.add.at(self.counts, merged_into, self.counts[clusters_lost])
+        self.mean_embeddings[keys] = self.sums[keys] / np.linalg.norm(
+            self.sums[keys], axis=1, keepdims=True
+        )
+
+        is_kept = np.ones(self.num_clusters, dtype=bool)
+        is_kept[clusters_lost] = False
+        self.keep_clusters(is_kept)
+
+    def add_to_clusters(self, rows, cluster_labels, was_noise=True):
+        """
+        Appends rows, which must be in no cluster, to the clusters in
+        cluster_labels, in the order given, and updates the sums, counts and
+        means of those clusters.
+        """
+        rows = np.asarray(rows, dtype=int)
+        cluster_labels = np.asarray(cluster_labels, dtype=int)
+        if not len(rows):
+            return
+
+        # rank of every row among the rows added to the same cluster
+        order = np.argsort(cluster_labels, kind="stable")
+        sorted_labels = cluster_labels[order]
+        group_starts = np.searchsorted(sorted_labels, sorted_labels)
+        ranks = np.empty(len(rows), dtype=np.int64)
+        ranks[order] = np.arange(len(rows)) - group_starts
+
+        self.labels[rows] = cluster_labels
+        self.positions[rows] = self.counts[cluster_labels] + ranks
+        self.was_noise[rows] = was_noise
+
+        np.add.at(self.sums, cluster_labels, self.embeddings[rows])
+        self.counts += np.bincount(cluster_labels, minlength=self.num_clusters)
+
+        changed = np.unique(cluster_labels)
+        self.mean_embeddings[changed] = self.sums[changed] / np.linalg.norm(
+            self.sums[changed], axis=1, keepdims=True
+        )
@@ -1,13 +1,61 @@
 import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
 import hdbscan
 import numpy as np
 from sklearn.metrics.pairwise import cosine_distances
 
+# embeddings of the pool worker, memory mapped from the file written by
+# Clustering.run_partial_set_clusterings_in_pool
+_worker_embeddings = None
+
+
+def _init_worker(embeddings_file_path):
+    global _worker_embeddings
+    _worker_embeddings = np.load(embeddings_file_path, mmap_mode="r")
+
+
+def _npy_file_path(embeddings):
+    """
+    Returns the path of the .npy file the embeddings are memory mapped
+    from when they map the whole of it, as load_embeddings gives them, and
+    None otherwise. Views of a memmap keep its filename, so the shape is
+    checked against the file.
+    """
+    if not isinstance(embeddings, np.memmap) or embeddings.filename is None:
+        return None
+    try:
+        on_disk = np.load(embeddings.filename, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if (
+        on_disk.shape != embeddings.shape
+        or on_disk.dtype != embeddings.dtype
+        or not on_disk.flags.c_contiguous
+        or not embeddings.flags.c_contiguous
+    ):
+        return None
+    return embeddings.filename
+
+
+def _cluster_partial_set_in_worker(clustering, partial_set_indices, hdbscan_kwargs):
+    return clustering.cluster_partial_set(
+        _worker_embeddings, partial_set_indices, **hdbscan_kwargs
+    )
+
 
 class Clustering:
-    def __init__(self):
-        pass
+    # cosine clusters a precomputed cosine distance matrix of each partial
+    # set, euclidean clusters the L2 normalized embeddings with HDBSCAN's
+    # tree based algorithms and never builds an n x n matrix
+    COSINE_METRIC = "cosine"
+    EUCLIDEAN_METRIC = "euclidean"
+
+    def __init__(self, metric=COSINE_METRIC, workers=1):
+        self.metric = metric
+        self.workers = workers or os.cpu_count()
 
     def make_partial_sets(self, embeddings, partial_set_size):
         """
@@ -54,7 +102,12 @@ class Clustering:
     ):
         # because HDBSCAN expects double dtype
         embeddings = embeddings.astype("double")
-        distance_matrix = cosine_distances(embeddings)
+        if metric == "precomputed":
+            data = cosine_distances(embeddings)
+        else:
+            # for unit vectors the euclidean distance is sqrt(2 * cosine
+            # distance), so the neighbourhoods are the same as with cosine
+            data = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
 
         clusterer = hdbscan.HDBSCAN(
             metric=metric,
@@ -62,10 +115,90 @@ class Clustering:
             min_samples=min_samples,
             cluster_selection_method=cluster_selection_method,
         )
-        clusterer.fit(distance_matrix)
+        clusterer.fit(data)
 
         return clusterer
 
+    def cluster_partial_set(
+        self,
+        embeddings,
+        partial_set_indices,
+        metric,
+        min_cluster_size,
+        min_samples,
+        cluster_selection_method,
+    ):
+        """
+        Runs HDBSCAN on the rows of embeddings in partial_set_indices.
+        Returns the normalized mean embedding of each cluster, the row indices
+        of the noise points and the row indices of each cluster.
+        """
+        clusterer = self.run_hdbscan(
+            embeddings[partial_set_indices],
+            metric=metric,
+            min_cluster_size=min_cluster_size,
+            min_samples=min_samples,
+            cluster_selection_method=cluster_selection_method,
+        )
+
+        partial_set_labels = clusterer.labels_
+
+        noise_point_indices = partial_set_indices[partial_set_labels == -1]
+
+        # mapping contains cluster label as key and the row indices of the
+        # cluster embeddings as values
+        mapping = self.get_cluster_embeddings(partial_set_indices, partial_set_labels)
+
+        mean_embeddings = []
+        cluster_indices = []
+        # logic for calculating mean embedding of the cluster if
+        # cluster-label != -1 (noise)
+        for i in mapping.items():
+            if i[0] != -1:
+                raw_embed = np.mean(embeddings[i[1]], axis=0)
+                mean_embeddings.append(raw_embed / np.linalg.norm(raw_embed, 2))
+                cluster_indices.append(i[1])
+
+        return mean_embeddings, noise_point_indices, cluster_indices
+
+    def run_partial_set_clusterings_in_pool(self, embeddings, partial_sets, **kwargs):
+        """
+        Clusters the partial sets on a pool of self.workers processes. Every
+        worker memory maps the .npy file of the embeddings, so only the row
+        indices of each partial set are sent to them. Embeddings memory
+        mapped from a whole .npy file use that file, others are written once
+        to a temporary one. Results come back in the order of partial_sets.
+        """
+        embeddings_file_path = _npy_file_path(embeddings)
+        if embeddings_file_path is not None:
+            return self.run_partial_set_clusterings_on_file(
+                embeddings_file_path, partial_sets, **kwargs
+            )
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            embeddings_file_path = os.path.join(tmp_dir, "embeddings.npy")
+            np.save(embeddings_file_path, embeddings)
+            return self.run_partial_set_clusterings_on_file(
+                embeddings_file_path, partial_sets, **kwargs
+            )
+
+    def run_partial_set_clusterings_on_file(
+        self, embeddings_file_path, partial_sets, **kwargs
+    ):
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(partial_sets)),
+            initializer=_init_worker,
+            initargs=(embeddings_file_path,),
+        ) as executor:
+            return list(
+                executor.map(
+                    _cluster_partial_set_in_worker,
+                    [self] * len(partial_sets),
+                    partial_sets,
+                    [kwargs] * len(partial_sets),
+                )
+            )
+
     def run_partial_set_clusterings(
         self,
         embeddings,
@@ -73,69 +206,74 @@ class Clustering:
         partial_set_size=11122,
         min_samples=15,
         cluster_selection_method="eom",
+        indices=None,
     ):
         """
-        Runs HDBSCAN on partial sets of orginial data,
+        Runs HDBSCAN on partial sets of orginial data, restricted to the rows
+        in indices when given. Clusters and noise are returned as row indices
+        into embeddings, so they map straight back to their files.
         Returns:
           - mean embeddings: np.ndarray -> mean embeds of each cluster found in each partial set
-          - flat_noise_embeds: np.ndarray -> an array containing all the noise points
+          - flat_noise_indices: np.ndarray -> row indices of all the noise points
           found over all partial sets.
-          - all_cluster_embeds: list of np.arrays ->
+          - all_cluster_indices: list of np.arrays -> row indices of each cluster
 
         """
 
         noise = []
         mean_embeddings = []
-        all_cluster_embeds = []
+        all_cluster_indices = []
         if min_samples is None:
             min_samples = min_cluster_size
+        if indices is None:
+            indices = np.arange(embeddings.shape[0])
+        hdbscan_metric = (
+            "precomputed" if self.metric == Clustering.COSINE_METRIC else "euclidean"
+        )
 
         partial_sets = self.make_partial_sets(
-            embeddings, partial_set_size=partial_set_size
+            np.asarray(indices), partial_set_size=partial_set_size
+        )
+        hdbscan_kwargs = dict(
+            metric=hdbscan_metric,
+            min_cluster_size=min_cluster_size,
+            min_samples=min_samples,
+            cluster_selection_method=cluster_selection_method,
         )
-        for ind, partial_set in enumerate(partial_sets):
-
-            clusterer = self.run_hdbscan(
-                partial_set,
-                metric="precomputed",
-                min_cluster_size=min_cluster_size,
-                min_samples=min_samples,
-                cluster_selection_method=cluster_selection_method,
+        if self.workers > 1 and len(partial_sets) > 1:
+            partial_set_results = self.run_partial_set_clusterings_in_pool(
+                embeddings, partial_sets, **hdbscan_kwargs
+            )
+        else:
+            partial_set_results = (
+                self.cluster_partial_set(
+                    embeddings, partial_set_indices, **hdbscan_kwargs
+                )
+                for partial_set_indices in partial_sets
             )
 
-            partial_set_labels = clusterer.labels_
-
-            noise_point_embeds = [
-                partial_set[index]
-                for index, label in enumerate(partial_set_labels)
-                if label == -1
-            ]
-            noise.append(noise_point_embeds)
+        # partial sets are merged in their original order, so the result does
+        # not depend on the number of workers
+        for ind, (set_means, noise_point_indices, set_cluster_indices) in enumerate(
+            partial_set_results
+        ):
+            noise.append(noise_point_indices)
 
             print(
                 "Points classified as noise in partial set {} :{}".format(
-                    ind + 1, len(noise_point_embeds)
+                    ind + 1, len(noise_point_indices)
                 )
             )
 
-            # mapping contains cluster label as key and cluster embeddings as
-            # values
-            mapping = self.get_cluster_embeddings(partial_set, partial_set_labels)
-
-            # logic for calculating mean embedding of the cluster if
-            # cluster-label != -1 (noise)
-            for i in mapping.items():
-                if i[0] != -1:
-                    raw_embed = np.mean(i[1], axis=0)
-                    mean_embeddings.append(raw_embed / np.linalg.norm(raw_embed, 2))
-                    all_cluster_embeds.append(list(i[1]))
+            mean_embeddings.extend(set_means)
+            all_cluster_indices.extend(set_cluster_indices)
 
-        # getting flat noise embeds -> noise contains a list of numpy arrays :
+        # getting flat noise indices -> noise contains a list of numpy arrays :
         # len(noise) = num_partial_sets
-        flat_noise_embeds = [item for sublist in noise for item in sublist]
+        flat_noise_indices = np.concatenate(noise or [[]]).astype(int)
 
         return (
             np.array(mean_embeddings),
-            np.array(flat_noise_embeds),
-            all_cluster_embeds,
+            flat_noise_indices,
+            all_cluster_indices,
         )
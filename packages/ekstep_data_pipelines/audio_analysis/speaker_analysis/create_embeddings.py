@@ -7,6 +7,10 @@ import numpy as np
 from resemblyzer import preprocess_wav, VoiceEncoder
 from tqdm import tqdm
 
+from ekstep_data_pipelines.common.audio_commons.embedding_files import (
+    merge_embed_files,
+)
+
 
 def audio_paths(directory, pattern):
     print("Using dir {}".format(directory + pattern))
@@ -21,22 +25,21 @@ def save_embeddings(embed_file_path, embeddings, file_paths):
 
 
 def concatenate_embed_files(embed_file_dest,local_npz_folder_path):
+    """
+    Merges all the .npz embedding files in local_npz_folder_path into a
+    float32 .npy matrix at embed_file_dest plus a file path index next to it.
+    """
     pattern = '.npz'
     pattern_prefix = f'{local_npz_folder_path}*'
     print(pattern_prefix)
-    npz_files_to_concat = glob.glob(pattern_prefix, recursive=True)
+    # not the .npz.part files left by interrupted downloads
+    npz_files_to_concat = sorted(
+        file for file in glob.glob(pattern_prefix, recursive=True) if file.endswith(pattern)
+    )
     if npz_files_to_concat:
         print(npz_files_to_concat)
-        list_of_loaded_files = []
-        for file in npz_files_to_concat:
-            if pattern in file:
-                list_of_loaded_files.append(np.load(file))
-
-        final_embeds = np.concatenate([file['embeds'] for file in list_of_loaded_files])
-        final_file_paths = np.concatenate([file['file_paths'] for file in list_of_loaded_files])
-        print(f'Final length of concatenated embeds', len(final_embeds))
-        save_embeddings(embed_file_dest, embeddings=final_embeds,
-                        file_paths=final_file_paths)
+        num_embeddings = merge_embed_files(npz_files_to_concat, embed_file_dest)
+        print(f'Final length of concatenated embeds', num_embeddings)
 
 
 def encode_on_partial_sets(
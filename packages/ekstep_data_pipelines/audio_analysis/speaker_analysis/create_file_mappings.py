@@ -1,12 +1,10 @@
-class Map:
-    def __init__(self, embeddings, file_paths):
-        self.list_em = [list(i) for i in embeddings]
-        self.file_paths = file_paths
+import numpy as np
+
 
-    def find_index(self, cluster):
-        cluster_indices = [self.list_em.index(list(embed)) for embed in cluster]
-        return cluster_indices
+class Map:
+    def __init__(self, file_paths):
+        self.file_paths = np.asarray(file_paths)
 
     def find_file(self, row):
-        files = [self.file_paths[ind] for ind in row]
-        return files
+        """Returns the files at the given row indices of the embeddings."""
+        return self.file_paths[np.asarray(row, dtype=int)].tolist()
@@ -1,277 +1,201 @@
-from copy import deepcopy
 from sklearn.metrics.pairwise import cosine_distances
+from sklearn.preprocessing import normalize
 import numpy as np
 
-backup = dict({})
+from ekstep_data_pipelines.audio_analysis.speaker_analysis.cluster_store import (
+    ClusterStore,
+)
+
+
+def union_find_roots(num_nodes, rows, cols):
+    """
+    Union-find over the edges (rows[i], cols[i]) of a graph with num_nodes
+    nodes, done on whole arrays: every pass hooks the root of each edge end
+    onto the smaller root and then compresses the paths.
+    Returns the root of every node, which is the smallest node of its
+    connected component.
+    """
+    parent = np.arange(num_nodes)
+    while True:
+        row_roots = parent[rows]
+        col_roots = parent[cols]
+        to_hook = row_roots != col_roots
+        if not to_hook.any():
+            return parent
+
+        np.minimum.at(
+            parent,
+            np.maximum(row_roots, col_roots)[to_hook],
+            np.minimum(row_roots, col_roots)[to_hook],
+        )
+        grandparent = parent[parent]
+        while not np.array_equal(grandparent, parent):
+            parent = grandparent
+            grandparent = parent[parent]
 
 
 class Merge:
-    def __init__(self):
-        global backup
-        backup = dict({})
+    """
+    Merges the clusters of a ClusterStore and fits noise points into them.
+    """
 
-    def cosine_dis_wrt_index(self, ind_1, ind_2, mean_embeddings):
-        """
-        Takes indices of clusters and mean_embeddings list (of all clusters)
-        :return: cosine distance between clusters present at indices (ind_1 and ind_2)
-        """
-        em_1 = mean_embeddings[ind_1].reshape(1, -1)
-        em_2 = mean_embeddings[ind_2].reshape(1, -1)
-        return cosine_distances(em_1, em_2)[0][0]
+    # upper bound on the entries of one block of the noise x clusters
+    # distance matrix computed in fit_noise_points
+    DISTANCE_BLOCK_ELEMENTS = 2**23
+
+    def __init__(self, cluster_store):
+        self.cluster_store = cluster_store
 
     def pairs_to_merge(
-        self,
-        all_cluster_embeds,  # W0613: Unused argument 'all_cluster_embeds' (unused-argument)
-        mean_embeddings,
-        similarity_allowed,
-        merge_closest_only=False,
+        self, mean_embeddings, similarity_allowed, merge_closest_only=False
     ):
+        """
+        Groups the clusters whose mean embeddings are closer than
+        similarity_allowed, directly or through other clusters, and returns
+        a dict with the first cluster of each group as key and the clusters
+        to merge into it as value. With merge_closest_only only the clusters
+        directly close to the key are merged, the rest of the group waits
+        for the next round.
+        """
         distances = cosine_distances(mean_embeddings)
-        mask = np.eye(distances.shape[0], distances.shape[1])
-        distances = distances + mask
-
-        possible_mergers = dict({})
+        np.fill_diagonal(distances, np.inf)
+        is_close = distances <= 1 - similarity_allowed
 
-        for index, row in enumerate(distances):
-            closest_clusters_dist = [
-                dist for ind, dist in enumerate(row) if dist <= 1 - similarity_allowed
-            ]
-            closest_clusters_index = [
-                ind for ind, dist in enumerate(row) if dist <= 1 - similarity_allowed
-            ]
+        rows, cols = np.nonzero(is_close)
+        if not len(rows):
+            return dict({})
 
-            if closest_clusters_dist:
-                possible_mergers[index] = [i for i in closest_clusters_index]
+        roots = union_find_roots(len(is_close), rows, cols)
 
         final_mergers = dict({})
-        list_of_indices_covered = []
-        for key in list(possible_mergers.keys()):
-            if key not in list_of_indices_covered:
-                values = possible_mergers[key]
-                for value in values:
-                    new_vals = [
-                        i
-                        for i in possible_mergers[value]
-                        if i not in values
-                        if i != key
-                    ]
-                    values.extend(new_vals)
-                list_of_indices_covered.extend(values + [key])
-
-                if merge_closest_only:
-                    cos_dis_wrt_main_cluster = [
-                        self.cosine_dis_wrt_index(key, i, mean_embeddings)
-                        for i in values
-                    ]
-                    distance_allowed = 1 - similarity_allowed
-                    pos = [
-                        i
-                        for i, dis in enumerate(cos_dis_wrt_main_cluster)
-                        if dis <= distance_allowed
-                    ]
-                    values = [val for ind, val in enumerate(values) if ind in pos]
-
-                final_mergers[key] = values
+        for key in np.unique(roots[rows]):
+            if merge_closest_only:
+                values = np.flatnonzero(is_close[key])
+            else:
+                values = np.flatnonzero(roots == key)
+                values = values[values != key]
+            final_mergers[int(key)] = values
 
         return final_mergers
 
-    def mean_embedding_of_cluster(self, cluster_embeds):
-        cluster_embeds = np.array(cluster_embeds)
-        raw_embed = np.mean(cluster_embeds, axis=0)
-        mean_embedding = raw_embed / np.linalg.norm(raw_embed, 2)
-        return mean_embedding
-
-    def get_clusters_after_merging(
-        self, final_pairs_to_merge, all_cluster_embeds_to_merge
-    ):
-        final_mean_embeds = []
-        all_cluster_embeds_to_merge_copy = deepcopy(all_cluster_embeds_to_merge)
-
-        print(
-            "Total clusters before merging: {}".format(len(all_cluster_embeds_to_merge))
-        )
-        for item in final_pairs_to_merge.items():
-            main_cluster_index = item[0]
-            clusters_to_add_indices = item[1]
-            for ind in clusters_to_add_indices:
-                all_cluster_embeds_to_merge_copy[main_cluster_index].extend(
-                    all_cluster_embeds_to_merge[ind]
-                )
-
-        clusters_lost_indices = [
-            item for sublist in list(final_pairs_to_merge.values()) for item in sublist
-        ]
-        final_all_clusters_embeds = [
-            val
-            for i, val in enumerate(all_cluster_embeds_to_merge_copy)
-            if i not in clusters_lost_indices
-        ]
-
-        for cluster in final_all_clusters_embeds:
-            final_mean_embeds.append(self.mean_embedding_of_cluster(cluster))
-
-        return final_all_clusters_embeds, final_mean_embeds
-
     def run_repetitive_merging(
         self,
-        all_cluster_embeds,
-        mean_embeddings,
         start_similarity_allowed,
         end_similarity_allowed,
         merge_closest_only,
     ):
-        global backup
-        backup["all_cluster_embeds"] = all_cluster_embeds
-        backup["mean_embeddings"] = mean_embeddings
-
-        possible_mergers = self.pairs_to_merge(
-            all_cluster_embeds,
-            mean_embeddings,
-            start_similarity_allowed,
-            merge_closest_only,
-        )
-
-        if possible_mergers:
-            all_embeds_merged, mean_embeds_merged = self.get_clusters_after_merging(
-                possible_mergers, all_cluster_embeds
-            )
-            backup["all_cluster_embeds"] = all_embeds_merged
-            backup["mean_embeddings"] = mean_embeds_merged
-
-            self.run_repetitive_merging(
-                all_embeds_merged,
-                mean_embeds_merged,
-                start_similarity_allowed,
-                end_similarity_allowed,
-                merge_closest_only,
-            )
+        """
+        Merges clusters at start_similarity_allowed until nothing is left to
+        merge, then lowers the similarity by 0.01 at a time down to
+        end_similarity_allowed and stops at the first similarity where
+        nothing can be merged.
+        """
+        if not self.cluster_store.num_clusters:
+            return self.cluster_store
 
-        elif start_similarity_allowed > end_similarity_allowed:
-            start_similarity_allowed -= 0.01
+        similarity_allowed = start_similarity_allowed
+        while True:
             possible_mergers = self.pairs_to_merge(
-                all_cluster_embeds,
-                mean_embeddings,
-                start_similarity_allowed,
+                self.cluster_store.mean_embeddings,
+                similarity_allowed,
                 merge_closest_only,
             )
-            if possible_mergers:
-                all_embeds_merged, mean_embeds_merged = self.get_clusters_after_merging(
-                    possible_mergers, all_cluster_embeds
-                )
-
-                backup["all_cluster_embeds"] = all_embeds_merged
-                backup["mean_embeddings"] = mean_embeds_merged
-
-                self.run_repetitive_merging(
-                    all_embeds_merged,
-                    mean_embeds_merged,
-                    start_similarity_allowed,
-                    end_similarity_allowed,
+            if not possible_mergers:
+                if similarity_allowed <= end_similarity_allowed:
+                    break
+                similarity_allowed -= 0.01
+                possible_mergers = self.pairs_to_merge(
+                    self.cluster_store.mean_embeddings,
+                    similarity_allowed,
                     merge_closest_only,
                 )
+                if not possible_mergers:
+                    break
 
-        return backup["all_cluster_embeds"], backup["mean_embeddings"]
-
-    def get_final_clusters_and_noise(
-        self,
-        big_clusters_indices,
-        all_cluster_embeds,
-        mean_embeds,
-        noise_embeds,
-        big_cluster_embeds,
-        big_mean_embeds,
-        noise_embeds_big,
-    ):
-        # sanity check and final data prep
-
-        all_cluster_embeds_minus_big = [
-            em_list
-            for i, em_list in enumerate(all_cluster_embeds)
-            if i not in big_clusters_indices
-        ]
-        mean_embeddings_minus_big = [
-            mean_em
-            for i, mean_em in enumerate(mean_embeds)
-            if i not in big_clusters_indices
-        ]
-
-        all_cluster_embeds_to_merge = []
-        all_cluster_embeds_to_merge.extend(all_cluster_embeds_minus_big)
-        all_cluster_embeds_to_merge.extend(big_cluster_embeds)
-
-        mean_embeddings_to_merge = []
-        mean_embeddings_to_merge.extend(mean_embeddings_minus_big)
-        mean_embeddings_to_merge.extend(big_mean_embeds)
+            print(
+                "Total clusters before merging: {}".format(
+                    self.cluster_store.num_clusters
+                )
+            )
+            self.cluster_store.merge_clusters(possible_mergers)
 
-        # noise
-        noise_embeds_final = []
-        noise_embeds_final.extend(noise_embeds)
-        noise_embeds_final.extend(noise_embeds_big)
+        return self.cluster_store
 
-        return all_cluster_embeds_to_merge, mean_embeddings_to_merge, noise_embeds_final
+    def replace_big_clusters(self, big_clusters_labels, big_cluster_store):
+        """
+        Replaces the big clusters with the clusters found by splitting them,
+        which are appended after the remaining clusters.
+        """
+        self.cluster_store.remove_clusters(big_clusters_labels)
+        self.cluster_store.add_clusters(
+            big_cluster_store.cluster_indices(), big_cluster_store.mean_embeddings
+        )
+        return self.cluster_store
 
-    def fit_noise_points(
-        self, mean_embeds, noise_embeds, all_cluster_embeds, max_sim_allowed=0.80
-    ):
+    def fit_noise_points(self, noise_indices, max_sim_allowed=0.80):
         """
         1. Calculate cos dis for each noise point wrt all mean embeds
         2. select cluster whose cosine dis with noise is the least (or less than a set threshold)
-        3. append the newly classified noise point embed into the corresponding cluster embeds
+        3. append the newly classified noise point to the corresponding
+           cluster, flagged as was_noise in the cluster store
 
         Returns:
-         - new clusters with noise points allocated
-         - number of noise points that were allocated to clusters
+         - row indices of the noise points that could not be allocated
         """
-        mean_embeds_new = []
         max_distance_allowed = 1 - max_sim_allowed
-        all_cluster_embeds_copy = deepcopy(all_cluster_embeds)
-
-        was_noise_flag = [[0] * len(cluster) for cluster in all_cluster_embeds_copy]
-
-        allocated_noise_point_index = []
         print(
             "Trying to fit {} noise points with cos_similarity={}".format(
-                len(noise_embeds), max_sim_allowed
+                len(noise_indices), max_sim_allowed
             )
         )
-        # distances is a matrix of shape (num_noise_points, num_mean_embeds)
-        # with cosine dist of each noise embed with all mean embeds present in
-        # rows
-        distances = cosine_distances(noise_embeds, mean_embeds)
-        closest_cluster_index = np.argmin(distances, axis=1)
-        closest_cluster_dist = np.min(distances, axis=1)
+        if not len(noise_indices):
+            print("No noise points could be fit!")
+            return noise_indices
 
-        # C1801: Do not use `len(SEQUENCE)` without comparison to
-        # determine if a sequence is empty (len-as-condition)
-        if len(closest_cluster_dist):
-            for index, dist in enumerate(closest_cluster_dist):
-                if dist <= max_distance_allowed:
-                    all_cluster_embeds_copy[closest_cluster_index[index]].append(
-                        noise_embeds[index]
-                    )
-                    was_noise_flag[closest_cluster_index[index]].append(1)
-                    allocated_noise_point_index.append(index)
+        closest_cluster_index, closest_cluster_dist = self.closest_clusters(
+            noise_indices
+        )
 
-            # embeddings for noise points that couldn't be allocated
-            if allocated_noise_point_index:
-                for cluster in all_cluster_embeds_copy:
-                    new_em = self.mean_embedding_of_cluster(cluster)
-                    mean_embeds_new.append(new_em)
-                unallocated_noise_embeds = [
-                    em
-                    for ind, em in enumerate(noise_embeds)
-                    if ind not in allocated_noise_point_index
-                ]
-            else:
-                unallocated_noise_embeds = noise_embeds
+        is_allocated = closest_cluster_dist <= max_distance_allowed
+        self.cluster_store.add_to_clusters(
+            noise_indices[is_allocated], closest_cluster_index[is_allocated]
+        )
 
-        else:
-            print("No noise points could be fit!")
-            mean_embeds_new = mean_embeds
-            unallocated_noise_embeds = noise_embeds
-        return (
-            all_cluster_embeds_copy,
-            mean_embeds_new,
-            unallocated_noise_embeds,
-            was_noise_flag,
+        # indices of noise points that couldn't be allocated
+        return noise_indices[~is_allocated]
+
+    def closest_clusters(self, rows):
+        """
+        Returns the closest cluster of each of the given rows and its cosine
+        distance. The distances are computed for blocks of rows at a time,
+        so the full rows x clusters matrix is never held in memory. Without
+        clusters every row gets NO_CLUSTER at an infinite distance.
+        """
+        if not self.cluster_store.num_clusters:
+            return (
+                np.full(len(rows), ClusterStore.NO_CLUSTER),
+                np.full(len(rows), np.inf),
+            )
+
+        closest_cluster_index = []
+        closest_cluster_dist = []
+
+        # same computation as cosine_distances, with the means normalized once
+        mean_embeddings = normalize(self.cluster_store.mean_embeddings)
+        block_size = max(1, Merge.DISTANCE_BLOCK_ELEMENTS // len(mean_embeddings))
+        for start in range(0, len(rows), block_size):
+            block = normalize(
+                self.cluster_store.embeddings[rows[start : start + block_size]]
+            )
+            distances = 1 - block @ mean_embeddings.T
+            np.clip(distances, 0, 2, out=distances)
+
+            block_closest = np.argmin(distances, axis=1)
+            closest_cluster_index.append(block_closest)
+            closest_cluster_dist.append(
+                distances[np.arange(len(block_closest)), block_closest]
+            )
+
+        return np.concatenate(closest_cluster_index), np.concatenate(
+            closest_cluster_dist
         )
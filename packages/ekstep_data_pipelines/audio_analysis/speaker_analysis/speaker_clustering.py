@@ -1,4 +1,7 @@
 import numpy as np
+from ekstep_data_pipelines.audio_analysis.speaker_analysis.cluster_store import (
+    ClusterStore,
+)
 from ekstep_data_pipelines.audio_analysis.speaker_analysis.clustering import Clustering
 from ekstep_data_pipelines.audio_analysis.speaker_analysis.create_file_mappings import (
     Map,
@@ -7,6 +10,7 @@ from ekstep_data_pipelines.audio_analysis.speaker_analysis.merging import Merge
 from ekstep_data_pipelines.audio_analysis.speaker_analysis.splitting import (
     get_big_cluster_embeds,
 )
+from ekstep_data_pipelines.common.audio_commons.embedding_files import load_embeddings
 
 
 def create_speaker_clusters(
@@ -16,20 +20,32 @@ def create_speaker_clusters(
     partial_set_size=11112,
     min_samples=1,
     fit_noise_on_similarity=0.80,
+    cluster_metric=Clustering.COSINE_METRIC,
+    workers=1,
+    speaker_state=None,
+    max_pending_noise=10000,
 ):
+    """
+    Clusters all the embeddings of a source into speakers. When a
+    speaker_state is given, the speakers found and the noise left are saved
+    in it for later runs of update_speaker_clusters. When no clusters are
+    found, there are no speakers and every utterance is noise. At most
+    max_pending_noise of the noise utterances are saved.
+    """
     # step:1 -> ENCODING AND SAVING : done by create_embeddings.py
 
     # step:2 -> CLUSTERING AND MAPPING FILES TO CLUSTERS
 
-    embed_speaker_map = np.load(embed_filename_map_path)
-    embeddings = embed_speaker_map["embeds"]
-    file_paths = embed_speaker_map["file_paths"]
+    # the embeddings are memory mapped, rows are read as they are needed
+    embeddings, file_paths = load_embeddings(embed_filename_map_path)
 
-    clustering_obj = Clustering()
+    # clusters and noise are carried as row indices into embeddings and
+    # file_paths from here on
+    clustering_obj = Clustering(cluster_metric, workers)
     (
         mean_embeds,
-        noise_embeds,
-        all_cluster_embeds,
+        noise_indices,
+        all_cluster_indices,
     ) = clustering_obj.run_partial_set_clusterings(
         embeddings, min_cluster_size, partial_set_size, min_samples
     )
@@ -37,55 +53,45 @@ def create_speaker_clusters(
 
     print("Num clusters = {}".format(num_clusters))
     if num_clusters >= 1:
+        cluster_store = ClusterStore(embeddings)
+        cluster_store.add_clusters(all_cluster_indices, mean_embeds)
+
         # step:2.2 -> APPLYING MERGING OVER SIMILAR CLUSTERS FROM PARTIAL SETS
         # CLUSTERS
 
-        merger = Merge()
-        (
-            all_cluster_embeds_merged_initial,
-            mean_embeds_merged_initial,
-        ) = merger.run_repetitive_merging(
-            all_cluster_embeds,
-            mean_embeds,
+        merger = Merge(cluster_store)
+        merger.run_repetitive_merging(
             start_similarity_allowed=0.96,
             end_similarity_allowed=0.94,
             merge_closest_only=True,
         )
 
-        num_clusters = len(mean_embeds_merged_initial)
+        num_clusters = cluster_store.num_clusters
         print("Num clusters after initial merging= {}".format(num_clusters))
 
         # step:2.3 -> SPLITTING "BIG" CLUSTERS AND MERGING AGAIN
-        flat_embeddings_big_clusters, big_clusters_indices = get_big_cluster_embeds(
-            all_cluster_embeds_merged_initial
+        flat_indices_big_clusters, big_clusters_labels = get_big_cluster_embeds(
+            cluster_store
         )
 
-        if big_clusters_indices:
+        if big_clusters_labels:
             (
                 mean_embeds_big,
-                noise_embeds_big,
-                all_cluster_embeds_big,
+                noise_indices_big,
+                all_cluster_indices_big,
             ) = clustering_obj.run_partial_set_clusterings(
-                embeddings=flat_embeddings_big_clusters,
+                embeddings=embeddings,
                 min_cluster_size=min_cluster_size,
                 partial_set_size=partial_set_size,
                 min_samples=min_samples,
                 cluster_selection_method="leaf",
+                indices=flat_indices_big_clusters,
             )
 
-            if len(mean_embeds_big) == 1:
-                if len(all_cluster_embeds_big) != 1:
-                    all_cluster_embeds_big = [all_cluster_embeds_big]
-            big_cluster_embeds_merged = []
-            big_mean_embeds_merged = []
+            big_cluster_store = ClusterStore(embeddings)
             if len(mean_embeds_big) != 0:
-                merger_big_cl = Merge()
-                (
-                    big_cluster_embeds_merged,
-                    big_mean_embeds_merged,
-                ) = merger_big_cl.run_repetitive_merging(
-                    all_cluster_embeds_big,
-                    mean_embeds_big,
+                big_cluster_store.add_clusters(all_cluster_indices_big, mean_embeds_big)
+                Merge(big_cluster_store).run_repetitive_merging(
                     start_similarity_allowed=0.96,
                     end_similarity_allowed=0.94,
                     merge_closest_only=True,
@@ -93,84 +99,45 @@ def create_speaker_clusters(
 
                 print(
                     "Num clusters after merging big clusters = {}".format(
-                        len(big_mean_embeds_merged)
+                        big_cluster_store.num_clusters
                     )
                 )
 
-            # preparing new list of clusters (after adding split+merged
-            # clusters together) and updated final noise
-            (
-                all_cluster_embeds_to_merge,
-                mean_embeddings_to_merge,
-                noise_embeds_final,
-            ) = merger.get_final_clusters_and_noise(
-                big_clusters_indices,
-                all_cluster_embeds_merged_initial,
-                mean_embeds_merged_initial,
-                noise_embeds,
-                big_cluster_embeds_merged,
-                big_mean_embeds_merged,
-                noise_embeds_big,
-            )
+            # replacing the big clusters with the split+merged clusters and
+            # updating the final noise
+            merger.replace_big_clusters(big_clusters_labels, big_cluster_store)
+            noise_indices = np.concatenate([noise_indices, noise_indices_big])
             print(
                 "Num clusters before final merging  = {}".format(
-                    len(mean_embeddings_to_merge)
+                    cluster_store.num_clusters
                 )
             )
-            print("Num final noise points = {}".format(len(noise_embeds_final)))
+            print("Num final noise points = {}".format(len(noise_indices)))
 
             # step:2.4 -> repetitive merging on the final clusters from step
             # 2.3
-            merger_final = Merge()
-            (
-                all_cluster_embeds_merged,
-                mean_embeds_merged,
-            ) = merger_final.run_repetitive_merging(
-                all_cluster_embeds_to_merge,
-                mean_embeddings_to_merge,
+            merger.run_repetitive_merging(
                 start_similarity_allowed=0.96,
                 end_similarity_allowed=0.94,
                 merge_closest_only=True,
             )
             print(
-                "Num clusters after final merging = {}".format(len(mean_embeds_merged))
+                "Num clusters after final merging = {}".format(
+                    cluster_store.num_clusters
+                )
             )
 
-            mean_embeds_merged_initial = mean_embeds_merged
-            noise_embeds = noise_embeds_final
-            all_cluster_embeds_merged_initial = all_cluster_embeds_merged
-
         # step:3 -> FIT NOISE
-        (
-            all_cluster_embeds_after_noise_fit,
-            mean_embeds_new,  # W0612: Unused variable 'mean_embeds_new' (unused-variable)
-            unallocated_noise_embeds,
-            was_noise_flag,
-        ) = merger.fit_noise_points(
-            mean_embeds_merged_initial,
-            noise_embeds,
-            all_cluster_embeds_merged_initial,
-            max_sim_allowed=fit_noise_on_similarity,
+        unallocated_noise_indices = merger.fit_noise_points(
+            noise_indices, max_sim_allowed=fit_noise_on_similarity
         )
 
         # step:4 -> SAVE FILE_NAMES TO CLUSTER MAPPINGS
         print("Creating mappings for files")
-        map_obj = Map(embeddings, file_paths)
-        indices = [
-            map_obj.find_index(cluster)
-            for cluster in all_cluster_embeds_after_noise_fit
-        ]
-        files_in_clusters = [map_obj.find_file(row) for row in indices]
-        # files_in_clusters_with_noise_flag = [(file, was_noise_flag[ind])
-        # for ind, file in enumerate(
-        # files_in_clusters)]
-        files_in_clusters_with_noise_flag = []
-        for ind, list_of_files in enumerate(files_in_clusters):
-            cluster = []
-            for i, file in enumerate(list_of_files):
-                flag = was_noise_flag[ind][i]
-                cluster.append((file, flag))
-            files_in_clusters_with_noise_flag.append(cluster)
+        map_obj = Map(file_paths)
+        files_in_clusters_with_noise_flag = map_files_to_clusters(
+            cluster_store, map_obj
+        )
 
         file_map_dict = {
             source_name + "_sp_" + str(ind): j
@@ -180,24 +147,188 @@ def create_speaker_clusters(
         noise_file_map_dict = dict({})
         # C1801: Do not use `len(SEQUENCE)` without comparison to
         # determine if a sequence is empty (len-as-condition)
-        if len(unallocated_noise_embeds):
+        if len(unallocated_noise_indices):
             print(
                 "Creating mapping for {} unallocated noise points".format(
-                    len(unallocated_noise_embeds)
+                    len(unallocated_noise_indices)
                 )
             )
-            noise_indices = [
-                map_obj.find_index(cluster) for cluster in [unallocated_noise_embeds]
-            ]
-            noise_files = [map_obj.find_file(row) for row in noise_indices]
+            noise_files = [map_obj.find_file(unallocated_noise_indices)]
             noise_file_map_dict = {
                 source_name + "_noise": j for ind, j in enumerate(noise_files)
             }
 
+        if speaker_state is not None:
+            speaker_state.set_speakers(
+                list(file_map_dict),
+                cluster_store.sums,
+                cluster_store.counts,
+                *pending_noise(
+                    embeddings, file_paths, unallocated_noise_indices, max_pending_noise
+                ),
+            )
+
         return file_map_dict, noise_file_map_dict
-    # R1705: Unnecessary "else" after "return" (no-else-return)
-    # else:
-    #     print("No clusters could be found!")
+
+    print("No clusters could be found!")
+    # every utterance is left in noise, so that the next run clusters them
+    # with its own through update_speaker_clusters
+    all_indices = np.arange(len(embeddings))
+    noise_file_map_dict = dict({})
+    if len(all_indices):
+        noise_file_map_dict = {
+            source_name + "_noise": Map(file_paths).find_file(all_indices)
+        }
+
+    if speaker_state is not None:
+        empty_store = ClusterStore(embeddings)
+        speaker_state.set_speakers(
+            [],
+            empty_store.sums,
+            empty_store.counts,
+            *pending_noise(embeddings, file_paths, all_indices, max_pending_noise),
+        )
+
+    return {}, noise_file_map_dict
+
+
+def map_files_to_clusters(cluster_store, map_obj):
+    """
+    Returns the (file, was_noise flag) pairs of every cluster in the store.
+    """
+    files_in_clusters_with_noise_flag = []
+    for cluster in cluster_store.cluster_indices():
+        files = map_obj.find_file(cluster)
+        was_noise_flag = cluster_store.was_noise[cluster].astype(int).tolist()
+        files_in_clusters_with_noise_flag.append(list(zip(files, was_noise_flag)))
+    return files_in_clusters_with_noise_flag
+
+
+def pending_noise(embeddings, file_paths, noise_indices, max_pending_noise):
+    """
+    Returns the embeddings and file paths of the noise utterances kept for
+    later runs. Rows are ordered oldest first, so only the latest
+    max_pending_noise of them are kept and older noise is dropped for good.
+    """
+    noise_indices = np.sort(noise_indices)
+    if max_pending_noise is not None:
+        noise_indices = noise_indices[max(len(noise_indices) - max_pending_noise, 0):]
+    return embeddings[noise_indices], file_paths[noise_indices]
+
+
+def update_speaker_clusters(
+    embed_filename_map_path,
+    source_name,
+    speaker_state,
+    min_cluster_size=4,
+    partial_set_size=11112,
+    min_samples=1,
+    fit_noise_on_similarity=0.80,
+    cluster_metric=Clustering.COSINE_METRIC,
+    workers=1,
+    max_pending_noise=10000,
+):
+    """
+    Gives speakers to newly embedded utterances without reclustering the
+    source. Each utterance goes to the speaker in speaker_state with the
+    closest centroid if their similarity is at least fit_noise_on_similarity.
+    The rest, together with the noise left by earlier runs, is clustered
+    into new speakers. Only the latest max_pending_noise utterances left in
+    noise are kept in speaker_state for the next runs, so the work of a run
+    is bounded by the size of its batch plus max_pending_noise.
+    speaker_state is updated in place. A state without
+    speakers, e.g. after a run that left every utterance in noise, has all
+    the utterances clustered.
+    Returns the same mappings as create_speaker_clusters, but holding only
+    the new utterances.
+    """
+    embeddings, file_paths = load_embeddings(embed_filename_map_path)
+    if speaker_state.noise_file_paths:
+        # the noise of earlier runs comes first, so that rows stay ordered
+        # oldest first
+        embeddings = np.concatenate([speaker_state.noise_embeddings, embeddings])
+        file_paths = np.concatenate(
+            [np.array(speaker_state.noise_file_paths), file_paths]
+        )
+
+    # step:1 -> ASSIGNING UTTERANCES TO KNOWN SPEAKERS
+    speaker_store = ClusterStore(embeddings)
+    speaker_store.add_previous_clusters(speaker_state.sums, speaker_state.counts)
+    all_indices = np.arange(len(embeddings))
+    closest_speaker, closest_speaker_dist = Merge(speaker_store).closest_clusters(
+        all_indices
+    )
+    is_assigned = closest_speaker_dist <= 1 - fit_noise_on_similarity
+    speaker_store.add_to_clusters(
+        all_indices[is_assigned], closest_speaker[is_assigned], was_noise=False
+    )
+    leftover_indices = all_indices[~is_assigned]
+    print(
+        "Assigned {} of {} utterances to known speakers".format(
+            np.count_nonzero(is_assigned), len(embeddings)
+        )
+    )
+
+    # step:2 -> CLUSTERING THE LEFTOVERS INTO NEW SPEAKERS
+    new_speaker_store = ClusterStore(embeddings)
+    unallocated_noise_indices = leftover_indices
+    if len(leftover_indices) >= min_cluster_size:
+        (
+            mean_embeds,
+            noise_indices,
+            all_cluster_indices,
+        ) = Clustering(cluster_metric, workers).run_partial_set_clusterings(
+            embeddings,
+            min_cluster_size,
+            partial_set_size,
+            min_samples,
+            indices=leftover_indices,
+        )
+        if len(mean_embeds):
+            new_speaker_store.add_clusters(all_cluster_indices, mean_embeds)
+            merger = Merge(new_speaker_store)
+            merger.run_repetitive_merging(
+                start_similarity_allowed=0.96,
+                end_similarity_allowed=0.94,
+                merge_closest_only=True,
+            )
+            unallocated_noise_indices = merger.fit_noise_points(
+                noise_indices, max_sim_allowed=fit_noise_on_similarity
+            )
+    print("Num new speakers = {}".format(new_speaker_store.num_clusters))
+
+    # step:3 -> SAVE FILE_NAMES OF CHANGED SPEAKERS
+    map_obj = Map(file_paths)
+    new_speaker_names = [
+        source_name + "_sp_" + str(speaker_state.num_speakers + ind)
+        for ind in range(new_speaker_store.num_clusters)
+    ]
+    speaker_names = speaker_state.speaker_names + new_speaker_names
+    files_in_clusters_with_noise_flag = map_files_to_clusters(
+        speaker_store, map_obj
+    ) + map_files_to_clusters(new_speaker_store, map_obj)
+    file_map_dict = {
+        speaker_name: files
+        for speaker_name, files in zip(speaker_names, files_in_clusters_with_noise_flag)
+        if files
+    }
+
+    noise_file_map_dict = dict({})
+    if len(unallocated_noise_indices):
+        noise_file_map_dict = {
+            source_name + "_noise": map_obj.find_file(unallocated_noise_indices)
+        }
+
+    speaker_state.set_speakers(
+        speaker_names,
+        np.concatenate([speaker_store.sums, new_speaker_store.sums]),
+        np.concatenate([speaker_store.counts, new_speaker_store.counts]),
+        *pending_noise(
+            embeddings, file_paths, unallocated_noise_indices, max_pending_noise
+        ),
+    )
+
+    return file_map_dict, noise_file_map_dict
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+
+# not .npz, so the state is never listed among the embedding files it sits
+# next to
+STATE_FILE_EXTENSION = ".speaker_state"
+
+
+class SpeakerState:
+    """
+    Speakers found in a source so far, kept between runs of the incremental
+    speaker analysis:
+      - speaker_names, sums and counts: name, sum of the utterance
+        embeddings and number of utterances of every speaker
+      - embedding_files: names of the embedding files already analysed
+      - noise_embeddings and noise_file_paths: utterances that could not be
+        given a speaker yet
+    """
+
+    def __init__(
+        self,
+        speaker_names=None,
+        sums=None,
+        counts=None,
+        embedding_files=None,
+        noise_embeddings=None,
+        noise_file_paths=None,
+    ):
+        self.speaker_names = [] if speaker_names is None else list(speaker_names)
+        self.sums = sums
+        self.counts = np.zeros(0, dtype=np.int64) if counts is None else counts
+        self.embedding_files = [] if embedding_files is None else list(embedding_files)
+        self.noise_embeddings = noise_embeddings
+        self.noise_file_paths = (
+            [] if noise_file_paths is None else list(noise_file_paths)
+        )
+
+    @property
+    def num_speakers(self):
+        return len(self.speaker_names)
+
+    @staticmethod
+    def load(state_file_path):
+        """Returns the saved state, or an empty one if there is no file."""
+        if not os.path.exists(state_file_path):
+            return SpeakerState()
+
+        with np.load(state_file_path) as state:
+            return SpeakerState(
+                speaker_names=state["speaker_names"].tolist(),
+                sums=state["sums"],
+                counts=state["counts"],
+                embedding_files=state["embedding_files"].tolist(),
+                noise_embeddings=state["noise_embeddings"],
+                noise_file_paths=state["noise_file_paths"].tolist(),
+            )
+
+    def save(self, state_file_path):
+        dim = self.embedding_dim()
+        # through a file object, as savez_compressed adds .npz to a path
+        with open(state_file_path, "wb") as state_file:
+            np.savez_compressed(
+                state_file,
+                speaker_names=np.array(self.speaker_names, dtype=str),
+                sums=self.sums if self.sums is not None else np.zeros((0, dim)),
+                counts=self.counts,
+                embedding_files=np.array(self.embedding_files, dtype=str),
+                noise_embeddings=(
+                    self.noise_embeddings
+                    if self.noise_embeddings is not None
+                    else np.zeros((0, dim), dtype=np.float32)
+                ),
+                noise_file_paths=np.array(self.noise_file_paths, dtype=str),
+            )
+
+    def embedding_dim(self):
+        for embeddings in (self.sums, self.noise_embeddings):
+            if embeddings is not None:
+                return embeddings.shape[1]
+        return 0
+
+    def set_speakers(
+        self, speaker_names, sums, counts, noise_embeddings, noise_file_paths
+    ):
+        self.speaker_names = list(speaker_names)
+        self.sums = sums
+        self.counts = counts
+        self.noise_embeddings = noise_embeddings
+        self.noise_file_paths = list(noise_file_paths)
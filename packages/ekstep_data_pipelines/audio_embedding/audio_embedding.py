@@ -2,6 +2,8 @@
 import sys
 import multiprocessing
 import os
+import queue
+import threading
 
 from concurrent.futures import ThreadPoolExecutor
 
@@ -9,13 +11,113 @@ from concurrent.futures import ThreadPoolExecutor
 from ekstep_data_pipelines.common.utils import get_logger
 from ekstep_data_pipelines.common import BaseProcessor
 from ekstep_data_pipelines.audio_embedding.create_embeddings import (
-    encode_each_batch
+    encode_each_batch, encode_file_stream
 )
 
 
 LOGGER = get_logger("AudioEmbeddingProcessor")
 
-ESTIMATED_CPU_SHARE = 0.1
+CONFIG_NAME = "audio_embedding_config"
+
+DEFAULT_DOWNLOAD_WORKERS = 8
+
+# downloaded files on local disk at a time, waiting to be embedded
+DEFAULT_MAX_LOCAL_FILES = 256
+
+
+class DownloadStream:
+    """
+    Iterates over the local paths of files downloaded by a pool of
+    max_workers threads, in the order the downloads finish. At most
+    max_local_files files are on local disk at a time: a slot is taken
+    before each download and given back when the file is deleted with
+    delete, so a consumer reading ahead cannot make it download everything.
+    close stops the downloads and deletes the files left, including the
+    ones handed out and not deleted yet. Every file is downloaded into a
+    directory named after its index in remote_paths, so files with the same
+    name keep their name without overwriting each other.
+    """
+
+    def __init__(self, fs_interface, remote_paths, local_dir,
+                 max_workers=DEFAULT_DOWNLOAD_WORKERS,
+                 max_local_files=DEFAULT_MAX_LOCAL_FILES):
+        self.fs_interface = fs_interface
+        self.remote_paths = remote_paths
+        self.local_dir = local_dir
+        self.max_workers = max_workers
+        self.local_files = set()
+        self._slots = threading.Semaphore(max_local_files)
+        self._downloaded_files = queue.Queue()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._producer = None
+
+    def __iter__(self):
+        self._producer = threading.Thread(target=self._download_all, daemon=True)
+        self._producer.start()
+
+        while True:
+            local_file_path = self._downloaded_files.get()
+            if local_file_path is None:
+                return
+            yield local_file_path
+
+    def _download_all(self):
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as worker_pool:
+                for index, remote_path in enumerate(self.remote_paths):
+                    self._slots.acquire()
+                    if self._stopped.is_set():
+                        self._slots.release()
+                        break
+                    worker_pool.submit(self._download, index, remote_path)
+        finally:
+            self._downloaded_files.put(None)
+
+    def _download(self, index, remote_path):
+        local_file_path = os.path.join(
+            self.local_dir, str(index), os.path.basename(remote_path))
+        with self._lock:
+            self.local_files.add(local_file_path)
+
+        if not self._stopped.is_set():
+            try:
+                os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
+                self.fs_interface.download_file_to_location(remote_path, local_file_path)
+                self._downloaded_files.put(local_file_path)
+                return
+            except Exception as error:
+                LOGGER.error(f"Could not download {remote_path}: {error}")
+
+        # removes what a failed download may have written
+        self.delete(local_file_path)
+
+    def delete(self, local_file_path):
+        with self._lock:
+            if local_file_path not in self.local_files:
+                return
+            self.local_files.remove(local_file_path)
+
+        if os.path.exists(local_file_path):
+            os.remove(local_file_path)
+        if os.path.isdir(os.path.dirname(local_file_path)):
+            os.rmdir(os.path.dirname(local_file_path))
+        self._slots.release()
+
+    def close(self):
+        self._stopped.set()
+        # wakes up the producer if it waits for a slot
+        self._slots.release()
+        if self._producer is not None:
+            self._producer.join()
+        # takes back the slot released to wake up the producer
+        self._slots.acquire()
+
+        with self._lock:
+            local_files = list(self.local_files)
+        for local_file_path in local_files:
+            self.delete(local_file_path)
+
 
 class AudioEmbedding(BaseProcessor):
     """
@@ -52,18 +154,36 @@ class AudioEmbedding(BaseProcessor):
 
         self.ensure_path(self.local_txt_path)
         self.ensure_path(self.local_audio_path)
-        self.download_files(input_file_path,self.local_txt_path,self.local_audio_path)
-
-
         self.ensure_path(self.embed_file_path)
 
-        self.create_embeddings("*.wav",npz_file_name,self.local_audio_path,self.embed_file_path)
-        
+        audio_embedding_config = self.data_processor.config_dict.get(CONFIG_NAME) or {}
+        max_local_files = max(
+            audio_embedding_config.get("max_local_files", DEFAULT_MAX_LOCAL_FILES), 2)
+
+        local_audio_files = self.download_files(
+            input_file_path, self.local_txt_path, self.local_audio_path,
+            audio_embedding_config.get("download_workers", DEFAULT_DOWNLOAD_WORKERS),
+            max_local_files)
+        try:
+            # a file waiting for a preprocessing worker holds a local file
+            # slot, so at least one slot is left for the next download
+            encode_file_stream(
+                local_audio_files, f'{self.embed_file_path}{npz_file_name}',
+                file_done=local_audio_files.delete,
+                max_pending_files=min(max_local_files - 1, 2 * multiprocessing.cpu_count()))
+        finally:
+            local_audio_files.close()
+
         self.upload_to_gcp(npz_file_name,input_file_path)
 
 
-    def download_files(self,input_file_path,local_txt_path,local_audio_path):
-        
+    def download_files(self, input_file_path, local_txt_path, local_audio_path,
+                       max_workers=DEFAULT_DOWNLOAD_WORKERS,
+                       max_local_files=DEFAULT_MAX_LOCAL_FILES):
+        """
+        Downloads the txt file at input_file_path and returns a
+        DownloadStream of the wav files it lists.
+        """
         LOGGER.info("Total available cpu count:" + str(multiprocessing.cpu_count()))
 
         LOGGER.info(
@@ -73,16 +193,12 @@ class AudioEmbedding(BaseProcessor):
             input_file_path, f'{local_txt_path}{os.path.basename(input_file_path)}'
         )
 
-        text_file = open(f'{local_txt_path}{os.path.basename(input_file_path)}', "r")
-        paths = text_file.readlines()
-        text_file.close()
-
-        worker_pool = ThreadPoolExecutor(max_workers=multiprocessing.cpu_count() / ESTIMATED_CPU_SHARE)
+        with open(f'{local_txt_path}{os.path.basename(input_file_path)}', "r") as text_file:
+            paths = [path.rstrip('\n') for path in text_file.readlines()]
+        paths = [path for path in paths if path.endswith('.wav')]
 
-        for file_path in paths:
-            file_name = os.path.basename(file_path.rstrip("\n"))
-            worker_pool.submit(self.fs_interface.download_file_to_location, file_path.rstrip('\n'), f'{local_audio_path}{file_name}')
-        worker_pool.shutdown(wait=True)
+        return DownloadStream(self.fs_interface, paths, local_audio_path,
+                              max_workers, max_local_files)
 
 
     def create_embeddings(self,dir_pattern,local_npz_file,local_audio_path,embed_file_path):
@@ -1,10 +1,21 @@
-from resemblyzer import preprocess_wav, VoiceEncoder
+from resemblyzer import audio, preprocess_wav, VoiceEncoder
+from resemblyzer.hparams import sampling_rate
 from tqdm import tqdm
+import collections
 import glob
 # from joblib import Parallel, delayed
 import numpy as np
 import math
+import multiprocessing
 import os
+import time
+import torch
+
+from ekstep_data_pipelines.common.audio_commons.embedding_files import merge_embed_files
+
+PARTIALS_BATCH_SIZE = 64
+PARTIALS_RATE = 1.3
+PARTIALS_MIN_COVERAGE = 0.75
 
 
 def audio_paths(directory, pattern):
@@ -18,35 +29,169 @@ def save_embeddings(embed_file_path, embeddings, file_paths):
     return
 
 
-def encoder(file_paths, vocoder):
-    print('Number of files in batch: {}'.format(len(file_paths)))
+def partial_mels(file_path):
+    """
+    Preprocesses one file the way VoiceEncoder.embed_utterance does and
+    returns the mel spectrograms of its partial utterances along with the
+    duration in seconds of the preprocessed audio.
+    """
+    wav = preprocess_wav(file_path)
+    audio_seconds = len(wav) / sampling_rate
+
+    wav_slices, mel_slices = VoiceEncoder.compute_partial_slices(
+        len(wav), PARTIALS_RATE, PARTIALS_MIN_COVERAGE)
+    max_wave_length = wav_slices[-1].stop
+    if max_wave_length >= len(wav):
+        wav = np.pad(wav, (0, max_wave_length - len(wav)), 'constant')
+
+    mel = audio.wav_to_mel_spectrogram(wav)
+    return np.array([mel[s] for s in mel_slices]), audio_seconds
+
+
+def preprocess_file(file_path):
+    return (file_path,) + partial_mels(file_path)
+
+
+class BatchedEncoder:
+    """
+    Embeds files with a pool of preprocessing workers feeding batches of
+    batch_size partial utterances to one resident VoiceEncoder. Embeddings
+    are the same as VoiceEncoder.embed_utterance gives for each file.
+    """
+
+    def __init__(self, vocoder, workers=None, batch_size=PARTIALS_BATCH_SIZE,
+                 max_pending_files=None):
+        self.vocoder = vocoder
+        self.workers = workers or multiprocessing.cpu_count()
+        self.batch_size = batch_size
+        # files handed to the preprocessing workers and not returned yet
+        self.max_pending_files = max_pending_files or 2 * self.workers
+        self.metrics = {}
+
+    def encode(self, file_paths):
+        encodings, _ = self.encode_stream(file_paths)
+        return encodings
+
+    def encode_stream(self, file_paths, file_done=None):
+        """
+        Embeds the files of an iterable that may still be growing, e.g. one
+        fed by downloads, and returns the embeddings along with the paths in
+        the same order. file_done is called with the path of every file as
+        soon as it is preprocessed, the file is not read after that.
+        """
+        start = time.time()
+        encoded_file_paths = []
+        embed_sums = []
+        partial_counts = []
+        pending_mels = []
+        pending_owners = []
+        audio_seconds = 0.0
+
+        for file_path, mels, file_audio_seconds in tqdm(self.preprocess(file_paths)):
+            if file_done is not None:
+                file_done(file_path)
+            file_index = len(encoded_file_paths)
+            encoded_file_paths.append(file_path)
+            embed_sums.append(np.zeros(self.vocoder.linear.out_features, dtype=np.float32))
+            partial_counts.append(len(mels))
+            audio_seconds += file_audio_seconds
+            pending_mels.extend(mels)
+            pending_owners.extend([file_index] * len(mels))
 
-    # processed_wavs = Parallel(n_jobs=-1)(delayed(preprocess_wav)(i) for i in tqdm(file_paths))
-    processed_wavs = [preprocess_wav(i) for i in tqdm(file_paths)]
+            while len(pending_mels) >= self.batch_size:
+                self.embed_partials(pending_mels[:self.batch_size],
+                                    pending_owners[:self.batch_size], embed_sums)
+                del pending_mels[:self.batch_size]
+                del pending_owners[:self.batch_size]
 
-    # encodings = Parallel(n_jobs=-1)(delayed(vocoder.embed_utterance)(i) for i in tqdm(processed_wavs))
-    encodings = [vocoder.embed_utterance(i) for i in tqdm(processed_wavs)]
+        if pending_mels:
+            self.embed_partials(pending_mels, pending_owners, embed_sums)
+
+        encodings = np.array([embed_sum / count for embed_sum, count
+                              in zip(embed_sums, partial_counts)])
+        if len(encodings):
+            encodings /= np.linalg.norm(encodings, 2, axis=1, keepdims=True)
+
+        seconds = max(time.time() - start, 1e-9)
+        self.metrics = {
+            'files': len(encoded_file_paths),
+            'audio_seconds': audio_seconds,
+            'seconds': seconds,
+            'files_per_second': len(encoded_file_paths) / seconds,
+            'audio_seconds_per_second': audio_seconds / seconds,
+        }
+        print('Encoded {files} files ({audio_seconds:.1f}s of audio) in {seconds:.1f}s: '
+              '{files_per_second:.2f} files/s, {audio_seconds_per_second:.1f} audio seconds/s'
+              .format(**self.metrics))
+        return encodings, encoded_file_paths
+
+    def preprocess(self, file_paths):
+        """
+        Yields the path and the partial_mels of every file, in order. The
+        paths are taken from file_paths in this thread, at most
+        max_pending_files ahead of the file yielded, as Pool.imap would read
+        the whole iterable from a thread of its own.
+        """
+        if self.workers == 1:
+            yield from map(preprocess_file, file_paths)
+            return
+
+        with multiprocessing.Pool(self.workers) as pool:
+            pending = collections.deque()
+            for file_path in file_paths:
+                pending.append(pool.apply_async(preprocess_file, (file_path,)))
+                if len(pending) > self.max_pending_files:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+
+    def embed_partials(self, mels, owners, embed_sums):
+        with torch.no_grad():
+            mels = torch.from_numpy(np.array(mels)).to(self.vocoder.device)
+            partial_embeds = self.vocoder(mels).cpu().numpy()
+
+        for owner, partial_embed in zip(owners, partial_embeds):
+            embed_sums[owner] += partial_embed
+
+
+def encoder(file_paths, vocoder, workers=None):
+    print('Number of files in batch: {}'.format(len(file_paths)))
     print('Creating embeddings')
-    encodings = np.array(encodings)
-    return encodings
+    return BatchedEncoder(vocoder, workers=workers).encode(file_paths)
 
 
 def concatenate_embed_files(embed_file_dest):
+    """
+    Merges the <embed_file_dest without extension>_*.npz batch files into a
+    float32 .npy matrix at embed_file_dest with a .npy extension, which the
+    batch file names give as .npz, plus a file path index next to it.
+    Returns the path of the merged matrix, or None without batch files.
+    """
     pattern = '_*.npz'
-    pattern_prefix = embed_file_dest[:-4]
+    pattern_prefix = os.path.splitext(embed_file_dest)[0]
     print(pattern_prefix)
-    npz_files_to_concat = glob.glob(pattern_prefix + pattern, recursive=True)
+    npz_files_to_concat = sorted(glob.glob(pattern_prefix + pattern, recursive=True))
     if npz_files_to_concat:
         print(npz_files_to_concat)
-        list_of_loaded_files = []
-        for file in npz_files_to_concat:
-            list_of_loaded_files.append(np.load(file))
-
-        final_embeds = np.concatenate([file['embeds'] for file in list_of_loaded_files])
-        final_file_paths = np.concatenate([file['file_paths'] for file in list_of_loaded_files])
-        print(f'Final length of concatenated embeds', len(final_embeds))
-        save_embeddings(embed_file_dest, embeddings=final_embeds,
-                        file_paths=final_file_paths)
+        merged_file_path = pattern_prefix + '.npy'
+        num_embeddings = merge_embed_files(npz_files_to_concat, merged_file_path)
+        print(f'Final length of concatenated embeds', num_embeddings)
+        return merged_file_path
+    return None
+
+
+def encode_file_stream(file_paths, embed_file_path, file_done=os.remove,
+                       max_pending_files=None):
+    """
+    Embeds files as they arrive from file_paths, calling file_done, which
+    deletes the file by default, once each one is preprocessed, and saves
+    the embeddings with their paths.
+    """
+    vocoder = VoiceEncoder()
+    embeddings, encoded_file_paths = BatchedEncoder(
+        vocoder, max_pending_files=max_pending_files).encode_stream(file_paths, file_done)
+    print('Total number of files: {}'.format(len(encoded_file_paths)))
+    save_embeddings(embed_file_path, embeddings, encoded_file_paths)
 
 
 def encode_each_batch(source_dir, source_dir_pattern, embed_file_path):
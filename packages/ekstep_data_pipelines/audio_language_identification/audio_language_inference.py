@@ -1,3 +1,4 @@
+import functools
 import os
 import sys
 
@@ -11,6 +12,12 @@ from ekstep_data_pipelines.audio_language_identification.utils import utils
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 torch.manual_seed(0)
 
+MODEL_PATH = "ekstep_data_pipelines/audio_language_identification/model/model.pt"
+LANGUAGE_MAP_PATH = (
+    "ekstep_data_pipelines/audio_language_identification/language_map.yml"
+)
+BATCH_SIZE = 32
+
 
 def load_model(model_path):
     if os.path.isfile(model_path):
@@ -23,6 +30,18 @@ def load_model(model_path):
     return model
 
 
+@functools.lru_cache(maxsize=None)
+def get_model(model_path=MODEL_PATH):
+    """Loads the model on the first call and returns the same instance
+    for the rest of the process."""
+    return load_model(model_path)
+
+
+@functools.lru_cache(maxsize=None)
+def get_language_map(language_map_path=LANGUAGE_MAP_PATH):
+    return load_yaml_file(language_map_path)["languages"]
+
+
 def forward(audio, model, mode="train"):
     try:
         model.eval()
@@ -38,9 +57,30 @@ def forward(audio, model, mode="train"):
         print("File error ", audio)
 
 
+def load_batch(audio_paths, mode="train"):
+    """Returns the spectrograms of the files that could be read, zero padded
+    along time into one (batch, 1, freq, time) tensor, and the indices of
+    those files in audio_paths. In train mode every spectrogram is cropped
+    to the same length, so nothing is padded."""
+    all_specs = utils.load_data_batch(audio_paths, mode=mode)
+    loaded_indices = [index for index, spec in enumerate(all_specs) if spec is not None]
+    specs = [all_specs[index] for index in loaded_indices]
+
+    if not specs:
+        return None, loaded_indices
+
+    max_len = max(spec.shape[1] for spec in specs)
+    feats = np.zeros((len(specs), 1, specs[0].shape[0], max_len), dtype=np.float32)
+    for index, spec in enumerate(specs):
+        feats[index, 0, :, : spec.shape[1]] = spec
+
+    # E1101: Module 'torch' has no 'from_numpy' member (no-member)
+    return torch.from_numpy(feats).to(device), loaded_indices
+
+
 def language_confidence_score_map(confidence_scores, language_map_path):
     output_dictionary = {}
-    language_map = load_yaml_file(language_map_path)["languages"]
+    language_map = get_language_map(language_map_path)
     for key in language_map:
         output_dictionary[language_map[key]] = confidence_scores[key]
     return output_dictionary
@@ -52,11 +92,8 @@ def load_yaml_file(path):
     return read_dict
 
 
-def evaluation(
-    audio_path,
-    model_path="ekstep_data_pipelines/audio_language_identification/model/model.pt",
-):
-    model = load_model(model_path)
+def evaluation(audio_path, model_path=MODEL_PATH):
+    model = get_model(model_path)
     model_output = forward(audio_path, model=model)
     soft_max = torch.nn.Softmax()
     probabilities = soft_max(model_output)
@@ -64,8 +101,43 @@ def evaluation(
     return confidence_scores
 
 
-def infer_language(
-    audio_path,
-    language_map_path="ekstep_data_pipelines/audio_language_identification/language_map.yml",
-):
+def evaluation_batch(audio_paths, model_path=MODEL_PATH, batch_size=BATCH_SIZE):
+    """Returns the confidence scores of every file in audio_paths, in order,
+    running the model once per batch_size files. Files that can not be
+    read get None."""
+    model = get_model(model_path)
+    model.eval()
+    soft_max = torch.nn.Softmax(dim=1)
+    confidence_scores = [None] * len(audio_paths)
+
+    for start in range(0, len(audio_paths), batch_size):
+        feats, loaded_indices = load_batch(audio_paths[start : start + batch_size])
+        if feats is None:
+            continue
+
+        with torch.no_grad():
+            probabilities = soft_max(model(feats))
+
+        for index, file_probabilities in zip(loaded_indices, probabilities):
+            confidence_scores[start + index] = [
+                "{:.5f}".format(i.item()) for i in file_probabilities
+            ]
+
+    return confidence_scores
+
+
+def infer_language(audio_path, language_map_path=LANGUAGE_MAP_PATH):
     return language_confidence_score_map(evaluation(audio_path), language_map_path)
+
+
+def infer_language_batch(
+    audio_paths, language_map_path=LANGUAGE_MAP_PATH, model_path=MODEL_PATH
+):
+    return [
+        (
+            None
+            if confidence_scores is None
+            else language_confidence_score_map(confidence_scores, language_map_path)
+        )
+        for confidence_scores in evaluation_batch(audio_paths, model_path)
+    ]
@@ -1,3 +1,6 @@
+import contextlib
+import wave
+
 import librosa
 import numpy as np
 
@@ -16,6 +19,54 @@ def load_wav(audio_filepath, sr, min_dur_sec=5):
     return extened_wav
 
 
+def load_pcm_wav(audio_filepath, sr, min_dur_sec=5):
+    """Same samples as load_wav for 16 bit mono wavs already at sr, read
+    straight from the file without decoding or resampling. Any other wav
+    goes through load_wav."""
+    with contextlib.closing(wave.open(audio_filepath, "rb")) as wave_file:
+        if (
+            wave_file.getnchannels() != 1
+            or wave_file.getsampwidth() != 2
+            or wave_file.getframerate() != sr
+        ):
+            return load_wav(audio_filepath, sr, min_dur_sec=min_dur_sec)
+        frames = wave_file.readframes(wave_file.getnframes())
+
+    audio_data = np.frombuffer(frames, dtype="<i2") / np.float32(32768.0)
+    min_len = int(min_dur_sec * sr)
+    if len(audio_data) <= min_len:
+        audio_data = np.concatenate((audio_data, np.zeros(min_len - len(audio_data))))
+    return audio_data
+
+
+def hann_window(win_length, n_fft):
+    """Periodic hann window of win_length centered in n_fft samples,
+    the window librosa.stft uses by default."""
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(win_length) / win_length)
+    left = (n_fft - win_length) // 2
+    return np.pad(window, (left, n_fft - win_length - left))
+
+
+def batch_magnitude_spectogram(wavs, hop_length, win_length, n_fft=512):
+    """Magnitudes of librosa.stft(wav, center=True, pad_mode="reflect") for
+    every wav, computed with one FFT over the frames of all of them.
+    Returns a (batch, 1 + n_fft // 2, frames) array, zero past the last
+    frame of shorter wavs, and the number of frames of each wav."""
+    n_frames = [1 + len(wav) // hop_length for wav in wavs]
+    padded_len = max(len(wav) for wav in wavs) + 2 * (n_fft // 2)
+    # reflect each wav on its own so the last frames match the unbatched stft
+    padded = np.zeros((len(wavs), padded_len), dtype=np.float32)
+    for index, wav in enumerate(wavs):
+        padded_wav = np.pad(wav, n_fft // 2, mode="reflect")
+        padded[index, : len(padded_wav)] = padded_wav
+
+    window = hann_window(win_length, n_fft).astype(np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(padded, n_fft, axis=1)
+    frames = frames[:, : max(n_frames) * hop_length : hop_length] * window
+    magnitudes = np.abs(np.fft.rfft(frames, n=n_fft, axis=2))
+    return magnitudes.transpose(0, 2, 1), n_frames
+
+
 def lin_mel_from_wav(wav, hop_length, win_length, n_mels):
     linear = librosa.feature.melspectrogram(
         wav, n_mels=n_mels, win_length=win_length, hop_length=hop_length
@@ -79,3 +130,45 @@ def load_data(
     mu = np.mean(spec_mag, 0, keepdims=True)
     std = np.std(spec_mag, 0, keepdims=True)
     return (spec_mag - mu) / (std + 1e-5)
+
+
+def load_data_batch(
+    filepaths,
+    sr=16000,
+    min_dur_sec=5,
+    win_length=400,
+    hop_length=160,
+    spec_len=400,
+    mode="train",
+):
+    """Batched load_data: returns the normalized spectrogram of every file,
+    or None for files that can not be read, computing the stft of all the
+    files at once."""
+    wavs = []
+    loaded_indices = []
+    for index, filepath in enumerate(filepaths):
+        try:
+            wavs.append(load_pcm_wav(filepath, sr=sr, min_dur_sec=min_dur_sec))
+            loaded_indices.append(index)
+        except Exception:
+            print("File error ", filepath)
+
+    specs = [None] * len(filepaths)
+    if not wavs:
+        return specs
+
+    mags, n_frames = batch_magnitude_spectogram(wavs, hop_length, win_length, n_fft=512)
+    mags = np.log1p(mags)
+
+    for index, mag_T, length in zip(loaded_indices, mags, n_frames):
+        if mode == "train":
+            randtime = np.random.randint(0, length - spec_len)
+            spec_mag = mag_T[:, randtime : randtime + spec_len]
+        else:
+            spec_mag = mag_T[:, :length]
+
+        # preprocessing, subtract mean, divided by time-wise var
+        mu = np.mean(spec_mag, 0, keepdims=True)
+        std = np.std(spec_mag, 0, keepdims=True)
+        specs[index] = (spec_mag - mu) / (std + 1e-5)
+    return specs
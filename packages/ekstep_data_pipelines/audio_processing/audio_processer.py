@@ -294,6 +294,7 @@ class AudioProcessor(BaseProcessor):
 
         aggressivness = aggressivness_dict.get("aggressiveness")
         max_duration = aggressivness_dict.get("max_duration")
+        streaming = aggressivness_dict.get("streaming", False)
 
         self.chunking_processor.create_audio_clips(
             aggressivness,
@@ -302,6 +303,7 @@ class AudioProcessor(BaseProcessor):
             local_chunk_output_path,
             local_vad_output_path,
             file_name,
+            streaming=streaming,
         )
 
         return local_chunk_output_path
@@ -310,6 +312,7 @@ class AudioProcessor(BaseProcessor):
         self, input_file_path, meta_data_file_path, local_path, audio_id, hash_code
     ):
         snr_config = self.audio_processor_config.get(SNR_CONFIG)
+        chunk_manifest = self.chunking_processor.read_chunk_manifest(input_file_path)
 
         self.snr_processor.fit_and_move(
             self._get_all_wav_in_path(input_file_path),
@@ -318,6 +321,7 @@ class AudioProcessor(BaseProcessor):
             local_path,
             audio_id,
             hash_code,
+            chunk_manifest=chunk_manifest,
         )
 
     def _get_csv_in_path(self, path):
@@ -5,6 +5,11 @@ from ekstep_data_pipelines.audio_transcription.constants import (
     CONFIG_NAME,
     CLEAN_AUDIO_PATH,
     SHOULD_SKIP_REJECTED,
+    STATUS_UPDATE_BATCH_SIZE,
+    TRANSCRIPTION_ENGINE,
+)
+from ekstep_data_pipelines.audio_transcription.transcription_engine import (
+    TranscriptionEngine,
 )
 from ekstep_data_pipelines.audio_transcription.transcription_sanitizers import (
     get_transcription_sanitizers,
@@ -23,6 +28,8 @@ from ekstep_data_pipelines.common.utils import get_logger
 
 LOGGER = get_logger("audio_transcription")
 
+DEFAULT_STATUS_UPDATE_BATCH_SIZE = 500
+
 
 class AudioTranscription(BaseProcessor):
     LOCAL_PATH = None
@@ -43,6 +50,8 @@ class AudioTranscription(BaseProcessor):
         self.transcription_clients = audio_commons.get("transcription_clients")
         self.catalogue_dao = catalogue_dao
         self.audio_transcription_config = None
+        self.transcription_engines = {}
+        self.pending_status_updates = []
 
         super().__init__(**kwargs)
 
@@ -79,6 +88,7 @@ class AudioTranscription(BaseProcessor):
                 if len(utterances) <= 0:
                     LOGGER.info("No utterances found for audio_id:%s", audio_id)
                     continue
+                utterances = self.catalogue_dao.index_utterances_by_name(utterances)
                 if data_set == '':  # To handle when no dataset type is present
                     data_set_target = 'train'
                     remote_dir_path_for_given_audio_id = (
@@ -155,6 +165,14 @@ class AudioTranscription(BaseProcessor):
                 failed_audio_ids.append(audio_id)
                 continue
 
+        for stt_api, transcription_engine in self.transcription_engines.items():
+            LOGGER.info(
+                "Transcribed %s utterances with %s at %.2f utterances/s",
+                transcription_engine.utterances,
+                stt_api,
+                transcription_engine.utterances_per_second,
+            )
+
         if len(failed_audio_ids) > 0:
             LOGGER.error("******* Job failed for one or more audio_ids")
             raise RuntimeError("Failed audio_ids:" + str(failed_audio_ids))
@@ -166,6 +184,22 @@ class AudioTranscription(BaseProcessor):
     # def move_to_gcs(self, local_path, remote_stt_output_path):
     #     self.fs_interface.upload_to_location(local_path, remote_stt_output_path)
 
+    def get_transcription_engine(self, stt_api):
+        """
+        Returns the engine of the given stt api, created once with the
+        concurrency, rate limit and retry settings configured for it.
+        """
+        if stt_api not in self.transcription_engines:
+            engine_config = (
+                (self.audio_transcription_config or {})
+                .get(TRANSCRIPTION_ENGINE, {})
+                .get(stt_api, {})
+            )
+            self.transcription_engines[stt_api] = TranscriptionEngine.get_instance(
+                engine_config
+            )
+        return self.transcription_engines[stt_api]
+
     def save_transcription(self, transcription, output_file_path):
         with open(output_file_path, "w") as file:
             file.write(transcription)
@@ -186,6 +220,7 @@ class AudioTranscription(BaseProcessor):
         local_clean_path = ""
         local_rejected_path = ""
         local_clean_folder = ""
+        utterances_to_transcribe = []
 
         for curr_file_name in all_files:
             file_name = f"{remote_path}/{curr_file_name}"
@@ -232,42 +267,72 @@ class AudioTranscription(BaseProcessor):
 
             utterance_metadata['stt_api'] = stt_api
 
-            self.generate_transcription_and_sanitize(
-                audio_id,
-                local_clean_path,
-                local_rejected_path,
-                file_name,
-                stt_language,
-                transcription_client,
-                utterance_metadata
+            if ".wav" not in file_name:
+                continue
 
+            utterances_to_transcribe.append(
+                (local_clean_path, file_name, utterance_metadata)
             )
 
+        transcription_engine = self.get_transcription_engine(stt_api)
+
+        # every utterance is downloaded before any stt call, as a failed
+        # download fails the whole audio_id and paid calls would be wasted
+        transcription_engine.run_all(
+            lambda utterance: self.fs_interface.download_file_to_location(
+                utterance[1], utterance[0]
+            ),
+            utterances_to_transcribe,
+        )
+
+        # stt calls run concurrently, the results are then sanitized and
+        # saved in the order of the files
+        outcomes = transcription_engine.map(
+            lambda utterance: transcription_engine.call(
+                transcription_client.generate_transcription,
+                stt_language,
+                utterance[0],
+            ),
+            utterances_to_transcribe,
+        )
+
+        try:
+            for (local_clean_path, _, utterance_metadata), outcome in zip(
+                    utterances_to_transcribe, outcomes
+            ):
+                self.sanitize_transcription(
+                    audio_id,
+                    local_clean_path,
+                    local_rejected_path,
+                    stt_language,
+                    utterance_metadata,
+                    outcome,
+                )
+        finally:
+            # statuses of the utterances handled so far are written even
+            # when the audio_id fails
+            self.flush_utterance_statuses()
+
         return local_clean_folder, local_rejected_path
 
-    def generate_transcription_and_sanitize(
+    def sanitize_transcription(
             self,
             audio_id,
             local_clean_path,
             local_rejected_path,
-            remote_file_path,
             stt_language,
-            transcription_client,
-            utterance_metadata
-
+            utterance_metadata,
+            outcome,
     ):
-        if ".wav" not in remote_file_path:
-            return
-
         transcription_file_name = local_clean_path.replace(".wav", ".txt")
-        self.fs_interface.download_file_to_location(remote_file_path, local_clean_path)
 
         reason = None
 
         try:
-            transcript = transcription_client.generate_transcription(
-                stt_language, local_clean_path
-            )
+            if outcome.error is not None:
+                raise outcome.error
+
+            transcript = outcome.value
             original_transcript = transcript
 
             # curr_language = self.audio_transcription_config.get(AUDIO_LANGUAGE)
@@ -340,7 +405,7 @@ class AudioTranscription(BaseProcessor):
         utterance_metadata["status"] = "Clean"
         utterance_metadata["reason"] = reason
         utterance_metadata["is_transcribed"] = True
-        self.catalogue_dao.update_utterance_status(audio_id, utterance_metadata)
+        self.queue_utterance_status(audio_id, utterance_metadata)
 
     def handle_error(
             self,
@@ -353,7 +418,7 @@ class AudioTranscription(BaseProcessor):
         utterance_metadata["status"] = "Rejected"
         utterance_metadata["reason"] = reason
         utterance_metadata["is_transcribed"] = False
-        self.catalogue_dao.update_utterance_status(audio_id, utterance_metadata)
+        self.queue_utterance_status(audio_id, utterance_metadata)
         if not os.path.exists(local_rejected_path):
             os.makedirs(local_rejected_path)
         command = f"mv {local_clean_path} {local_rejected_path}"
@@ -364,6 +429,38 @@ class AudioTranscription(BaseProcessor):
         )
         os.system(command)
 
+    def queue_utterance_status(self, audio_id, utterance_metadata):
+        """
+        Keeps the status of the utterance to be written with the others by
+        flush_utterance_statuses, which is called once
+        status_update_batch_size statuses are waiting.
+        """
+        self.pending_status_updates.append((audio_id, dict(utterance_metadata)))
+        batch_size = (self.audio_transcription_config or {}).get(
+            STATUS_UPDATE_BATCH_SIZE, DEFAULT_STATUS_UPDATE_BATCH_SIZE
+        )
+        if len(self.pending_status_updates) >= batch_size:
+            self.flush_utterance_statuses()
+
+    def flush_utterance_statuses(self):
+        """Writes the waiting statuses with one update per audio_id."""
+        pending_status_updates = self.pending_status_updates
+        self.pending_status_updates = []
+
+        utterances_by_audio_id = {}
+        for audio_id, utterance_metadata in pending_status_updates:
+            utterances_by_audio_id.setdefault(audio_id, []).append(
+                utterance_metadata
+            )
+
+        for audio_id, utterances in utterances_by_audio_id.items():
+            LOGGER.info(
+                "Updating status of %s utterances of audio_id:%s",
+                len(utterances),
+                audio_id,
+            )
+            self.catalogue_dao.update_utterance_statuses(audio_id, utterances)
+
     def get_local_dir_path(self, local_file_path):
         path_array = local_file_path.split("/")
         path_array.pop()
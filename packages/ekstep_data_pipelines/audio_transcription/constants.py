@@ -3,3 +3,5 @@ CLEAN_AUDIO_PATH = "remote_clean_audio_file_path"
 SHOULD_SKIP_REJECTED = "should_skip_rejected"
 LANGUAGE = "language"
 AUDIO_LANGUAGE = "audio_language"
+TRANSCRIPTION_ENGINE = "transcription_engine"
+STATUS_UPDATE_BATCH_SIZE = "status_update_batch_size"
@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ekstep_data_pipelines.common.audio_commons.transcription_clients.transcription_client_errors import (
+    AzureTranscriptionClientError,
+    GoogleTranscriptionClientError,
+    EkstepTranscriptionClientError,
+)
+from ekstep_data_pipelines.common.utils import get_logger
+
+LOGGER = get_logger("TranscriptionEngine")
+
+TRANSCRIPTION_CLIENT_ERRORS = (
+    AzureTranscriptionClientError,
+    GoogleTranscriptionClientError,
+    EkstepTranscriptionClientError,
+)
+
+# result of one item of TranscriptionEngine.map, error is None on success
+Outcome = namedtuple("Outcome", ["value", "error"])
+
+
+class TokenBucket:
+    """
+    Allows rate calls per second on average and bursts of up to capacity
+    calls. acquire blocks until a token is available. A rate of None or 0
+    does not limit anything.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity or max(rate or 0, 1)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(self.capacity)
+        self.updated_at = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+
+        while True:
+            with self._lock:
+                now = self.clock()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_seconds = (1 - self.tokens) / self.rate
+            self.sleep(wait_seconds)
+
+
+class TranscriptionEngine:
+    """
+    Runs the calls to one speech to text client:
+      - at most max_concurrency items at the same time
+      - at most requests_per_second client calls, through a TokenBucket
+      - retrying a call failing with a retryable transcription client
+        error, a transient network or service failure, up to max_retries
+        times, waiting backoff_seconds, doubled after every attempt and
+        capped at max_backoff_seconds. Other errors, as audio without
+        speech or an invalid request, fail the same way again and are
+        raised at once
+    Items are processed by a pool of threads, as the time goes into waiting
+    for the storage and the client, and results are returned in the order
+    of the items.
+    """
+
+    @staticmethod
+    def get_instance(engine_config):
+        return TranscriptionEngine(**engine_config)
+
+    def __init__(
+        self,
+        max_concurrency=1,
+        requests_per_second=None,
+        max_retries=0,
+        backoff_seconds=1.0,
+        max_backoff_seconds=30.0,
+        sleep=time.sleep,
+    ):
+        self.max_concurrency = max_concurrency
+        self.token_bucket = TokenBucket(requests_per_second, sleep=sleep)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.sleep = sleep
+        self.utterances = 0
+        self.seconds = 0.0
+
+    @property
+    def utterances_per_second(self):
+        return self.utterances / self.seconds if self.seconds else 0.0
+
+    def call(self, function, *args):
+        """Calls function with rate limiting and retries."""
+        attempt = 0
+        while True:
+            self.token_bucket.acquire()
+            try:
+                return function(*args)
+            except TRANSCRIPTION_CLIENT_ERRORS as error:
+                if not error.retryable or attempt >= self.max_retries:
+                    raise
+                wait_seconds = min(
+                    self.backoff_seconds * 2**attempt, self.max_backoff_seconds
+                )
+                LOGGER.info(
+                    "Transcription call failed with %s, retrying in %.1fs",
+                    str(error),
+                    wait_seconds,
+                )
+                self.sleep(wait_seconds)
+                attempt += 1
+
+    def run_all(self, function, items):
+        """
+        Calls function on every item, at most max_concurrency at a time,
+        for steps that must all succeed. On the first error the calls not
+        started yet are cancelled, and the error is raised once the running
+        ones are done.
+        """
+        if self.max_concurrency <= 1 or len(items) <= 1:
+            for item in items:
+                function(item)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = [executor.submit(function, item) for item in items]
+            for future in as_completed(futures):
+                if future.exception() is not None:
+                    for pending_future in futures:
+                        pending_future.cancel()
+                    raise future.exception()
+
+    def map(self, function, items):
+        """
+        Calls function on every item and returns an Outcome for each, in
+        the order of items. function should use call for its client calls.
+        """
+        start = time.time()
+
+        def run(item):
+            try:
+                return Outcome(function(item), None)
+            except Exception as error:
+                return Outcome(None, error)
+
+        if self.max_concurrency > 1 and len(items) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                outcomes = list(executor.map(run, items))
+        else:
+            outcomes = [run(item) for item in items]
+
+        seconds = time.time() - start
+        self.utterances += len(items)
+        self.seconds += seconds
+        LOGGER.info(
+            "Transcribed %s utterances in %.1fs (%.2f utterances/s)",
+            len(items),
+            seconds,
+            len(items) / seconds if seconds else 0.0,
+        )
+        return outcomes
@@ -11,7 +11,22 @@ class BaseTranscriptionSanitizer(metaclass=ABCMeta):
         pass
 
 
+_transcription_sanitizers = None
+
+
 def get_transcription_sanitizers(**kwargs):
+    """
+    Returns the sanitizer of every language. They are created on the first
+    call only, as they keep no state between transcriptions.
+    """
+    global _transcription_sanitizers
+
+    if _transcription_sanitizers is None:
+        _transcription_sanitizers = create_transcription_sanitizers(**kwargs)
+    return _transcription_sanitizers
+
+
+def create_transcription_sanitizers(**kwargs):
     # cyclic imports
     from ekstep_data_pipelines.audio_transcription.transcription_sanitizers.hindi_sanitizer import (
         HindiSanitizer,
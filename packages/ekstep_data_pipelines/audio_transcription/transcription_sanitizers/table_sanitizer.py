@@ -0,0 +1,111 @@
+import re
+from collections import namedtuple
+
+from ekstep_data_pipelines.audio_transcription.transcription_sanitizers import (
+    BaseTranscriptionSanitizer,
+)
+from ekstep_data_pipelines.audio_transcription.transcription_sanitizers.audio_transcription_errors import (
+    TranscriptionSanitizationError,
+)
+from ekstep_data_pipelines.common.utils import get_logger
+
+# what every character a language does not accept is translated to, it is
+# a noncharacter that no language accepts
+INVALID_CHAR = "\uffff"
+
+# result of one transcription of sanitize_many, error is None on success
+SanitizationResult = namedtuple("SanitizationResult", ["transcription", "error"])
+
+
+class CharTable(dict):
+    """
+    str.translate table of a language over codepoints. The codepoints given
+    are translated as given, any other one is looked up in the valid
+    characters pattern the first time it is seen and then kept: valid
+    characters and whitespace are left as they are, the others become
+    INVALID_CHAR.
+    """
+
+    def __init__(self, valid_chars_pattern, translations):
+        super().__init__(translations)
+        self.valid_chars_pattern = valid_chars_pattern
+
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        if char.isspace() or self.valid_chars_pattern.fullmatch(char):
+            translation = codepoint
+        else:
+            translation = INVALID_CHAR
+        self[codepoint] = translation
+        return translation
+
+
+class TableSanitizer(BaseTranscriptionSanitizer):
+    """
+    Sanitizer of a language described by its class attributes:
+      - VALID_CHARS: regex character class of the characters of the language
+      - PUNCTUATION: characters removed from the transcription, '-' is
+        replaced by a space
+      - INVALID_CHARS_ERROR: error of a transcription with other characters
+      - REJECTS_COLON: whether a transcription with ':' is rejected first
+    The characters are compiled into a CharTable, so a transcription is
+    normalized and checked with a single str.translate instead of a strip,
+    a translate and a regex substitution.
+    """
+
+    VALID_CHARS = None
+    PUNCTUATION = "!\"#%&'()*+,./;<=>?@[\\]^_`{|}~।"
+    INVALID_CHARS_ERROR = None
+    REJECTS_COLON = False
+    LOGGER_NAME = "TranscriptionSanitizer"
+
+    def __init__(self, *args, **kwargs):
+        self.logger = get_logger(self.LOGGER_NAME)
+        self.valid_chars_pattern = re.compile(self.VALID_CHARS)
+        punctuation = dict.fromkeys(map(ord, self.PUNCTUATION))
+        self.punctuation_table = {ord("-"): " ", **punctuation}
+        self.validation_table = CharTable(self.valid_chars_pattern, {})
+        self.sanitization_table = CharTable(
+            self.valid_chars_pattern, self.punctuation_table
+        )
+
+    def sanitize(self, transcription: str):
+        self.logger.info("Sanitizing transcription:%s", transcription)
+        return self._sanitize(transcription)
+
+    def sanitize_many(self, transcriptions):
+        """
+        Sanitizes the transcriptions and returns a SanitizationResult for
+        each, in their order, holding the TranscriptionSanitizationError of
+        a rejected one.
+        """
+        self.logger.info("Sanitizing %s transcriptions", len(transcriptions))
+        results = []
+        for transcription in transcriptions:
+            try:
+                results.append(SanitizationResult(self._sanitize(transcription), None))
+            except TranscriptionSanitizationError as error:
+                results.append(SanitizationResult(None, error))
+        return results
+
+    def _sanitize(self, transcription):
+        if self.REJECTS_COLON and ":" in transcription:
+            raise TranscriptionSanitizationError("transcription has :")
+
+        # whitespace is left as it is, so stripping once at the end gives
+        # the same transcription as stripping before and after
+        transcription = transcription.translate(self.sanitization_table).strip()
+
+        if len(transcription) == 0:
+            raise TranscriptionSanitizationError("transcription is empty")
+
+        if INVALID_CHAR in transcription:
+            raise TranscriptionSanitizationError(self.INVALID_CHARS_ERROR)
+
+        return transcription
+
+    def shouldReject(self, transcription):
+        return INVALID_CHAR in transcription.translate(self.validation_table)
+
+    def replace_bad_char(self, transcription):
+        return transcription.translate(self.punctuation_table)
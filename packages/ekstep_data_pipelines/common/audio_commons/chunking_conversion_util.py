@@ -1,12 +1,12 @@
 import collections
 import contextlib
 import glob
+import json
 import os
 import subprocess
 import sys
 import wave
 
-import sox
 import webrtcvad
 from ekstep_data_pipelines.common.utils import get_logger
 
@@ -15,6 +15,10 @@ Logger = get_logger("Chunking Util")
 
 class ChunkingConversionUtil:
     re_chunking_aggressiveness = 3
+    frame_duration_ms = 30
+    # number of VAD frames read from disk at once in streaming mode (30s of audio)
+    stream_window_frames = 1000
+    manifest_file_name = "chunk_manifest.json"
 
     @staticmethod
     def get_instance():
@@ -68,79 +72,165 @@ class ChunkingConversionUtil:
         vad_output_file_path,
         base_chunk_name,
         is_rechunking=True,
+        streaming=False,
     ):
-        audio, sample_rate = self.read_wave(wav_file_path)
         vad = webrtcvad.Vad(int(aggressiveness))
-        frames = self.frame_generator(30, audio, sample_rate)
-        frames = list(frames)
+
+        if streaming:
+            sample_rate = self.read_wave_sample_rate(wav_file_path)
+            frames = self.stream_frame_generator(
+                self.frame_duration_ms, wav_file_path, self.stream_window_frames
+            )
+        else:
+            audio, sample_rate = self.read_wave(wav_file_path)
+            frames = self.frame_generator(self.frame_duration_ms, audio, sample_rate)
+            frames = list(frames)
+
         file = open(vad_output_file_path, "w+")
 
+        manifest = {}
+        segment_offsets = []
         segments = self.vad_collector(
-            sample_rate, 30, 300, vad, frames, vad_output_file_path, file
+            sample_rate,
+            self.frame_duration_ms,
+            300,
+            vad,
+            frames,
+            vad_output_file_path,
+            file,
+            segment_offsets,
         )
         for i, segment in enumerate(segments):
-            path = f"{dir_to_save_chunks}/{i}_{base_chunk_name}"
+            chunk_name = f"{i}_{base_chunk_name}"
+            duration = self.calculate_duration(segment, sample_rate)
+            segment_offset = segment_offsets[i]
+
+            if is_rechunking and duration > max_duration:
+                Logger.info(
+                    "rechunking of segment %s and duration of segment is: %s",
+                    chunk_name,
+                    duration,
+                )
+                self.rechunk_segment(
+                    segment,
+                    sample_rate,
+                    dir_to_save_chunks,
+                    chunk_name,
+                    file,
+                    manifest,
+                    segment_offset,
+                )
+                continue
+
+            path = f"{dir_to_save_chunks}/{chunk_name}"
             file.write("\nWriting %s" % (path,))
             file.write("\n")
             self.write_wave(path, segment, sample_rate)
+            manifest[chunk_name] = self.manifest_entry(
+                segment, sample_rate, segment_offset
+            )
 
         file.close()
 
-        if is_rechunking:
-            self.rechunking_acc_to_duration(
-                max_duration, dir_to_save_chunks, vad_output_file_path
-            )
+        self.write_chunk_manifest(dir_to_save_chunks, manifest)
+        return manifest
 
-    def rechunking_acc_to_duration(
-        self, max_duration, dir_of_chunks, vad_output_file_path
+    def rechunk_segment(
+        self,
+        segment,
+        sample_rate,
+        dir_to_save_chunks,
+        base_chunk_name,
+        file,
+        manifest=None,
+        segment_offset=0,
     ):
+        """Splits a too long segment again with the stricter VAD.
+        The segment is re-framed from memory, so it never has to be written
+        and read back before it is split.
+        """
+        vad = webrtcvad.Vad(ChunkingConversionUtil.re_chunking_aggressiveness)
+        frames = self.frame_generator(
+            self.frame_duration_ms, memoryview(segment), sample_rate
+        )
+        sub_segment_offsets = []
+        sub_segments = self.vad_collector(
+            sample_rate,
+            self.frame_duration_ms,
+            300,
+            vad,
+            frames,
+            None,
+            file,
+            sub_segment_offsets,
+        )
 
-        file_list = glob.glob(dir_of_chunks + "/*.wav")
-
-        for file_path in file_list:
-
-            duration = self.calculate_duration(file_path)
-
-            if duration > max_duration:
-                base_chunk_name = file_path.split("/").pop()
-                Logger.info(
-                    "rechunking of file %s and duration of file is: %s",
-                    base_chunk_name,
-                    duration,
+        for i, sub_segment in enumerate(sub_segments):
+            chunk_name = f"{i}_{base_chunk_name}"
+            path = f"{dir_to_save_chunks}/{chunk_name}"
+            file.write("\nWriting %s" % (path,))
+            file.write("\n")
+            self.write_wave(path, sub_segment, sample_rate)
+            if manifest is not None:
+                manifest[chunk_name] = self.manifest_entry(
+                    sub_segment, sample_rate, segment_offset + sub_segment_offsets[i]
                 )
 
-                self.create_audio_clips(
-                    ChunkingConversionUtil.re_chunking_aggressiveness,
-                    max_duration,
-                    file_path,
-                    dir_of_chunks,
-                    vad_output_file_path,
-                    base_chunk_name,
-                    False,
-                )
-                os.remove(file_path)
+    def manifest_entry(self, segment, sample_rate, byte_offset):
+        """Describes a written chunk: its number of frames, sample rate,
+        duration in seconds and byte offset in the PCM data of the source wav.
+        """
+        return {
+            "frames": len(segment) // 2,
+            "sample_rate": sample_rate,
+            "duration": self.calculate_duration(segment, sample_rate),
+            "byte_offset": byte_offset,
+        }
+
+    def write_chunk_manifest(self, dir_to_save_chunks, manifest):
+        with open(f"{dir_to_save_chunks}/{self.manifest_file_name}", "w") as file:
+            json.dump(manifest, file)
+
+    def read_chunk_manifest(self, dir_of_chunks):
+        """Returns the manifest written with the chunks of dir_of_chunks,
+        or an empty dict if there is none.
+        """
+        manifest_file_path = f"{dir_of_chunks}/{self.manifest_file_name}"
+        if not os.path.exists(manifest_file_path):
+            return {}
 
-    def calculate_duration(self, input_filepath):
-        duration = sox.file_info.duration(input_filepath)
-        Logger.info(
-            "Duration for input_filepath:%s : %s", input_filepath, str(duration)
-        )
-        return duration
+        with open(manifest_file_path, "r") as file:
+            return json.load(file)
+
+    def calculate_duration(self, segment, sample_rate):
+        """Returns the duration in seconds of 16 bit mono PCM audio data."""
+        return len(segment) / (2.0 * sample_rate)
 
     def read_wave(self, path):
         """Reads a .wav file.
         Takes the path, and returns (PCM audio data, sample rate).
         """
         with contextlib.closing(wave.open(path, "rb")) as wave_file:
-            num_channels = wave_file.getnchannels()
-            assert num_channels == 1
-            sample_width = wave_file.getsampwidth()
-            assert sample_width == 2
-            sample_rate = wave_file.getframerate()
-            assert sample_rate in (8000, 16000, 32000, 48000)
+            sample_rate = self._validate_wave(wave_file)
             pcm_data = wave_file.readframes(wave_file.getnframes())
             return pcm_data, sample_rate
 
+    def read_wave_sample_rate(self, path):
+        """Reads only the header of a .wav file.
+        Takes the path, and returns the sample rate.
+        """
+        with contextlib.closing(wave.open(path, "rb")) as wave_file:
+            return self._validate_wave(wave_file)
+
+    def _validate_wave(self, wave_file):
+        num_channels = wave_file.getnchannels()
+        assert num_channels == 1
+        sample_width = wave_file.getsampwidth()
+        assert sample_width == 2
+        sample_rate = wave_file.getframerate()
+        assert sample_rate in (8000, 16000, 32000, 48000)
+        return sample_rate
+
     def write_wave(self, path, audio, sample_rate):
         """Writes a .wav file.
         Takes path, PCM audio data, and sample rate.
@@ -165,10 +255,42 @@ class ChunkingConversionUtil:
             #         print("offset, offset+n: ", offset, offset+n)
             #         print("timestamp:", timestamp)
             #         print("duration:", duration)
-            yield Frame(audio[offset : offset + n], timestamp, duration)
+            yield Frame(audio[offset : offset + n], timestamp, duration, offset)
             timestamp += duration
             offset += n
 
+    def stream_frame_generator(self, frame_duration_ms, path, window_frames):
+        """Generates audio frames from a .wav file without loading it in memory.
+        Takes the desired frame duration in milliseconds, the path and the
+        number of frames to read from disk at once.
+        Yields the same Frames as frame_generator, backed by memoryview
+        slices of a fixed size read window instead of copied bytes.
+        """
+        with contextlib.closing(wave.open(path, "rb")) as wave_file:
+            sample_rate = self._validate_wave(wave_file)
+            n = int(sample_rate * (frame_duration_ms / 1000.0) * 2)
+            total_bytes = wave_file.getnframes() * 2
+            offset = 0
+            timestamp = 0.0
+            duration = (float(n) / sample_rate) / 2.0
+
+            while offset + n < total_bytes:
+                window = memoryview(wave_file.readframes(window_frames * n // 2))
+                if not window:
+                    break
+
+                window_offset = 0
+                while window_offset + n <= len(window) and offset + n < total_bytes:
+                    yield Frame(
+                        window[window_offset : window_offset + n],
+                        timestamp,
+                        duration,
+                        offset,
+                    )
+                    timestamp += duration
+                    window_offset += n
+                    offset += n
+
     def vad_collector(
         self,
         sample_rate,
@@ -178,6 +300,7 @@ class ChunkingConversionUtil:
         frames,
         vad_output_file_path,
         file,
+        segment_offsets=None,
     ):
         """Filters out non-voiced audio frames.
         Given a webrtcvad.Vad and a source of audio frames, yields only
@@ -196,6 +319,8 @@ class ChunkingConversionUtil:
         padding_duration_ms - The amount to pad the window, in milliseconds.
         vad - An instance of webrtcvad.Vad.
         frames - a source of audio frames (sequence or generator).
+        segment_offsets - optional list, the byte offset of every yielded
+        segment is appended to it before the segment is yielded.
         Returns: A generator that yields PCM audio data.
         """
         num_padding_frames = int(padding_duration_ms / frame_duration_ms)
@@ -243,6 +368,8 @@ class ChunkingConversionUtil:
 
                     # file.write('\n')
                     triggered = False
+                    if segment_offsets is not None:
+                        segment_offsets.append(voiced_frames[0].offset)
                     yield b"".join([f.bytes for f in voiced_frames])
                     ring_buffer.clear()
                     voiced_frames = []
@@ -256,13 +383,16 @@ class ChunkingConversionUtil:
         # If we have any leftover voiced audio when we run out of input,
         # yield it.
         if voiced_frames:
+            if segment_offsets is not None:
+                segment_offsets.append(voiced_frames[0].offset)
             yield b"".join([f.bytes for f in voiced_frames])
 
 
 class Frame(object):
     """Represents a "frame" of audio data."""
 
-    def __init__(self, bytes, timestamp, duration):
+    def __init__(self, bytes, timestamp, duration, offset=0):
         self.bytes = bytes
         self.timestamp = timestamp
         self.duration = duration
+        self.offset = offset
@@ -0,0 +1,77 @@
+import os
+import zipfile
+
+import numpy as np
+
+EMBEDDINGS_DTYPE = np.float32
+FILE_PATHS_SUFFIX = "_file_paths.txt"
+
+
+def file_paths_index_path(embed_file_path):
+    """Path of the file path index kept next to a merged .npy embeddings file."""
+    return os.path.splitext(embed_file_path)[0] + FILE_PATHS_SUFFIX
+
+
+def read_npz_shape(npz_file_path, key="embeds"):
+    """Reads the shape of one array of a .npz file without loading it."""
+    with zipfile.ZipFile(npz_file_path) as npz_file:
+        with npz_file.open(f"{key}.npy") as array_file:
+            if np.lib.format.read_magic(array_file) == (1, 0):
+                shape, _, _ = np.lib.format.read_array_header_1_0(array_file)
+            else:
+                shape, _, _ = np.lib.format.read_array_header_2_0(array_file)
+    return shape
+
+
+def merge_embed_files(npz_files, embed_file_dest):
+    """
+    Merges the embeds and file_paths of the given .npz files into a float32
+    .npy matrix at embed_file_dest and a file path index next to it, with
+    one path per line. The matrix is written through a memory map one file
+    at a time, so only one batch is held in memory. embed_file_dest must end
+    in .npy, as load_embeddings reads other files as .npz.
+    Returns the number of embeddings merged.
+    """
+    if not embed_file_dest.endswith(".npy"):
+        raise ValueError(f"merged embeddings must be a .npy file: {embed_file_dest}")
+
+    if not npz_files:
+        return 0
+
+    shapes = [read_npz_shape(npz_file) for npz_file in npz_files]
+    num_embeddings = sum(shape[0] for shape in shapes)
+
+    merged_embeds = np.lib.format.open_memmap(
+        embed_file_dest,
+        mode="w+",
+        dtype=EMBEDDINGS_DTYPE,
+        shape=(num_embeddings, shapes[0][1]),
+    )
+    start = 0
+    with open(file_paths_index_path(embed_file_dest), "w") as index_file:
+        for npz_file in npz_files:
+            with np.load(npz_file) as batch:
+                embeds = batch["embeds"]
+                merged_embeds[start : start + len(embeds)] = embeds
+                index_file.writelines(f"{path}\n" for path in batch["file_paths"])
+            start += len(embeds)
+
+    merged_embeds.flush()
+    del merged_embeds
+    return num_embeddings
+
+
+def load_embeddings(embed_file_path):
+    """
+    Returns the embeddings and file paths of a merged .npy embeddings file,
+    with the embeddings memory mapped read only. Older .npz files holding
+    embeds and file_paths are loaded into memory instead.
+    """
+    if embed_file_path.endswith(".npz"):
+        with np.load(embed_file_path) as embed_file:
+            return embed_file["embeds"], embed_file["file_paths"]
+
+    embeddings = np.load(embed_file_path, mmap_mode="r")
+    with open(file_paths_index_path(embed_file_path)) as index_file:
+        file_paths = np.array(index_file.read().splitlines())
+    return embeddings, file_paths
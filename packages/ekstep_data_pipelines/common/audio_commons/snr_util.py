@@ -2,12 +2,14 @@ import json
 import os
 import shutil
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
 
 import pandas as pd
 from ekstep_data_pipelines.audio_language_identification.audio_language_inference import (
-    infer_language,
+    infer_language_batch,
 )
 from ekstep_data_pipelines.audio_processing.audio_duration import calculate_duration
+from ekstep_data_pipelines.common.audio_commons.wada_snr import WadaSNR
 from ekstep_data_pipelines.common.utils import get_logger
 
 LOGGER = get_logger("Snr")
@@ -19,22 +21,68 @@ class SNR:
     """
 
     MAX_DURATION = 15
+    BINARY_ENGINE = "binary"
+    NATIVE_ENGINE = "native"
+    NATIVE_BATCH_SIZE = 256
+    DEFAULT_CHUNK_SIZE = 16
 
     @staticmethod
     def get_instance(initialization_dict):
-        feat_language_identification = initialization_dict.get(
-            "audio_processor_config", {}
-        ).get("feat_language_identification", False)
+        audio_processor_config = initialization_dict.get("audio_processor_config", {})
+        feat_language_identification = audio_processor_config.get(
+            "feat_language_identification", False
+        )
+        snr_config = audio_processor_config.get("snr_configeration", {})
+        snr_engine = snr_config.get("snr_engine", SNR.BINARY_ENGINE)
+        workers = snr_config.get("workers", 1)
+        chunk_size = snr_config.get("chunk_size", SNR.DEFAULT_CHUNK_SIZE)
         LOGGER.info(
-            "Running with feat_language_identification=%s",
+            "Running with feat_language_identification=%s, snr_engine=%s, "
+            "workers=%s and chunk_size=%s",
             str(feat_language_identification),
+            snr_engine,
+            workers,
+            chunk_size,
+        )
+        curr_instance = SNR(
+            feat_language_identification,
+            snr_engine,
+            workers=workers,
+            chunk_size=chunk_size,
         )
-        curr_instance = SNR(feat_language_identification)
         return curr_instance
 
-    def __init__(self, feat_language_identification=False):
+    def __init__(
+        self,
+        feat_language_identification=False,
+        snr_engine=BINARY_ENGINE,
+        table_file_path=None,
+        workers=1,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+    ):
         self.feat_language_identification = feat_language_identification
         self.current_working_dir = os.getcwd()
+        self.snr_engine = snr_engine
+        self.workers = workers or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.table_file_path = table_file_path or self.get_table_path(
+            self.current_working_dir
+        )
+        self._wada_snr = None
+
+    @property
+    def wada_snr(self):
+        if self._wada_snr:
+            return self._wada_snr
+
+        self._wada_snr = WadaSNR.get_instance(self.table_file_path)
+        return self._wada_snr
+
+    def get_table_path(self, current_working_dir):
+        return (
+            f"{current_working_dir}/ekstep_data_pipelines/binaries/WadaSNR/Exe/"
+            f"Alpha0.400000.txt"
+        )
 
     def get_command(self, current_working_dir, file_path):
         return (
@@ -68,7 +116,7 @@ class SNR:
         """
         Convert given file to required format with FFMPEG and process with WADA.
         """
-        LOGGER.info("Measuring SNR for file at ", file_path)
+        LOGGER.info("Measuring SNR for file at %s", file_path)
         command = self.get_command(self.current_working_dir, file_path)
 
         LOGGER.info("Command to be run %s", command)
@@ -82,15 +130,64 @@ class SNR:
 
         return float(process_output.split()[-3].decode("utf-8"))
 
+    def compute_files_snr(self, input_file_list):
+        """
+        Returns the SNR of every file, in order, using the configured engine.
+        The native engine scores the files in batches without any subprocess.
+        With more than one worker the files are spread over a process pool,
+        chunk_size files per task.
+        """
+        if self.workers > 1 and len(input_file_list) > self.chunk_size:
+            return self._compute_files_snr_in_pool(input_file_list)
+
+        if self.snr_engine != SNR.NATIVE_ENGINE:
+            return [self.compute_file_snr(file_path) for file_path in input_file_list]
+
+        snr_values = []
+        for start in range(0, len(input_file_list), SNR.NATIVE_BATCH_SIZE):
+            snr_values.extend(
+                self.wada_snr.compute_files_snr(
+                    input_file_list[start : start + SNR.NATIVE_BATCH_SIZE]
+                )
+            )
+        return snr_values
+
+    def _compute_files_snr_in_pool(self, input_file_list):
+        LOGGER.info(
+            "Scoring %s files with %s workers", len(input_file_list), self.workers
+        )
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            if self.snr_engine == SNR.NATIVE_ENGINE:
+                batches = [
+                    input_file_list[start : start + self.chunk_size]
+                    for start in range(0, len(input_file_list), self.chunk_size)
+                ]
+                # map keeps the order of the batches, so the values line up
+                # with input_file_list
+                return [
+                    snr_value
+                    for batch_snr_values in executor.map(
+                        self.wada_snr.compute_files_snr, batches
+                    )
+                    for snr_value in batch_snr_values
+                ]
+
+            return list(
+                executor.map(
+                    self.compute_file_snr, input_file_list, chunksize=self.chunk_size
+                )
+            )
+
     def process_files_list(self, input_file_list):
 
         LOGGER.info("Processing all the file in the directory %s", input_file_list)
 
         file_snrs = {}
 
-        for file_path in input_file_list:
+        snr_values = self.compute_files_snr(input_file_list)
 
-            snr_value = self.compute_file_snr(file_path)
+        for file_path, snr_value in zip(input_file_list, snr_values):
 
             if str(snr_value) == "nan":
                 snr_value = 0.0
@@ -109,7 +206,15 @@ class SNR:
         output_dir_path,
         audio_id,
         hash_code,
+        chunk_manifest=None,
     ):
+        """
+        Scores every clip, moves it to the clean or rejected folder and
+        records it in the metadata file. Clip durations are taken from the
+        chunk_manifest written by the chunker when it has the clip, sox is
+        only used for clips missing from it.
+        """
+        chunk_manifest = chunk_manifest or {}
         LOGGER.info("Processing SNR for for the files %s", input_file_list)
         processed_file_snr_dict = self.process_files_list(input_file_list)
 
@@ -121,25 +226,28 @@ class SNR:
             rejected_dir_path,
         )
 
-        metadata = pd.read_csv(metadata_file_name)
+        if self.feat_language_identification:
+            language_confidence_scores = infer_language_batch(
+                list(processed_file_snr_dict.keys())
+            )
+        else:
+            language_confidence_scores = [None] * len(processed_file_snr_dict)
 
         clean_audio_duration = []
         list_file_utterances_with_duration = []
 
-        for file_path, snr_value in processed_file_snr_dict.items():
+        for (file_path, snr_value), language_confidence_score in zip(
+            processed_file_snr_dict.items(), language_confidence_scores
+        ):
 
             audio_file_name = file_path.split("/")[-1]
             LOGGER.info(audio_file_name)
 
-            metadata["audio_id"] = audio_id
-            metadata["media_hash_code"] = hash_code
-
-            if self.feat_language_identification:
-                language_confidence_score = infer_language(file_path)
-            else:
-                language_confidence_score = None
             LOGGER.info("language_confidence_score:%s", str(language_confidence_score))
-            clip_duration = calculate_duration(file_path)
+            if audio_file_name in chunk_manifest:
+                clip_duration = chunk_manifest[audio_file_name]["duration"]
+            else:
+                clip_duration = calculate_duration(file_path)
             if snr_value < threshold:
                 self.move_file_locally(
                     file_path, f"{rejected_dir_path}/{audio_file_name}"
@@ -155,14 +263,6 @@ class SNR:
                         "language_confidence_score": language_confidence_score,
                     }
                 )
-                metadata["cleaned_duration"] = round(
-                    (sum(clean_audio_duration) / 60), 2
-                )
-                metadata["utterances_files_list"] = json.dumps(
-                    list_file_utterances_with_duration
-                )
-
-                metadata.to_csv(metadata_file_name, index=False)
                 continue
 
             if clip_duration > SNR.MAX_DURATION:
@@ -180,14 +280,6 @@ class SNR:
                         "language_confidence_score": language_confidence_score,
                     }
                 )
-                metadata["cleaned_duration"] = round(
-                    (sum(clean_audio_duration) / 60), 2
-                )
-                metadata["utterances_files_list"] = json.dumps(
-                    list_file_utterances_with_duration
-                )
-
-                metadata.to_csv(metadata_file_name, index=False)
                 continue
 
             clean_audio_duration.append(clip_duration)
@@ -202,8 +294,23 @@ class SNR:
                 }
             )
 
-            metadata["cleaned_duration"] = round((sum(clean_audio_duration) / 60), 2)
-            metadata["utterances_files_list"] = json.dumps(
-                list_file_utterances_with_duration
-            )
-            metadata.to_csv(metadata_file_name, index=False)
+        if not list_file_utterances_with_duration:
+            return
+
+        metadata = pd.read_csv(metadata_file_name)
+        metadata["audio_id"] = audio_id
+        metadata["media_hash_code"] = hash_code
+        metadata["cleaned_duration"] = round((sum(clean_audio_duration) / 60), 2)
+        metadata["utterances_files_list"] = json.dumps(
+            list_file_utterances_with_duration
+        )
+        self.write_metadata_file(metadata, metadata_file_name)
+
+    def write_metadata_file(self, metadata, metadata_file_name):
+        """
+        Writes the metadata to a temporary file and renames it over the
+        original, so a crash midway never leaves a partial csv to be uploaded.
+        """
+        temp_file_name = f"{metadata_file_name}.tmp"
+        metadata.to_csv(temp_file_name, index=False)
+        os.replace(temp_file_name, metadata_file_name)
@@ -6,6 +6,16 @@ from ekstep_data_pipelines.common.audio_commons.transcription_clients.transcript
 
 LOGGER = get_logger("AzureTranscriptionClient")
 
+# cancellations of network and service failures, the recognition may succeed
+# when made again
+TRANSIENT_CANCELLATION_ERRORS = (
+    speech.CancellationErrorCode.ConnectionFailure,
+    speech.CancellationErrorCode.ServiceTimeout,
+    speech.CancellationErrorCode.ServiceError,
+    speech.CancellationErrorCode.ServiceUnavailable,
+    speech.CancellationErrorCode.TooManyRequests,
+)
+
 
 class AzureTranscriptionClient(object):
     @staticmethod
@@ -53,5 +63,7 @@ class AzureTranscriptionClient(object):
         elif result.reason == speech.ResultReason.Canceled:
             cancellation_details = result.cancellation_details
             msg = "Speech Recognition canceled: {}".format(cancellation_details.reason)
+            if cancellation_details.error_code in TRANSIENT_CANCELLATION_ERRORS:
+                raise AzureTranscriptionClientError(RuntimeError(msg), retryable=True)
             raise RuntimeError(msg)
         LOGGER.info("done..")
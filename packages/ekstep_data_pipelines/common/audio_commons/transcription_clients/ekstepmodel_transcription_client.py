@@ -1,5 +1,7 @@
 import wave
 
+import grpc
+
 from ekstep_data_pipelines.common.audio_commons.transcription_clients.stub.speech_recognition_connection import \
     SpeechRecognizerConStub
 from ekstep_data_pipelines.common.audio_commons.transcription_clients.stub.speech_recognition_open_api_pb2 import \
@@ -7,10 +9,18 @@ from ekstep_data_pipelines.common.audio_commons.transcription_clients.stub.speec
     SpeechRecognitionRequest
 from ekstep_data_pipelines.common.audio_commons.transcription_clients.stub.speech_recognition_open_api_pb2_grpc import \
     SpeechRecognizerStub
+from ekstep_data_pipelines.common.audio_commons.transcription_clients.transcription_client_errors import \
+    EkstepTranscriptionClientError
 from ekstep_data_pipelines.common.utils import get_logger
 
 LOGGER = get_logger("EkstepTranscriptionClient")
 
+# statuses of network and server failures, the call may succeed when made again
+TRANSIENT_STATUS_CODES = (
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+)
+
 
 class EkstepTranscriptionClient(object):
     @staticmethod
@@ -39,7 +49,7 @@ class EkstepTranscriptionClient(object):
             result = self.speech_to_text(source_file_path)
         except RuntimeError as error:
             print(str(error))
-            raise EkstepTranscriptionClient()
+            raise EkstepTranscriptionClientError(error)
         return result.transcript
 
     def speech_to_text(self, audio_file_path):
@@ -51,6 +61,9 @@ class EkstepTranscriptionClient(object):
         try:
             result = self.client.recognize(request)
             return result
+        except grpc.RpcError as e:
+            retryable = isinstance(e, grpc.Call) and e.code() in TRANSIENT_STATUS_CODES
+            raise EkstepTranscriptionClientError(e, retryable=retryable)
         except Exception as e:
             raise RuntimeError(e)
 
@@ -1,5 +1,7 @@
 import os
+import threading
 
+from google.api_core.exceptions import DeadlineExceeded, ServiceUnavailable
 from google.cloud import speech_v1
 from google.cloud.speech_v1 import enums
 from ekstep_data_pipelines.common.audio_commons.transcription_clients.transcription_client_errors import (
@@ -24,6 +26,7 @@ class GoogleTranscriptionClient(object):
         self.channels = config_dict.get("audio_channel_count", 1)
         self.bucket = config_dict.get("bucket")
         self._client = None
+        self._client_lock = threading.Lock()
 
     def make_directories(self, path):
         if not os.path.exists(path):
@@ -44,8 +47,11 @@ class GoogleTranscriptionClient(object):
 
     @property
     def client(self):
-        if not self._client:
-            self._client = speech_v1.SpeechClient()
+        # the transcription engine calls the client from several threads,
+        # they must all share one SpeechClient
+        with self._client_lock:
+            if not self._client:
+                self._client = speech_v1.SpeechClient()
 
         return self._client
 
@@ -56,6 +62,8 @@ class GoogleTranscriptionClient(object):
             transcriptions = list(
                 map(lambda c: c.alternatives[0].transcript, content.results)
             )
+        except (ServiceUnavailable, DeadlineExceeded) as error:
+            raise GoogleTranscriptionClientError(error, retryable=True)
         except RuntimeError as error:
             raise GoogleTranscriptionClientError(error)
 
@@ -1,24 +1,33 @@
 class GoogleTranscriptionClientError(Exception):
     """Exception raised for errors in the input.
     Attributes:
+        retryable: whether the call may succeed when made again, True only
+        for transient network and service failures
     """
 
-    def __init__(self, root_error):
+    def __init__(self, root_error, retryable=False):
         self.root_error = root_error
+        self.retryable = retryable
 
 
 class AzureTranscriptionClientError(Exception):
     """Exception raised for errors in the input.
     Attributes:
+        retryable: whether the call may succeed when made again, True only
+        for transient network and service failures
     """
 
-    def __init__(self, root_error):
+    def __init__(self, root_error, retryable=False):
         self.root_error = root_error
+        self.retryable = retryable
 
 class EkstepTranscriptionClientError(Exception):
     """Exception raised for errors in the input.
     Attributes:
+        retryable: whether the call may succeed when made again, True only
+        for transient network and service failures
     """
 
-    def __init__(self, root_error):
+    def __init__(self, root_error, retryable=False):
         self.root_error = root_error
+        self.retryable = retryable
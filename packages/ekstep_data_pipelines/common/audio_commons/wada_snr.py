@@ -0,0 +1,138 @@
+import numpy as np
+from ekstep_data_pipelines.common.utils import get_logger
+
+LOGGER = get_logger("WadaSNR")
+
+
+class WadaSNR:
+    """
+    NumPy port of the WADA-SNR estimator shipped in lib/wada_snr.tar.gz.
+
+    Mirrors the WADASNR binary run with `-ifmt mswav`: the first 44 bytes
+    of the file are skipped, samples are processed in blocks of
+    BLOCK_SIZE, blocks shorter than MIN_BLOCK_SIZE are ignored and the
+    per block signal/noise energies are accumulated into one SNR value.
+    """
+
+    BLOCK_SIZE = 100000
+    MIN_BLOCK_SIZE = 8000
+    WAV_HEADER_SIZE = 44
+    ERROR_SNR = -1.0
+
+    @staticmethod
+    def get_instance(table_file_path):
+        return WadaSNR(table_file_path)
+
+    def __init__(self, table_file_path):
+        self.snr_levels, self.alphas = self.read_table(table_file_path)
+
+    def read_table(self, table_file_path):
+        """
+        Reads lines of the form `-20 dB : 0.409747739` and returns the snr
+        levels and their alpha values as arrays.
+        """
+        snr_levels = []
+        alphas = []
+
+        with open(table_file_path, "r") as table_file:
+            for line in table_file:
+                values = line.split()
+                if len(values) < 4:
+                    continue
+                snr_levels.append(float(values[0]))
+                alphas.append(float(values[3]))
+
+        return np.array(snr_levels), np.array(alphas)
+
+    def read_pcm(self, file_path):
+        return np.fromfile(file_path, dtype="<i2", offset=self.WAV_HEADER_SIZE)
+
+    def compute_file_snr(self, file_path):
+        return self.compute_files_snr([file_path])[0]
+
+    def compute_files_snr(self, file_paths):
+        pcm_batch = []
+
+        for file_path in file_paths:
+            try:
+                pcm_batch.append(self.read_pcm(file_path))
+            except (OSError, ValueError) as error:
+                LOGGER.error("Could not read %s: %s", file_path, str(error))
+                pcm_batch.append(None)
+
+        return self.compute_batch_snr(pcm_batch)
+
+    def compute_batch_snr(self, pcm_batch):
+        """
+        Takes a list of 16 bit PCM arrays and returns their SNRs in dB.
+        An array the binary can not process gets ERROR_SNR, an array without
+        any block long enough to be measured gets nan.
+        """
+        snrs = np.full(len(pcm_batch), self.ERROR_SNR)
+        blocks = []
+        block_owners = []
+
+        for index, pcm in enumerate(pcm_batch):
+            # the binary always reads one block past the data and aborts when
+            # that block is empty, i.e. when the length is a multiple of BLOCK_SIZE
+            if pcm is None or len(pcm) % self.BLOCK_SIZE == 0:
+                continue
+
+            snrs[index] = np.nan
+
+            for start in range(0, len(pcm), self.BLOCK_SIZE):
+                block = pcm[start : start + self.BLOCK_SIZE]
+                if len(block) >= self.MIN_BLOCK_SIZE:
+                    blocks.append(block)
+                    block_owners.append(index)
+
+        if not blocks:
+            return list(snrs)
+
+        block_lengths = np.array([len(block) for block in blocks])
+        block_starts = np.concatenate(([0], np.cumsum(block_lengths)[:-1]))
+        block_owners = np.array(block_owners)
+
+        samples = np.concatenate(blocks).astype(np.float64)
+        block_means = np.add.reduceat(samples, block_starts) / block_lengths
+        samples -= np.repeat(block_means, block_lengths)
+
+        magnitudes = np.maximum(np.abs(samples), 1e-10)
+        mean_magnitudes = np.add.reduceat(magnitudes, block_starts) / block_lengths
+        mean_log_magnitudes = (
+            np.add.reduceat(np.log(magnitudes), block_starts) / block_lengths
+        )
+        energies = np.add.reduceat(samples * samples, block_starts)
+
+        block_snrs = self.search_table(np.log(mean_magnitudes) - mean_log_magnitudes)
+        factors = np.power(10.0, block_snrs / 10)
+        signal_energies = energies * factors / (1 + factors)
+        noise_energies = energies / (1 + factors)
+
+        total_signal = np.bincount(
+            block_owners, weights=signal_energies, minlength=len(pcm_batch)
+        )
+        total_noise = np.bincount(
+            block_owners, weights=noise_energies, minlength=len(pcm_batch)
+        )
+
+        measured = np.unique(block_owners)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            snrs[measured] = 10 * np.log10(
+                total_signal[measured] / total_noise[measured]
+            )
+
+        # the binary reports the value with 6 decimals
+        return [round(float(snr), 6) for snr in snrs]
+
+    def search_table(self, values):
+        """
+        For each value returns the snr level of the first table row whose
+        alpha is greater than the value, or the last level if there is none.
+        The alphas are not monotonic, so this can not be a binary search.
+        """
+        is_less = values[:, np.newaxis] < self.alphas[np.newaxis, :]
+        row_indices = np.where(
+            is_less.any(axis=1), is_less.argmax(axis=1), len(self.alphas) - 1
+        )
+        return self.snr_levels[row_indices]
@@ -61,7 +61,24 @@ class CatalogueDao:
         self.postgres_client.execute_update(update_query, **parm_dict)
         return True
 
+    def index_utterances_by_name(self, utterances):
+        """
+        Returns a dict of the utterances keyed by name, keeping the first
+        utterance of a name like find_utterance_by_name does on a list.
+        """
+        utterances_by_name = {}
+        for utterance in utterances:
+            utterances_by_name.setdefault(utterance["name"], utterance)
+        return utterances_by_name
+
     def find_utterance_by_name(self, utterances, name):
+        """
+        Takes a list of utterances, or an index built by
+        index_utterances_by_name to avoid a scan of the list per lookup.
+        """
+        if isinstance(utterances, dict):
+            return utterances.get(name)
+
         filtered_utterances = list(filter(lambda d: d["name"] == name, utterances))
         if len(filtered_utterances) > 0:
             return filtered_utterances[0]
@@ -90,6 +107,38 @@ class CatalogueDao:
         self.postgres_client.execute_update(update_query, **param_dict)
         return True
 
+    def update_utterance_statuses(self, audio_id, utterances):
+        """
+        Same update as update_utterance_status for many utterances of an
+        audio_id, in one statement joining a VALUES list of the utterances.
+        """
+        update_query = (
+            "update media_speaker_mapping as m set status = v.status, "
+            "fail_reason = v.reason,is_transcribed = (case when m.is_transcribed = TRUE then true else v.is_transcribed end),"
+            "stt_api_used =(select array_agg(distinct e) from unnest(m.stt_api_used || ARRAY[v.stt_api_used]) e) "
+            "from (values %s) as v(audio_id, name, status, reason, is_transcribed, stt_api_used) "
+            "where m.audio_id = v.audio_id and m.clipped_utterance_file_name = v.name"
+        )
+        template = "(%s::bigint, %s::text, %s::text, %s::text, %s::boolean, %s::text)"
+        # only the last update of an utterance is kept, as the statement
+        # can update a row only once
+        rows = {}
+        for utterance in utterances:
+            reason = utterance["reason"]
+            rows[utterance["name"]] = (
+                audio_id,
+                utterance["name"],
+                utterance["status"],
+                None if reason is None else str(reason),
+                utterance["is_transcribed"],
+                utterance["stt_api"],
+            )
+        if rows:
+            self.postgres_client.execute_values(
+                update_query, list(rows.values()), template
+            )
+        return True
+
     def update_audio_ids_with_data_type(self, source, language, audio_ids, data_set):
         if len(audio_ids) <= 0:
             return True
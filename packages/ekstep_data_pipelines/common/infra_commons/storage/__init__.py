@@ -1,4 +1,19 @@
+import base64
+import hashlib
 from abc import ABC, abstractmethod
+from collections import namedtuple
+
+# a file of a storage, with its size in bytes and the base64 encoded md5
+# digest of its content, in the format Google Cloud Storage reports it
+RemoteFile = namedtuple("RemoteFile", ["path", "size", "md5_hash"])
+
+
+def md5_checksum(file_path, chunk_size=1024 * 1024):
+    md5_hash = hashlib.md5()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            md5_hash.update(chunk)
+    return base64.b64encode(md5_hash.digest()).decode("utf-8")
 
 
 class BaseStorageInterface(ABC):
@@ -38,6 +53,11 @@ class BaseStorageInterface(ABC):
     def path_exists(self, path: str) -> bool:
         pass
 
+    @abstractmethod
+    def list_files_with_checksums(self, source_path: str):
+        """Returns a RemoteFile for every file under source_path."""
+        pass
+
 
 def get_storage_clients(initlization_dict):
     # cyclic. Possible fix - Can move the interface to someother file
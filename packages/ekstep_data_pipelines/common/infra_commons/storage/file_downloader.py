@@ -0,0 +1,104 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from tqdm import tqdm
+from ekstep_data_pipelines.common.infra_commons.storage import md5_checksum
+from ekstep_data_pipelines.common.utils import get_logger
+
+Logger = get_logger("FileDownloader")
+
+DEFAULT_MAX_WORKERS = 8
+
+PARTIAL_FILE_SUFFIX = ".part"
+
+
+class FileDownloader:
+    """
+    Downloads RemoteFiles of a storage into a local directory with a bounded
+    pool of threads. A local file with the size and md5 of the remote file
+    is kept instead of being downloaded again, so an interrupted run picks
+    up where it stopped. Files are written under a .part name and renamed
+    once complete, so a file cut short is never taken for a finished one.
+    """
+
+    @staticmethod
+    def get_instance(fs_interface, max_workers=DEFAULT_MAX_WORKERS):
+        return FileDownloader(fs_interface, max_workers)
+
+    def __init__(self, fs_interface, max_workers=DEFAULT_MAX_WORKERS):
+        self.fs_interface = fs_interface
+        self.max_workers = max_workers
+        self.downloaded = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes_downloaded = 0
+        self._lock = threading.Lock()
+
+    def is_up_to_date(self, remote_file, local_path):
+        if not os.path.isfile(local_path):
+            return False
+        if os.path.getsize(local_path) != remote_file.size:
+            return False
+        # without a remote checksum, as for composite objects, a matching
+        # size alone is not trusted
+        return (
+            remote_file.md5_hash is not None
+            and md5_checksum(local_path) == remote_file.md5_hash
+        )
+
+    def download_file(self, remote_file, local_path):
+        if self.is_up_to_date(remote_file, local_path):
+            with self._lock:
+                self.skipped += 1
+            return
+
+        partial_path = local_path + PARTIAL_FILE_SUFFIX
+        try:
+            self.fs_interface.download_file_to_location(remote_file.path, partial_path)
+            os.replace(partial_path, local_path)
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+
+        with self._lock:
+            self.downloaded += 1
+            self.bytes_downloaded += remote_file.size or 0
+
+    def download(self, remote_files, local_dir):
+        """
+        Downloads the remote files into local_dir, named by their basename,
+        and returns those names in the order of remote_files. Every file is
+        attempted; if any download fails, the first error is raised once
+        the others are done.
+        """
+        local_names = [
+            os.path.basename(remote_file.path) for remote_file in remote_files
+        ]
+        errors = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(
+                    self.download_file, remote_file, os.path.join(local_dir, name)
+                )
+                for remote_file, name in zip(remote_files, local_names)
+            ]
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                if future.exception() is not None:
+                    errors.append(future.exception())
+
+        Logger.info(
+            "Downloaded %s files (%s bytes), %s already present, %s failed",
+            self.downloaded,
+            self.bytes_downloaded,
+            self.skipped,
+            self.failed,
+        )
+        if errors:
+            raise errors[0]
+
+        return local_names
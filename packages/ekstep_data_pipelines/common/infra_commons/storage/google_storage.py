@@ -4,7 +4,10 @@ from os.path import isfile, join
 
 from google.cloud import storage
 from tqdm import tqdm
-from ekstep_data_pipelines.common.infra_commons.storage import BaseStorageInterface
+from ekstep_data_pipelines.common.infra_commons.storage import (
+    BaseStorageInterface,
+    RemoteFile,
+)
 from ekstep_data_pipelines.common.infra_commons.storage.exceptions import (
     FileNotFoundException,
 )
@@ -207,3 +210,10 @@ class GoogleStorage(BaseStorageInterface):
         file_prefix = self.get_path_without_bucket(full_path)
         blobs = self.client.list_blobs(bucket, prefix=file_prefix, delimiter=delimiter)
         return blobs
+
+    def list_files_with_checksums(self, source_path: str):
+        bucket_name = self.get_bucket_from_path(source_path)
+        return [
+            RemoteFile(f"{bucket_name}/{blob.name}", blob.size, blob.md5_hash)
+            for blob in self.list_blobs_in_a_path(source_path)
+        ]
@@ -1,7 +1,11 @@
 import os
 from shutil import copyfile
 
-from ekstep_data_pipelines.common.infra_commons.storage import BaseStorageInterface
+from ekstep_data_pipelines.common.infra_commons.storage import (
+    BaseStorageInterface,
+    RemoteFile,
+    md5_checksum,
+)
 from ekstep_data_pipelines.common.infra_commons.storage.exceptions import (
     FileNotFoundException,
 )
@@ -68,3 +72,15 @@ class LocalStorage(BaseStorageInterface):
 
     def path_exists(self, path: str) -> bool:
         return os.path.exists(path)
+
+    def list_files_with_checksums(self, source_path: str):
+        remote_files = []
+        for directory, _, file_names in sorted(os.walk(source_path)):
+            for file_name in sorted(file_names):
+                file_path = os.path.join(directory, file_name)
+                remote_files.append(
+                    RemoteFile(
+                        file_path, os.path.getsize(file_path), md5_checksum(file_path)
+                    )
+                )
+        return remote_files
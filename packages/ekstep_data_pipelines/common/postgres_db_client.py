@@ -1,6 +1,7 @@
 import numpy as np
 from psycopg2._json import Json
 from psycopg2.extensions import register_adapter, AsIs
+from psycopg2.extras import execute_values
 from sqlalchemy import create_engine, text
 
 
@@ -39,6 +40,7 @@ class PostgresClient:
     2. execute select
     3. execute update
     4. execute batch updates
+    5. execute statements over a VALUES list
     """
 
     GET_UNIQUE_ID = "SELECT nextval('audio_id_seq');"
@@ -110,6 +112,19 @@ class PostgresClient:
         cur.close()
         return updated_rows
 
+    def execute_values(self, query, data_list, template=None, page_size=1000):
+        """
+        Runs a query holding a single %s, replaced by a VALUES list of the
+        rows in data_list, page_size rows per statement.
+        """
+        conn = self.db.raw_connection()
+        cur = conn.cursor()
+        execute_values(cur, query, data_list, template=template, page_size=page_size)
+        updated_rows = cur.rowcount
+        conn.commit()
+        cur.close()
+        return updated_rows
+
     def get_unique_id(self):
         return self.connection.execute(self.GET_UNIQUE_ID).fetchall()[0][0]
 
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from ekstep_data_pipelines.audio_analysis.audio_embeddings.gender_inference import (
+    get_prediction_for_embed,
+    get_prediction_from_npz_file,
+    load_model,
+)
+
+MODEL_PATH = "ekstep_data_pipelines/audio_analysis/models/clf_svc.sav"
+
+
+class GenderInferenceTests(unittest.TestCase):
+    def setUp(self):
+        self.model = load_model(MODEL_PATH)
+        random_state = np.random.RandomState(0)
+        embeds = np.abs(random_state.normal(size=(50, 256))).astype(np.float32)
+        self.embeds = embeds / np.linalg.norm(embeds, axis=1, keepdims=True)
+        self.file_paths = np.array(["src/{}.wav".format(index) for index in range(50)])
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.npz_file_path = os.path.join(self.tmp_dir.name, "embed_file.npz")
+        np.savez(self.npz_file_path, embeds=self.embeds, file_paths=self.file_paths)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_block_prediction_should_match_prediction_per_embedding(self):
+        expected = {
+            file_path: (
+                "m"
+                if get_prediction_for_embed(self.model, embed.reshape(1, -1)) == 0
+                else "f"
+            )
+            for file_path, embed in zip(self.file_paths, self.embeds)
+        }
+
+        for block_size, workers in ((16, 1), (16, 2), (4096, 1)):
+            file_vs_gender_dict = get_prediction_from_npz_file(
+                self.model, self.npz_file_path, block_size=block_size, workers=workers
+            )
+            self.assertEqual(file_vs_gender_dict, expected)
+        self.assertEqual(set(expected.values()) - {"m", "f"}, set())
+
+    def test_should_only_take_block_size_and_workers_as_keywords(self):
+        with self.assertRaises(TypeError):
+            get_prediction_from_npz_file(self.model, self.npz_file_path, "./")
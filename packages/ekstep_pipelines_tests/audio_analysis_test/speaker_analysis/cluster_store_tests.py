@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+
+from ekstep_data_pipelines.audio_analysis.speaker_analysis.cluster_store import (
+    ClusterStore,
+)
+
+
+class ClusterStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.embeddings = np.random.RandomState(0).rand(10, 4).astype(np.float32)
+        self.cluster_store = ClusterStore(self.embeddings)
+        self.cluster_store.add_clusters(
+            [np.array([4, 1]), np.array([7]), np.array([0, 9, 3]), np.array([2])]
+        )
+
+    def assert_clusters(self, expected_clusters):
+        self.assertEqual(
+            [cluster.tolist() for cluster in self.cluster_store.cluster_indices()],
+            expected_clusters,
+        )
+        for label, cluster in enumerate(expected_clusters):
+            np.testing.assert_allclose(
+                self.cluster_store.sums[label],
+                self.embeddings[cluster].sum(axis=0),
+                rtol=1e-6,
+            )
+        self.assertEqual(
+            self.cluster_store.counts.tolist(),
+            [len(cluster) for cluster in expected_clusters],
+        )
+
+    def test_should_list_rows_of_each_cluster_in_order_added(self):
+        self.assert_clusters([[4, 1], [7], [0, 9, 3], [2]])
+        self.assertEqual(
+            [cluster.tolist() for cluster in self.cluster_store.cluster_indices([2])],
+            [[0, 9, 3]],
+        )
+
+    def test_store_without_clusters_should_list_no_cluster(self):
+        self.assertEqual(ClusterStore(self.embeddings).cluster_indices(), [])
+
+    def test_should_append_merged_clusters_after_their_key(self):
+        self.cluster_store.merge_clusters({1: np.array([3, 0])})
+
+        self.assert_clusters([[7, 2, 4, 1], [0, 9, 3]])
+        mean = self.embeddings[[7, 2, 4, 1]].mean(axis=0)
+        np.testing.assert_allclose(
+            self.cluster_store.mean_embeddings[0],
+            mean / np.linalg.norm(mean),
+            rtol=1e-6,
+        )
+
+    def test_should_remove_clusters_and_add_new_ones_at_the_end(self):
+        self.cluster_store.remove_clusters([0, 2])
+        self.cluster_store.add_clusters([np.array([9, 4]), np.array([0])])
+
+        self.assert_clusters([[7], [2], [9, 4], [0]])
+        self.assertEqual(self.cluster_store.labels[[1, 3]].tolist(), [-1, -1])
+
+    def test_should_append_rows_to_clusters_as_noise(self):
+        self.cluster_store.add_to_clusters(np.array([8, 5, 6]), np.array([3, 0, 3]))
+
+        self.assert_clusters([[4, 1, 5], [7], [0, 9, 3], [2, 8, 6]])
+        self.assertEqual(
+            np.flatnonzero(self.cluster_store.was_noise).tolist(), [5, 6, 8]
+        )
@@ -0,0 +1,99 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from ekstep_data_pipelines.audio_analysis.speaker_analysis.cluster_store import (
+    ClusterStore,
+)
+from sklearn.metrics.pairwise import cosine_distances
+
+from ekstep_data_pipelines.audio_analysis.speaker_analysis.merging import (
+    Merge,
+    union_find_roots,
+)
+
+
+class MergingTests(unittest.TestCase):
+    def test_union_find_should_return_smallest_node_of_each_component(self):
+        roots = union_find_roots(7, np.array([5, 6, 2, 1]), np.array([6, 2, 4, 3]))
+
+        self.assertEqual(roots.tolist(), [0, 1, 2, 1, 2, 2, 2])
+
+    def test_should_merge_clusters_of_same_speaker_only(self):
+        directions = np.eye(4, 256, dtype=np.float32)
+        embeddings = np.repeat(directions, 3, axis=0)
+        # speakers 0 and 2 are split over two clusters each
+        all_cluster_indices = [
+            np.array([0, 1]),
+            np.array([3, 4, 5]),
+            np.array([6, 7]),
+            np.array([2]),
+            np.array([9, 10, 11]),
+            np.array([8]),
+        ]
+        cluster_store = ClusterStore(embeddings)
+        cluster_store.add_clusters(all_cluster_indices)
+
+        Merge(cluster_store).run_repetitive_merging(
+            start_similarity_allowed=0.96,
+            end_similarity_allowed=0.94,
+            merge_closest_only=True,
+        )
+
+        self.assertEqual(
+            [cluster.tolist() for cluster in cluster_store.cluster_indices()],
+            [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9, 10, 11]],
+        )
+        np.testing.assert_allclose(cluster_store.mean_embeddings, directions)
+
+    def test_should_fit_noise_points_into_closest_cluster_only_if_similar(self):
+        embeddings = np.array(
+            [[1, 0, 0], [1, 0.1, 0], [0, 1, 0], [0.9, 0.2, 0], [0, 0, 1]],
+            dtype=np.float32,
+        )
+        cluster_store = ClusterStore(embeddings)
+        cluster_store.add_clusters([np.array([0, 1]), np.array([2])])
+
+        unallocated_noise_indices = Merge(cluster_store).fit_noise_points(
+            np.array([4, 3]), max_sim_allowed=0.8
+        )
+
+        self.assertEqual(unallocated_noise_indices.tolist(), [4])
+        self.assertEqual(
+            [cluster.tolist() for cluster in cluster_store.cluster_indices()],
+            [[0, 1, 3], [2]],
+        )
+        self.assertEqual(cluster_store.was_noise.tolist(), [0, 0, 0, 1, 0])
+
+    @mock.patch.object(Merge, "DISTANCE_BLOCK_ELEMENTS", 30)
+    def test_closest_clusters_in_blocks_should_match_full_distance_matrix(self):
+        random_state = np.random.RandomState(0)
+        embeddings = random_state.rand(100, 8).astype(np.float32)
+        cluster_store = ClusterStore(embeddings)
+        cluster_store.add_clusters(np.array_split(np.arange(40), 7))
+        noise_indices = np.arange(99, 39, -1)
+
+        closest_cluster_index, closest_cluster_dist = Merge(
+            cluster_store
+        ).closest_clusters(noise_indices)
+
+        distances = cosine_distances(
+            embeddings[noise_indices], cluster_store.mean_embeddings
+        )
+        np.testing.assert_array_equal(
+            closest_cluster_index, np.argmin(distances, axis=1)
+        )
+        np.testing.assert_allclose(
+            closest_cluster_dist, np.min(distances, axis=1), atol=1e-6
+        )
+
+    def test_closest_clusters_of_an_empty_store_should_be_no_cluster(self):
+        cluster_store = ClusterStore(np.eye(3, dtype=np.float32))
+
+        closest_cluster_index, closest_cluster_dist = Merge(
+            cluster_store
+        ).closest_clusters(np.arange(3))
+
+        self.assertEqual(closest_cluster_index.tolist(), [ClusterStore.NO_CLUSTER] * 3)
+        self.assertTrue(np.all(np.isinf(closest_cluster_dist)))
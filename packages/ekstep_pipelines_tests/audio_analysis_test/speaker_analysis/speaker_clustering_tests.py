@@ -0,0 +1,298 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from ekstep_data_pipelines.audio_analysis.analyse_speaker import analyse_speakers
+from ekstep_data_pipelines.audio_analysis.speaker_analysis.clustering import Clustering
+from ekstep_data_pipelines.audio_analysis.speaker_analysis.speaker_clustering import (
+    create_speaker_clusters,
+    update_speaker_clusters,
+)
+from ekstep_data_pipelines.audio_analysis.speaker_analysis.speaker_state import (
+    STATE_FILE_EXTENSION,
+    SpeakerState,
+)
+
+
+def make_speaker_embeddings(num_points, num_speakers, seed=0):
+    random_state = np.random.RandomState(seed)
+    centroids = np.abs(random_state.normal(size=(num_speakers, 256)))
+    centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+    speakers = random_state.randint(0, num_speakers, num_points)
+    embeddings = np.abs(
+        centroids[speakers] + random_state.normal(scale=0.04, size=(num_points, 256))
+    )
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings.astype(np.float32), speakers
+
+
+class SpeakerClusteringTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.embed_file_path = os.path.join(self.tmp_dir.name, "embed_map.npz")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def save_embeddings(self, embeddings):
+        file_paths = np.array(
+            ["source/{}_file.wav".format(index) for index in range(len(embeddings))]
+        )
+        np.savez(self.embed_file_path, embeds=embeddings, file_paths=file_paths)
+        return file_paths
+
+    def test_should_map_every_file_to_one_cluster_or_noise(self):
+        embeddings, speakers = make_speaker_embeddings(600, 6)
+        # exact duplicates of other rows must still map to their own file
+        embeddings[500:] = embeddings[:100]
+        file_paths = self.save_embeddings(embeddings)
+
+        file_map_dict, noise_file_map_dict = create_speaker_clusters(
+            self.embed_file_path, "src", partial_set_size=300
+        )
+
+        clustered_files = [
+            file for cluster in file_map_dict.values() for file, _ in cluster
+        ]
+        noise_files = [file for files in noise_file_map_dict.values() for file in files]
+        self.assertEqual(
+            sorted(clustered_files + noise_files), sorted(file_paths.tolist())
+        )
+
+        file_index = {file: index for index, file in enumerate(file_paths)}
+        for cluster in file_map_dict.values():
+            cluster_speakers = {speakers[file_index[file] % 500] for file, _ in cluster}
+            self.assertEqual(len(cluster_speakers), 1)
+
+    def test_euclidean_mode_should_match_cosine_mode(self):
+        embeddings, _ = make_speaker_embeddings(600, 6)
+        self.save_embeddings(embeddings)
+
+        cosine_clusters = create_speaker_clusters(
+            self.embed_file_path, "src", partial_set_size=300, cluster_metric="cosine"
+        )
+        euclidean_clusters = create_speaker_clusters(
+            self.embed_file_path,
+            "src",
+            partial_set_size=300,
+            cluster_metric="euclidean",
+        )
+
+        self.assertEqual(cosine_clusters, euclidean_clusters)
+
+    def test_pool_of_workers_should_match_sequential_clustering(self):
+        embeddings, _ = make_speaker_embeddings(900, 6)
+
+        sequential = Clustering().run_partial_set_clusterings(
+            embeddings, min_cluster_size=4, partial_set_size=200, min_samples=1
+        )
+        in_pool = Clustering(workers=3).run_partial_set_clusterings(
+            embeddings, min_cluster_size=4, partial_set_size=200, min_samples=1
+        )
+
+        np.testing.assert_array_equal(sequential[0], in_pool[0])
+        np.testing.assert_array_equal(sequential[1], in_pool[1])
+        self.assertEqual(len(sequential[2]), len(in_pool[2]))
+        for sequential_cluster, pool_cluster in zip(sequential[2], in_pool[2]):
+            np.testing.assert_array_equal(sequential_cluster, pool_cluster)
+
+    def test_pool_of_workers_should_map_the_file_of_memory_mapped_embeddings(self):
+        embeddings, _ = make_speaker_embeddings(900, 6)
+        embeddings_file_path = os.path.join(self.tmp_dir.name, "embeddings.npy")
+        np.save(embeddings_file_path, embeddings)
+        sequential = Clustering().run_partial_set_clusterings(
+            embeddings, min_cluster_size=4, partial_set_size=200, min_samples=1
+        )
+
+        with mock.patch(
+            "ekstep_data_pipelines.audio_analysis.speaker_analysis.clustering.np.save",
+            wraps=np.save,
+        ) as save:
+            in_pool = Clustering(workers=3).run_partial_set_clusterings(
+                np.load(embeddings_file_path, mmap_mode="r"),
+                min_cluster_size=4,
+                partial_set_size=200,
+                min_samples=1,
+            )
+            save.assert_not_called()
+
+            Clustering(workers=3).run_partial_set_clusterings(
+                np.load(embeddings_file_path, mmap_mode="r")[:500],
+                min_cluster_size=4,
+                partial_set_size=200,
+                min_samples=1,
+            )
+            save.assert_called_once()
+
+        np.testing.assert_array_equal(sequential[0], in_pool[0])
+        np.testing.assert_array_equal(sequential[1], in_pool[1])
+        self.assertEqual(len(sequential[2]), len(in_pool[2]))
+        for sequential_cluster, pool_cluster in zip(sequential[2], in_pool[2]):
+            np.testing.assert_array_equal(sequential_cluster, pool_cluster)
+
+    def test_should_assign_new_embeddings_to_known_and_new_speakers(self):
+        embeddings, speakers = make_speaker_embeddings(700, 7)
+        is_known = speakers < 6
+        known_files = self.save_embeddings(embeddings[is_known][:400])
+        speaker_state = SpeakerState()
+        file_map_dict, _ = create_speaker_clusters(
+            self.embed_file_path,
+            "src",
+            partial_set_size=300,
+            speaker_state=speaker_state,
+        )
+        state_file_path = os.path.join(self.tmp_dir.name, "state.npz")
+        speaker_state.save(state_file_path)
+        speaker_state = SpeakerState.load(state_file_path)
+        self.assertEqual(speaker_state.speaker_names, list(file_map_dict))
+        self.assertEqual(speaker_state.counts.sum(), len(known_files))
+
+        # a later batch with more utterances of the known speakers and a
+        # speaker never seen before
+        new_embeddings = np.concatenate(
+            [embeddings[is_known][400:], embeddings[~is_known]]
+        )
+        new_files = np.array(
+            [
+                "source/new_{}_file.wav".format(index)
+                for index in range(len(new_embeddings))
+            ]
+        )
+        np.savez(self.embed_file_path, embeds=new_embeddings, file_paths=new_files)
+        known_file_map_dict = {
+            speaker: {file for file, _ in files}
+            for speaker, files in file_map_dict.items()
+        }
+
+        new_file_map_dict, _ = update_speaker_clusters(
+            self.embed_file_path, "src", speaker_state, partial_set_size=300
+        )
+
+        num_known_new = np.count_nonzero(is_known) - 400
+        new_speakers = set(new_file_map_dict) - set(file_map_dict)
+        self.assertEqual(new_speakers, {"src_sp_{}".format(len(file_map_dict))})
+        self.assertEqual(
+            {file for file, _ in new_file_map_dict[new_speakers.pop()]},
+            set(new_files[num_known_new:]),
+        )
+        for speaker in set(new_file_map_dict) & set(file_map_dict):
+            files = {file for file, _ in new_file_map_dict[speaker]}
+            self.assertTrue(files <= set(new_files[:num_known_new]))
+            self.assertTrue(files.isdisjoint(known_file_map_dict[speaker]))
+        self.assertEqual(speaker_state.num_speakers, len(file_map_dict) + 1)
+        self.assertEqual(speaker_state.counts.sum(), 700)
+
+    def test_first_incremental_run_without_clusters_should_keep_everything_in_noise(
+        self,
+    ):
+        # a few scattered utterances, too far apart to form any cluster
+        random_state = np.random.RandomState(0)
+        scattered = np.abs(random_state.normal(size=(12, 256))).astype(np.float32)
+        scattered /= np.linalg.norm(scattered, axis=1, keepdims=True)
+        first_files = self.save_embeddings(scattered)
+        speaker_state = SpeakerState()
+
+        speaker_to_file_name = analyse_speakers(
+            self.embed_file_path, "src", 4, 300, 1, 0.80, speaker_state=speaker_state
+        )
+
+        self.assertEqual(speaker_to_file_name, {})
+        self.assertEqual(speaker_state.num_speakers, 0)
+        self.assertEqual(speaker_state.noise_file_paths, first_files.tolist())
+        state_file_path = os.path.join(self.tmp_dir.name, "src" + STATE_FILE_EXTENSION)
+        speaker_state.save(state_file_path)
+        speaker_state = SpeakerState.load(state_file_path)
+
+        embeddings, _ = make_speaker_embeddings(300, 3)
+        second_files = self.save_embeddings(embeddings)
+        file_map_dict, noise_file_map_dict = update_speaker_clusters(
+            self.embed_file_path, "src", speaker_state, partial_set_size=300
+        )
+
+        self.assertGreater(len(file_map_dict), 0)
+        clustered_files = [
+            file for files in file_map_dict.values() for file, _ in files
+        ]
+        noise_files = [file for files in noise_file_map_dict.values() for file in files]
+        self.assertEqual(
+            sorted(clustered_files + noise_files),
+            sorted(second_files.tolist() + first_files.tolist()),
+        )
+
+    def test_should_cluster_everything_when_the_state_has_no_speakers(self):
+        embeddings, _ = make_speaker_embeddings(400, 4)
+        # a previous run left all its utterances in noise
+        noise_file_paths = ["source/old_{}_file.wav".format(i) for i in range(100)]
+        speaker_state = SpeakerState(
+            noise_embeddings=embeddings[:100], noise_file_paths=noise_file_paths
+        )
+        state_file_path = os.path.join(self.tmp_dir.name, "src" + STATE_FILE_EXTENSION)
+        speaker_state.save(state_file_path)
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["src" + STATE_FILE_EXTENSION])
+        speaker_state = SpeakerState.load(state_file_path)
+        new_files = self.save_embeddings(embeddings[100:])
+
+        file_map_dict, noise_file_map_dict = update_speaker_clusters(
+            self.embed_file_path, "src", speaker_state, partial_set_size=300
+        )
+
+        self.assertGreater(len(file_map_dict), 0)
+        self.assertEqual(
+            set(file_map_dict),
+            {"src_sp_{}".format(i) for i in range(len(file_map_dict))},
+        )
+        clustered_files = [
+            file for files in file_map_dict.values() for file, _ in files
+        ]
+        noise_files = [file for files in noise_file_map_dict.values() for file in files]
+        self.assertEqual(
+            sorted(clustered_files + noise_files),
+            sorted(new_files.tolist() + noise_file_paths),
+        )
+        self.assertEqual(speaker_state.num_speakers, len(file_map_dict))
+        self.assertEqual(
+            speaker_state.counts.sum() + len(speaker_state.noise_file_paths), 400
+        )
+
+    def test_should_drop_the_oldest_noise_once_max_pending_noise_is_reached(self):
+        embeddings, speakers = make_speaker_embeddings(200, 3)
+        sums = np.stack(
+            [embeddings[speakers == speaker].sum(axis=0) for speaker in range(3)]
+        )
+        counts = np.bincount(speakers, minlength=3)
+        # utterances far from every speaker and from each other
+        random_state = np.random.RandomState(1)
+        scattered = np.abs(random_state.normal(size=(4, 256))).astype(np.float32)
+        scattered /= np.linalg.norm(scattered, axis=1, keepdims=True)
+        old_noise_file_paths = ["source/old_0_file.wav", "source/old_1_file.wav"]
+        speaker_state = SpeakerState(
+            speaker_names=["src_sp_0", "src_sp_1", "src_sp_2"],
+            sums=sums,
+            counts=counts,
+            noise_embeddings=scattered[:2],
+            noise_file_paths=old_noise_file_paths,
+        )
+        new_files = self.save_embeddings(scattered[2:])
+
+        file_map_dict, noise_file_map_dict = update_speaker_clusters(
+            self.embed_file_path,
+            "src",
+            speaker_state,
+            min_cluster_size=5,
+            partial_set_size=300,
+            max_pending_noise=3,
+        )
+
+        self.assertEqual(file_map_dict, {})
+        self.assertEqual(
+            sorted(noise_file_map_dict["src_noise"]),
+            sorted(old_noise_file_paths + new_files.tolist()),
+        )
+        self.assertEqual(
+            speaker_state.noise_file_paths,
+            ["source/old_1_file.wav"] + new_files.tolist(),
+        )
+        np.testing.assert_array_equal(speaker_state.noise_embeddings, scattered[1:])
@@ -1,11 +1,35 @@
 import unittest
 from unittest import mock
 from unittest.mock import Mock
+import glob
 import os
+import shutil
+import tempfile
+import threading
 
+import numpy as np
 
-from ekstep_data_pipelines.audio_embedding.audio_embedding import AudioEmbedding
 
+from ekstep_data_pipelines.audio_embedding.audio_embedding import AudioEmbedding, DownloadStream
+from ekstep_data_pipelines.common.infra_commons.storage.local_storage import LocalStorage
+
+
+
+class CountingLocalStorage(LocalStorage):
+    """Records the most files found in local_dir right after a download."""
+
+    def __init__(self, local_dir):
+        super().__init__()
+        self.local_dir = local_dir
+        self.max_local_files = 0
+        self._lock = threading.Lock()
+
+    def download_file_to_location(self, source_path, download_location):
+        super().download_file_to_location(source_path, download_location)
+        if download_location.startswith(self.local_dir):
+            with self._lock:
+                local_files = sum(len(files) for _, _, files in os.walk(self.local_dir))
+                self.max_local_files = max(self.max_local_files, local_files)
 
 
 class AudioEmbeddingsTests(unittest.TestCase):
@@ -32,3 +56,112 @@ class AudioEmbeddingsTests(unittest.TestCase):
         self.assertEqual(
             self.audio_embedding.fs_interface.upload_to_location.call_count, 1
         )
+
+    def test_process_should_embed_downloaded_files_and_delete_them(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source_dir = f'{tmp_dir}/source'
+            os.makedirs(source_dir)
+            wav_files = sorted(glob.glob('ekstep_pipelines_tests/resources/*.wav'))
+            for wav_file in wav_files:
+                shutil.copy(wav_file, source_dir)
+            with open(f'{source_dir}/batch_1.txt', 'w') as batch_file:
+                batch_file.write('\n'.join(f'{source_dir}/{os.path.basename(wav_file)}'
+                                           for wav_file in wav_files))
+
+            self.postgres_client.config_dict = {}
+            self.audio_embedding.fs_interface = LocalStorage()
+            self.audio_embedding.local_txt_path = f'{tmp_dir}/txt/'
+            self.audio_embedding.local_audio_path = f'{tmp_dir}/audio/'
+            self.audio_embedding.embed_file_path = f'{tmp_dir}/embed/'
+
+            self.audio_embedding.process(file_path=f'{source_dir}/batch_1.txt')
+
+            embeddings = np.load(f'{source_dir}/batch_1.npz')
+            self.assertEqual(embeddings['embeds'].shape, (len(wav_files), 256))
+            self.assertEqual(sorted(os.path.basename(file_path) for file_path in embeddings['file_paths']),
+                             [os.path.basename(wav_file) for wav_file in wav_files])
+            self.assertEqual(os.listdir(f'{tmp_dir}/audio/'), [])
+
+    def test_process_should_keep_at_most_max_local_files_on_disk(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source_dir = f'{tmp_dir}/source'
+            os.makedirs(source_dir)
+            wav_files = sorted(glob.glob('ekstep_pipelines_tests/resources/*.wav'))
+            remote_paths = []
+            for copy in range(4):
+                for wav_file in wav_files:
+                    remote_path = f'{source_dir}/{copy}_{os.path.basename(wav_file)}'
+                    shutil.copy(wav_file, remote_path)
+                    remote_paths.append(remote_path)
+            with open(f'{source_dir}/batch_1.txt', 'w') as batch_file:
+                batch_file.write('\n'.join(remote_paths))
+
+            self.postgres_client.config_dict = {
+                'audio_embedding_config': {'download_workers': 4, 'max_local_files': 2}}
+            fs_interface = CountingLocalStorage(f'{tmp_dir}/audio/')
+            self.audio_embedding.fs_interface = fs_interface
+            self.audio_embedding.local_txt_path = f'{tmp_dir}/txt/'
+            self.audio_embedding.local_audio_path = f'{tmp_dir}/audio/'
+            self.audio_embedding.embed_file_path = f'{tmp_dir}/embed/'
+
+            self.audio_embedding.process(file_path=f'{source_dir}/batch_1.txt')
+
+            embeddings = np.load(f'{source_dir}/batch_1.npz')
+            self.assertEqual(embeddings['embeds'].shape, (len(remote_paths), 256))
+            self.assertGreater(fs_interface.max_local_files, 0)
+            self.assertLessEqual(fs_interface.max_local_files, 2)
+            self.assertEqual(os.listdir(f'{tmp_dir}/audio/'), [])
+
+    def test_download_stream_close_should_stop_downloads_and_delete_files_left(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            remote_paths = []
+            for index in range(10):
+                remote_path = f'{tmp_dir}/{index}.wav'
+                with open(remote_path, 'w') as remote_file:
+                    remote_file.write('wav')
+                remote_paths.append(remote_path)
+            remote_paths.insert(1, f'{tmp_dir}/missing.wav')
+            local_dir = f'{tmp_dir}/audio'
+            os.makedirs(local_dir)
+            fs_interface = Mock(wraps=LocalStorage())
+
+            download_stream = DownloadStream(fs_interface, remote_paths, local_dir,
+                                             max_workers=2, max_local_files=3)
+            with self.assertRaises(ValueError):
+                try:
+                    for _ in download_stream:
+                        # the consumer fails without deleting anything
+                        raise ValueError()
+                finally:
+                    download_stream.close()
+
+            self.assertEqual(os.listdir(local_dir), [])
+            self.assertLessEqual(fs_interface.download_file_to_location.call_count, 5)
+
+    def test_download_stream_should_keep_files_with_the_same_name_apart(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            remote_paths = []
+            for index in range(6):
+                os.makedirs(f'{tmp_dir}/{index}')
+                remote_path = f'{tmp_dir}/{index}/0_audio.wav'
+                with open(remote_path, 'w') as remote_file:
+                    remote_file.write(str(index))
+                remote_paths.append(remote_path)
+            local_dir = f'{tmp_dir}/audio'
+            os.makedirs(local_dir)
+
+            download_stream = DownloadStream(LocalStorage(), remote_paths, local_dir,
+                                             max_workers=3, max_local_files=4)
+            contents = []
+            try:
+                for local_file_path in download_stream:
+                    self.assertEqual(os.path.basename(local_file_path), '0_audio.wav')
+                    with open(local_file_path) as local_file:
+                        contents.append(local_file.read())
+                    download_stream.delete(local_file_path)
+            finally:
+                download_stream.close()
+
+            self.assertEqual(sorted(contents), [str(index) for index in range(6)])
+            self.assertEqual(os.listdir(local_dir), [])
+            self.assertEqual(download_stream._slots._value, 4)
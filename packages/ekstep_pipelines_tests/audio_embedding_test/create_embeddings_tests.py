@@ -0,0 +1,62 @@
+import glob
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from resemblyzer import VoiceEncoder, preprocess_wav
+
+from ekstep_data_pipelines.audio_embedding.create_embeddings import BatchedEncoder, \
+    concatenate_embed_files, save_embeddings
+from ekstep_data_pipelines.common.audio_commons.embedding_files import load_embeddings
+
+
+class CreateEmbeddingsTests(unittest.TestCase):
+    def setUp(self):
+        self.vocoder = VoiceEncoder('cpu', verbose=False)
+        self.file_paths = sorted(glob.glob('ekstep_pipelines_tests/resources/*.wav'))
+
+    def test_batched_encoder_should_match_embed_utterance_per_file(self):
+        expected = np.array([self.vocoder.embed_utterance(preprocess_wav(file_path))
+                             for file_path in self.file_paths])
+
+        for workers, batch_size in [(1, 64), (2, 3)]:
+            batched_encoder = BatchedEncoder(self.vocoder, workers=workers, batch_size=batch_size)
+            encodings = batched_encoder.encode(self.file_paths)
+
+            np.testing.assert_allclose(encodings, expected, atol=1e-5)
+            self.assertEqual(batched_encoder.metrics['files'], len(self.file_paths))
+            self.assertTrue(batched_encoder.metrics['audio_seconds_per_second'] > 0)
+
+    def test_encode_stream_should_read_at_most_max_pending_files_ahead(self):
+        file_paths = self.file_paths * 3
+        reads_ahead = []
+        done = []
+
+        def stream():
+            for file_path in file_paths:
+                reads_ahead.append(len(reads_ahead) - len(done))
+                yield file_path
+
+        batched_encoder = BatchedEncoder(self.vocoder, workers=2, max_pending_files=2)
+        encodings, encoded_file_paths = batched_encoder.encode_stream(stream(), done.append)
+
+        self.assertEqual(encoded_file_paths, file_paths)
+        self.assertEqual(done, file_paths)
+        self.assertEqual(len(encodings), len(file_paths))
+        self.assertLessEqual(max(reads_ahead), 2)
+
+    def test_concatenate_embed_files_should_merge_batches_into_a_loadable_npy_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            embed_file_path = os.path.join(tmp_dir, 'src_embed_file.npz')
+            embeds = np.random.RandomState(0).rand(5, 4).astype(np.float32)
+            file_paths = np.array(['src/{}.wav'.format(index) for index in range(5)])
+            save_embeddings(embed_file_path[:-4] + '_1.npz', embeds[:3], file_paths[:3])
+            save_embeddings(embed_file_path[:-4] + '_2.npz', embeds[3:], file_paths[3:])
+
+            merged_file_path = concatenate_embed_files(embed_file_path)
+
+            self.assertEqual(merged_file_path, os.path.join(tmp_dir, 'src_embed_file.npy'))
+            embeddings, merged_file_paths = load_embeddings(merged_file_path)
+            np.testing.assert_array_equal(embeddings, embeds)
+            self.assertEqual(merged_file_paths.tolist(), file_paths.tolist())
@@ -1,11 +1,23 @@
+import functools
+import os
 import unittest
+from unittest import mock
+
+import librosa
+import numpy as np
+import torch
 
 from ekstep_data_pipelines.audio_language_identification import audio_language_inference
 
 
+# the trained model is not kept in the repository
+MODEL_PATH = "ekstep_pipelines_tests/audio_language_identification/model.pt"
+
+
 class AudioLanguageIdentificationTests(unittest.TestCase):
+    @unittest.skipUnless(os.path.isfile(MODEL_PATH), "no trained model at " + MODEL_PATH)
     def test_language_inference(self):
-        model_path = "ekstep_pipelines_tests/audio_language_identification/model.pt"
+        model_path = MODEL_PATH
         audio_path = "ekstep_pipelines_tests/resources/chunk.wav"
         confidence_score = audio_language_inference.evaluation(audio_path, model_path)
         print(confidence_score)
@@ -23,3 +35,52 @@ class AudioLanguageIdentificationTests(unittest.TestCase):
         print(confidence_score)
         expected_score = {"tamil": "0.00004", "others": "0.99996"}
         self.assertEquals(expected_score, confidence_score)
+
+    @mock.patch(
+        "ekstep_data_pipelines.audio_language_identification.audio_language_inference.load_model"
+    )
+    def test_get_model_loads_the_model_once(self, mock_load_model):
+        audio_language_inference.get_model.cache_clear()
+
+        first_model = audio_language_inference.get_model("model.pt")
+        second_model = audio_language_inference.get_model("model.pt")
+
+        audio_language_inference.get_model.cache_clear()
+        self.assertIs(first_model, second_model)
+        self.assertEqual(mock_load_model.call_count, 1)
+
+    # librosa 0.8 pads with pad_mode="reflect" by default, later versions do not
+    @mock.patch("librosa.stft", functools.partial(librosa.stft, pad_mode="reflect"))
+    @mock.patch(
+        "ekstep_data_pipelines.audio_language_identification.audio_language_inference.get_model"
+    )
+    def test_evaluation_batch_matches_evaluation_per_file(self, mock_get_model):
+        torch.manual_seed(0)
+        mock_get_model.return_value = torch.nn.Sequential(
+            torch.nn.AdaptiveAvgPool2d((4, 4)),
+            torch.nn.Flatten(),
+            torch.nn.Linear(16, 2),
+        )
+        audio_paths = [
+            "ekstep_pipelines_tests/resources/chunk.wav",
+            "ekstep_pipelines_tests/resources/missing.wav",
+            "ekstep_pipelines_tests/resources/test1.wav",
+            "ekstep_pipelines_tests/resources/test2.wav",
+        ]
+
+        np.random.seed(0)
+        expected_scores = [
+            audio_language_inference.evaluation(audio_path)
+            for audio_path in audio_paths
+            if os.path.exists(audio_path)
+        ]
+        np.random.seed(0)
+        confidence_scores = audio_language_inference.evaluation_batch(
+            audio_paths, batch_size=2
+        )
+
+        self.assertIsNone(confidence_scores[1])
+        self.assertEqual(
+            [scores for scores in confidence_scores if scores is not None],
+            expected_scores,
+        )
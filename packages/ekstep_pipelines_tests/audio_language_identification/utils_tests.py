@@ -0,0 +1,45 @@
+import functools
+import unittest
+from unittest import mock
+
+import librosa
+import numpy as np
+
+from ekstep_data_pipelines.audio_language_identification.utils import utils
+
+
+class UtilsTests(unittest.TestCase):
+    audio_paths = [
+        "ekstep_pipelines_tests/resources/chunk.wav",
+        "ekstep_pipelines_tests/resources/missing.wav",
+        "ekstep_pipelines_tests/resources/test1.wav",
+        "ekstep_pipelines_tests/resources/test2.wav",
+    ]
+
+    def test_load_pcm_wav_returns_the_samples_of_load_wav(self):
+        for audio_path in [self.audio_paths[0], self.audio_paths[3]]:
+            np.testing.assert_allclose(
+                utils.load_pcm_wav(audio_path, 16000),
+                utils.load_wav(audio_path, 16000),
+                atol=1e-7,
+            )
+
+    # librosa 0.8 pads with pad_mode="reflect" by default, later versions do not
+    @mock.patch("librosa.stft", functools.partial(librosa.stft, pad_mode="reflect"))
+    def test_load_data_batch_matches_load_data_per_file(self):
+        for mode in ["train", "test"]:
+            np.random.seed(0)
+            expected_specs = [
+                utils.load_data(audio_path, mode=mode)
+                for audio_path in self.audio_paths
+                if audio_path != self.audio_paths[1]
+            ]
+            np.random.seed(0)
+            specs = utils.load_data_batch(self.audio_paths, mode=mode)
+
+            self.assertIsNone(specs[1])
+            specs = [spec for spec in specs if spec is not None]
+            self.assertEqual(len(specs), len(expected_specs))
+            for spec, expected_spec in zip(specs, expected_specs):
+                self.assertEqual(spec.shape, expected_spec.shape)
+                np.testing.assert_allclose(spec, expected_spec, atol=1e-4)
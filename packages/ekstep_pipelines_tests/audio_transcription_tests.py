@@ -1,11 +1,12 @@
-import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import Mock
 
 from ekstep_data_pipelines.audio_transcription.audio_transcription import (
     AudioTranscription,
 )
-from ekstep_data_pipelines.audio_transcription.constants import AUDIO_LANGUAGE
+from ekstep_data_pipelines.audio_transcription.transcription_engine import Outcome
 from ekstep_data_pipelines.common.audio_commons.transcription_clients.transcription_client_errors import (
     GoogleTranscriptionClientError,AzureTranscriptionClientError,EkstepTranscriptionClientError
 )
@@ -50,54 +51,69 @@ class AudioTranscriptionTests(unittest.TestCase):
             metadata,
             "reason_of_fail",
         )
+        self.audio_transcription.flush_utterance_statuses()
 
-        self.assertEqual(self.catalogue_dao.update_utterance_status.call_count, 1)
-        self.catalogue_dao.update_utterance_status.assert_called_with(1234, metadata)
+        self.assertEqual(self.catalogue_dao.update_utterance_statuses.call_count, 1)
+        self.catalogue_dao.update_utterance_statuses.assert_called_with(1234, [metadata])
         self.assertEqual(mock_os.call_count, 1)
         mock_os.assert_called_with(
             "mv testdir/local_clean_path testdir/local_rejected_path"
         )
 
-    def test__generate_transcription_and_sanitize_called_with_filename_that_is_not_contained_wav_extension_shoud_not_call_any_function(
+    def test__generate_transcription_for_all_utterenaces_called_with_filename_that_is_not_contained_wav_extension_shoud_not_call_any_function(
         self,
     ):
         file_path = "filename_without_extension"
 
         transcription_client = self.audio_commons.get("transcription_clients")
 
-        metadata = {"status": "test_status", "reason": "test_reason"}
+        self.catalogue_dao.find_utterance_by_name.return_value = {
+            "status": "Clean",
+            "reason": "test_reason",
+            "duration": 3,
+        }
 
-        self.audio_transcription.generate_transcription_and_sanitize(
+        self.audio_transcription.generate_transcription_for_all_utterenaces(
             1234,
-            "testdir/local_clean_path",
-            "testdir/local_rejected_path",
-            file_path,
+            [file_path],
             "language",
             transcription_client,
-            metadata,
+            "utterenaces",
+            False,
+            "remote_path",
+            'google'
         )
 
+        self.assertEqual(
+            self.audio_transcription.fs_interface.download_file_to_location.call_count,
+            0,
+        )
         self.assertEqual(transcription_client.generate_transcription.call_count, 0)
 
-    def test__generate_transcription_and_sanitize_called_with_filename_that_contained_wav_extension_shoud_call_generate_transcription(
+    def test__generate_transcription_for_all_utterenaces_called_with_filename_that_contained_wav_extension_shoud_call_generate_transcription(
         self,
     ):
+        remote_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, remote_path)
+        self.addCleanup(shutil.rmtree, f"/tmp/{remote_path}", ignore_errors=True)
         file_name = "filename_with_extension.wav"
+        local_clean_path = f"/tmp/{remote_path}/{file_name}"
 
         transcription_client = self.audio_commons.get("transcription_clients")
         transcription_client.generate_transcription.return_value = "अलग अलग होते है"
 
-        self.audio_transcription.audio_transcription_config = {AUDIO_LANGUAGE: "hindi"}
-        metadata = {"status": "test_status", "reason": "test_reason"}
+        metadata = {"status": "Clean", "reason": "test_reason", "duration": 3}
+        self.catalogue_dao.find_utterance_by_name.return_value = metadata
 
-        self.audio_transcription.generate_transcription_and_sanitize(
+        self.audio_transcription.generate_transcription_for_all_utterenaces(
             1234,
-            "local_clean_file.wav",
-            "testdir/local_rejected_path",
-            file_name,
-            "language",
+            [file_name],
+            "hindi",
             transcription_client,
-            metadata,
+            "utterenaces",
+            False,
+            remote_path,
+            'google'
         )
 
         self.assertEqual(
@@ -105,55 +121,42 @@ class AudioTranscriptionTests(unittest.TestCase):
             1,
         )
         self.audio_transcription.fs_interface.download_file_to_location.assert_called_with(
-            file_name, "local_clean_file.wav"
+            f"{remote_path}/{file_name}", local_clean_path
         )
 
         self.assertEqual(transcription_client.generate_transcription.call_count, 1)
         transcription_client.generate_transcription.assert_called_with(
-            "language", "local_clean_file.wav"
+            "hindi", local_clean_path
         )
 
-        self.assertTrue(os.path.exists("local_clean_file.txt"))
+        with open(local_clean_path.replace(".wav", ".txt")) as transcription_file:
+            self.assertEqual(transcription_file.read(), "अलग अलग होते है")
+        self.catalogue_dao.update_utterance_statuses.assert_called_with(1234, [metadata])
+        self.assertEqual(metadata["status"], "Clean")
 
-    def test__generate_transcription_and_sanitize_called_with_filename_that_contained_wav_extension_when_generate_transcription_throw_error(
-        self,
+    @unittest.mock.patch("os.system")
+    def test__sanitize_transcription_called_with_a_failed_stt_call_should_reject_the_utterance(
+        self, mock_os
     ):
-        # file_path = Mock()
-
-        file_path = "filename_with_extension.wav"
-
-        transcription_client = self.audio_commons.get("transcription_clients")
-        transcription_client.generate_transcription.side_effect = (
-            GoogleTranscriptionClientError("test_google_error")
-        )
-
         metadata = {"status": "test_status", "reason": "test_reason"}
 
-        self.audio_transcription.generate_transcription_and_sanitize(
+        self.audio_transcription.sanitize_transcription(
             1234,
             "testdir/local_clean_path/local_clean_file.wav",
             "testdir/local_rejected_path",
-            file_path,
             "language",
-            transcription_client,
             metadata,
+            Outcome(None, GoogleTranscriptionClientError("test_google_error")),
         )
 
-        self.assertEqual(
-            self.audio_transcription.fs_interface.download_file_to_location.call_count,
-            1,
-        )
-        self.audio_transcription.fs_interface.download_file_to_location.assert_called_with(
-            file_path, "testdir/local_clean_path/local_clean_file.wav"
-        )
-
-        self.assertEqual(transcription_client.generate_transcription.call_count, 1)
-        transcription_client.generate_transcription.assert_called_with(
-            "language", "testdir/local_clean_path/local_clean_file.wav"
+        mock_os.assert_called_with(
+            "mv testdir/local_clean_path/local_clean_file.wav testdir/local_rejected_path"
         )
-
-        self.assertEqual(self.catalogue_dao.update_utterance_status.call_count, 1)
-        self.catalogue_dao.update_utterance_status.assert_called_with(1234, metadata)
+        self.audio_transcription.flush_utterance_statuses()
+        self.assertEqual(self.catalogue_dao.update_utterance_statuses.call_count, 1)
+        self.catalogue_dao.update_utterance_statuses.assert_called_with(1234, [metadata])
+        self.assertEqual(metadata["status"], "Rejected")
+        self.assertIn("STT API error", metadata["reason"])
 
     def test__generate_transcription_for_all_utterenaces_should_do_transcription_for_all_file_in_given_audio_id_when_should_skip_rejected_is_false(
         self,
@@ -257,3 +260,59 @@ class AudioTranscriptionTests(unittest.TestCase):
         self.assertEqual(self.catalogue_dao.find_utterance_by_name.call_count, 4)
 
         self.assertEqual(transcription_client.generate_transcription.call_count, 1)
+
+    def test__handled_utterance_statuses_should_be_written_in_batches(self):
+        self.audio_transcription.audio_transcription_config = {
+            "status_update_batch_size": 2
+        }
+        utterances = [
+            {"name": f"{index}.wav", "status": "Clean", "reason": None}
+            for index in range(3)
+        ]
+
+        for utterance in utterances:
+            self.audio_transcription.handle_success(1234, utterance, None)
+
+        self.assertEqual(self.catalogue_dao.update_utterance_statuses.call_count, 1)
+        self.catalogue_dao.update_utterance_statuses.assert_called_with(
+            1234, utterances[:2]
+        )
+
+        self.audio_transcription.flush_utterance_statuses()
+
+        self.assertEqual(self.catalogue_dao.update_utterance_statuses.call_count, 2)
+        self.catalogue_dao.update_utterance_statuses.assert_called_with(
+            1234, utterances[2:]
+        )
+        self.assertEqual(self.catalogue_dao.update_utterance_status.call_count, 0)
+
+    def test__generate_transcription_for_all_utterenaces_should_not_transcribe_when_a_download_fails(
+        self,
+    ):
+        list_of_file_path = ["file_one.wav", "file_two.wav", "file_three.wav"]
+        transcription_client = self.audio_commons.get("transcription_clients")
+        transcription_client.generate_transcription.return_value = "अलग अलग होते है"
+        self.catalogue_dao.find_utterance_by_name.side_effect = [
+            {"name": file_path, "status": "Clean", "reason": None, "duration": 3}
+            for file_path in list_of_file_path
+        ]
+        self.audio_transcription.fs_interface.download_file_to_location.side_effect = [
+            None,
+            RuntimeError("download failed"),
+            None,
+        ]
+
+        with self.assertRaises(RuntimeError):
+            self.audio_transcription.generate_transcription_for_all_utterenaces(
+                12343,
+                list_of_file_path,
+                "hindi",
+                transcription_client,
+                "utterenaces",
+                False,
+                "remote_path/clean",
+                'google'
+            )
+
+        self.assertEqual(transcription_client.generate_transcription.call_count, 0)
+        self.assertEqual(self.catalogue_dao.update_utterance_statuses.call_count, 0)
@@ -119,6 +119,28 @@ class CatalogueTests(unittest.TestCase):
         utterance = catalogueDao.find_utterance_by_name(utterances, name)
         self.assertEqual(None, utterance)
 
+    @mock.patch("ekstep_data_pipelines.common.postgres_db_client.PostgresClient")
+    def test_utterance_by_name_from_index(self, mock_postgres_client):
+        catalogueDao = CatalogueDao(mock_postgres_client)
+        utterances = [
+            {"name": "1.wav", "duration": "13.38", "status": "Clean"},
+            {"name": "2.wav", "duration": "3.27", "status": "Clean"},
+            {"name": "1.wav", "duration": "4.0", "status": "Rejected"},
+        ]
+
+        utterances_by_name = catalogueDao.index_utterances_by_name(utterances)
+
+        self.assertEqual(2, len(utterances_by_name))
+        for name in ["1.wav", "2.wav", "3.wav"]:
+            self.assertEqual(
+                catalogueDao.find_utterance_by_name(utterances, name),
+                catalogueDao.find_utterance_by_name(utterances_by_name, name),
+            )
+        self.assertIs(
+            utterances[0],
+            catalogueDao.find_utterance_by_name(utterances_by_name, "1.wav"),
+        )
+
     @mock.patch("ekstep_data_pipelines.common.postgres_db_client.PostgresClient")
     def test_update_utterance_status(self, mock_postgres_client):
         catalogueDao = CatalogueDao(mock_postgres_client)
@@ -148,6 +170,37 @@ class CatalogueTests(unittest.TestCase):
         self.assertEqual(called_with_query, args[0][0][0])
         self.assertEqual(called_with_args, args[0][1])
 
+    @mock.patch("ekstep_data_pipelines.common.postgres_db_client.PostgresClient")
+    def test_update_utterance_statuses(self, mock_postgres_client):
+        catalogueDao = CatalogueDao(mock_postgres_client)
+        utterances = [
+            {"name": "1.wav", "is_transcribed": False, "stt_api": "google", "status": "Rejected",
+             "reason": "stt error"},
+            {"name": "2.wav", "is_transcribed": True, "stt_api": "google", "status": "Clean", "reason": None},
+            {"name": "1.wav", "is_transcribed": True, "stt_api": "google", "status": "Clean", "reason": None},
+            {"name": "3.wav", "is_transcribed": False, "stt_api": "google", "status": "Rejected",
+             "reason": ("bad", "audio")},
+        ]
+
+        rows_updated = catalogueDao.update_utterance_statuses(2020, utterances)
+
+        self.assertEqual(True, rows_updated)
+        self.assertEqual(1, mock_postgres_client.execute_values.call_count)
+        query, rows, template = mock_postgres_client.execute_values.call_args[0]
+        self.assertEqual(
+            "update media_speaker_mapping as m set status = v.status, fail_reason = v.reason,is_transcribed = (case when m.is_transcribed = TRUE then true else v.is_transcribed end),stt_api_used =(select array_agg(distinct e) from unnest(m.stt_api_used || ARRAY[v.stt_api_used]) e) from (values %s) as v(audio_id, name, status, reason, is_transcribed, stt_api_used) where m.audio_id = v.audio_id and m.clipped_utterance_file_name = v.name",
+            query,
+        )
+        self.assertEqual(
+            [
+                (2020, "1.wav", "Clean", None, True, "google"),
+                (2020, "2.wav", "Clean", None, True, "google"),
+                (2020, "3.wav", "Rejected", "('bad', 'audio')", False, "google"),
+            ],
+            rows,
+        )
+        self.assertEqual(6, template.count("%s"))
+
     @mock.patch("ekstep_data_pipelines.common.postgres_db_client.PostgresClient")
     def test_get_utterances_by_source(self, mock_postgres_client):
         source = "test_source"
@@ -84,3 +84,134 @@ class SNRTests(unittest.TestCase):
             self.input_file_dir, self.output_file_dir
         )
         self.assertEqual(mock_subprocess_call.call_count, 1)
+
+    def test_stream_frame_generator_should_yield_the_same_frames_as_frame_generator(
+        self,
+    ):
+        wav_file_path = "ekstep_pipelines_tests/resources/chunk.wav"
+        audio, sample_rate = self.chunking_conversion_util.read_wave(wav_file_path)
+
+        frames = list(
+            self.chunking_conversion_util.frame_generator(30, audio, sample_rate)
+        )
+        streamed_frames = list(
+            self.chunking_conversion_util.stream_frame_generator(30, wav_file_path, 7)
+        )
+
+        self.assertEqual(len(frames), len(streamed_frames))
+        for frame, streamed_frame in zip(frames, streamed_frames):
+            self.assertEqual(frame.bytes, bytes(streamed_frame.bytes))
+            self.assertEqual(frame.timestamp, streamed_frame.timestamp)
+            self.assertEqual(frame.duration, streamed_frame.duration)
+
+    def test_create_audio_clips_should_write_the_same_chunks_when_streaming(self):
+        wav_file_path = "ekstep_pipelines_tests/resources/chunk.wav"
+        in_memory_dir = f"{self.output_file_dir}/in_memory"
+        streaming_dir = f"{self.output_file_dir}/streaming"
+        os.mkdir(in_memory_dir)
+        os.mkdir(streaming_dir)
+        self.chunking_conversion_util.stream_window_frames = 7
+
+        self.chunking_conversion_util.create_audio_clips(
+            2,
+            15,
+            wav_file_path,
+            in_memory_dir,
+            f"{in_memory_dir}/vad",
+            "chunk.wav",
+            False,
+        )
+        self.chunking_conversion_util.create_audio_clips(
+            2,
+            15,
+            wav_file_path,
+            streaming_dir,
+            f"{streaming_dir}/vad",
+            "chunk.wav",
+            False,
+            streaming=True,
+        )
+
+        chunks = sorted(
+            os.path.basename(f) for f in glob.glob(f"{in_memory_dir}/*.wav")
+        )
+        streamed_chunks = sorted(
+            os.path.basename(f) for f in glob.glob(f"{streaming_dir}/*.wav")
+        )
+
+        self.assertTrue(len(chunks) > 0)
+        self.assertEqual(chunks, streamed_chunks)
+        for chunk in chunks:
+            with open(f"{in_memory_dir}/{chunk}", "rb") as in_memory_chunk, open(
+                f"{streaming_dir}/{chunk}", "rb"
+            ) as streamed_chunk:
+                self.assertEqual(in_memory_chunk.read(), streamed_chunk.read())
+
+    @mock.patch("sox.file_info.duration")
+    def test_create_audio_clips_should_rechunk_long_segments_in_memory(
+        self, mock_sox_duration
+    ):
+        wav_file_path = "ekstep_pipelines_tests/resources/test2.wav"
+
+        self.chunking_conversion_util.create_audio_clips(
+            2,
+            3,
+            wav_file_path,
+            self.output_file_dir,
+            f"{self.output_file_dir}/vad",
+            "test2.wav",
+        )
+
+        chunks = sorted(
+            os.path.basename(f) for f in glob.glob(f"{self.output_file_dir}/*.wav")
+        )
+
+        self.assertEqual(mock_sox_duration.call_count, 0)
+        self.assertNotIn("0_test2.wav", chunks)
+        self.assertTrue(len(chunks) > 0)
+        for chunk in chunks:
+            self.assertTrue(chunk.endswith("_0_test2.wav"))
+
+    def test_calculate_duration_should_return_seconds_of_pcm_data(self):
+        self.assertEqual(
+            self.chunking_conversion_util.calculate_duration(bytes(64000), 16000), 2.0
+        )
+
+    def test_create_audio_clips_should_write_a_manifest_of_the_chunks(self):
+        wav_file_path = "ekstep_pipelines_tests/resources/test2.wav"
+
+        manifest = self.chunking_conversion_util.create_audio_clips(
+            2,
+            3,
+            wav_file_path,
+            self.output_file_dir,
+            f"{self.output_file_dir}/vad",
+            "test2.wav",
+        )
+
+        chunks = sorted(
+            os.path.basename(f) for f in glob.glob(f"{self.output_file_dir}/*.wav")
+        )
+        source_audio, _ = self.chunking_conversion_util.read_wave(wav_file_path)
+
+        self.assertEqual(sorted(manifest.keys()), chunks)
+        self.assertEqual(
+            self.chunking_conversion_util.read_chunk_manifest(self.output_file_dir),
+            manifest,
+        )
+        for chunk in chunks:
+            audio, sample_rate = self.chunking_conversion_util.read_wave(
+                f"{self.output_file_dir}/{chunk}"
+            )
+            entry = manifest[chunk]
+            offset = entry["byte_offset"]
+
+            self.assertEqual(entry["frames"], len(audio) // 2)
+            self.assertEqual(entry["sample_rate"], sample_rate)
+            self.assertEqual(entry["duration"], len(audio) / (2.0 * sample_rate))
+            self.assertEqual(source_audio[offset : offset + len(audio)], audio)
+
+    def test_read_chunk_manifest_should_return_empty_dict_when_there_is_none(self):
+        self.assertEqual(
+            self.chunking_conversion_util.read_chunk_manifest(self.output_file_dir), {}
+        )
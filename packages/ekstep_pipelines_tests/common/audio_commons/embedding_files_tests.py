@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from ekstep_data_pipelines.audio_analysis.speaker_analysis.create_embeddings import (
+    concatenate_embed_files,
+)
+from ekstep_data_pipelines.common.audio_commons.embedding_files import (
+    file_paths_index_path,
+    load_embeddings,
+    merge_embed_files,
+    read_npz_shape,
+)
+
+
+class EmbeddingFilesTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        random_state = np.random.RandomState(0)
+        self.npz_files = []
+        self.embeds = []
+        self.file_paths = []
+        for batch_no, batch_size in enumerate([3, 5, 2]):
+            embeds = random_state.rand(batch_size, 4).astype(np.float32)
+            file_paths = np.array(
+                [f"src/{batch_no}_{index}.wav" for index in range(batch_size)]
+            )
+            npz_file = os.path.join(self.tmp_dir.name, f"batch_{batch_no}.npz")
+            np.savez_compressed(npz_file, embeds=embeds, file_paths=file_paths)
+            self.npz_files.append(npz_file)
+            self.embeds.append(embeds)
+            self.file_paths.append(file_paths)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_should_read_shape_of_npz_array_without_loading_it(self):
+        self.assertEqual(read_npz_shape(self.npz_files[1]), (5, 4))
+
+    def test_should_merge_batches_into_memory_mapped_embeddings(self):
+        embed_file_path = os.path.join(self.tmp_dir.name, "src_embed_file.npy")
+
+        num_embeddings = merge_embed_files(self.npz_files, embed_file_path)
+
+        self.assertEqual(num_embeddings, 10)
+        self.assertTrue(os.path.exists(file_paths_index_path(embed_file_path)))
+        embeddings, file_paths = load_embeddings(embed_file_path)
+        self.assertIsInstance(embeddings, np.memmap)
+        self.assertEqual(embeddings.dtype, np.float32)
+        np.testing.assert_array_equal(embeddings, np.concatenate(self.embeds))
+        self.assertEqual(file_paths.tolist(), np.concatenate(self.file_paths).tolist())
+
+    def test_concatenate_should_skip_partial_downloads(self):
+        # left behind by a download that was killed
+        with open(self.npz_files[2] + ".part", "wb") as part_file:
+            part_file.write(b"partial")
+        embed_file_path = os.path.join(self.tmp_dir.name, "merged", "src_embed_file.npy")
+        os.makedirs(os.path.dirname(embed_file_path))
+
+        concatenate_embed_files(embed_file_path, self.tmp_dir.name + "/")
+
+        embeddings, file_paths = load_embeddings(embed_file_path)
+        np.testing.assert_array_equal(embeddings, np.concatenate(self.embeds))
+        self.assertEqual(file_paths.tolist(), np.concatenate(self.file_paths).tolist())
+
+    def test_should_load_embeddings_from_npz_file(self):
+        embeddings, file_paths = load_embeddings(self.npz_files[0])
+
+        np.testing.assert_array_equal(embeddings, self.embeds[0])
+        self.assertEqual(file_paths.tolist(), self.file_paths[0].tolist())
+
+    def test_should_not_merge_into_a_file_that_is_not_npy(self):
+        embed_file_path = os.path.join(self.tmp_dir.name, "src_embed_file.npz")
+
+        with self.assertRaises(ValueError):
+            merge_embed_files(self.npz_files, embed_file_path)
+        self.assertFalse(os.path.exists(embed_file_path))
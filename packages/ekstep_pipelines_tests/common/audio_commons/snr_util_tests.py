@@ -1,9 +1,13 @@
+import json
+import os
 import subprocess
 import unittest
 from unittest import mock
 from unittest.mock import Mock
 from unittest.mock import call
 
+import pandas as pd
+
 from ekstep_data_pipelines.common.audio_commons.snr_util import SNR
 
 
@@ -107,6 +111,67 @@ class SNRTests(unittest.TestCase):
         self.assertEqual(mock_subprocess_check_output.call_count, 3)
         self.assertEqual(snr_file_dict, expected_value)
 
+    @mock.patch("subprocess.check_output")
+    def test__should_retun_file_snr_dict_without_subprocess_when_snr_engine_is_native(
+        self, mock_subprocess_check_output
+    ):
+        snr = SNR(
+            snr_engine=SNR.NATIVE_ENGINE,
+            table_file_path="ekstep_pipelines_tests/resources/wada_snr/Alpha0.400000.txt",
+        )
+
+        snr_file_dict = snr.process_files_list(
+            [
+                "ekstep_pipelines_tests/resources/test1.wav",
+                "ekstep_pipelines_tests/resources/test2.wav",
+            ]
+        )
+
+        expected_value = {
+            "ekstep_pipelines_tests/resources/test1.wav": 21.0,
+            "ekstep_pipelines_tests/resources/test2.wav": 26.0,
+        }
+
+        self.assertEqual(mock_subprocess_check_output.call_count, 0)
+        self.assertEqual(snr_file_dict, expected_value)
+
+    def test__should_keep_file_order_when_process_files_list_called_with_workers(
+        self,
+    ):
+        snr = SNR(
+            snr_engine=SNR.NATIVE_ENGINE,
+            table_file_path="ekstep_pipelines_tests/resources/wada_snr/Alpha0.400000.txt",
+            workers=2,
+            chunk_size=1,
+        )
+        input_file_list = [
+            "ekstep_pipelines_tests/resources/test3.wav",
+            "ekstep_pipelines_tests/resources/test1.wav",
+            "ekstep_pipelines_tests/resources/test2.wav",
+        ]
+
+        snr_file_dict = snr.process_files_list(input_file_list)
+
+        self.assertEqual(list(snr_file_dict.keys()), input_file_list)
+        self.assertEqual(list(snr_file_dict.values()), [23.0, 21.0, 26.0])
+
+    def test__should_read_snr_engine_from_config_when_get_instance_called(self):
+        snr = SNR.get_instance(
+            {
+                "audio_processor_config": {
+                    "snr_configeration": {
+                        "snr_engine": "native",
+                        "workers": 4,
+                        "chunk_size": 32,
+                    }
+                }
+            }
+        )
+
+        self.assertEqual(snr.snr_engine, SNR.NATIVE_ENGINE)
+        self.assertEqual(snr.workers, 4)
+        self.assertEqual(snr.chunk_size, 32)
+
     @mock.patch("subprocess.check_output")
     @mock.patch("sox.file_info.duration")
     @mock.patch("shutil.move")
@@ -161,7 +226,9 @@ class SNRTests(unittest.TestCase):
     @mock.patch("shutil.move")
     @mock.patch("subprocess.check_output")
     @mock.patch("sox.file_info.duration")
-    @mock.patch("ekstep_data_pipelines.common.audio_commons.snr_util.infer_language")
+    @mock.patch(
+        "ekstep_data_pipelines.common.audio_commons.snr_util.infer_language_batch"
+    )
     def test__given_valid_file_input_list__when_fit_and_move_is_invoked__then_update_all_values_in_the_metadata_file_with_LID(
         self, mock_infer_language, mock_sox, mock_subprocess_check_output, mock_shutil
     ):
@@ -175,7 +242,7 @@ class SNRTests(unittest.TestCase):
 
         self.setup_meta_data_file(meta_data_file_name)
 
-        mock_infer_language.return_value = {"hi-IN": "0.00004", "en": "0.99996"}
+        mock_infer_language.return_value = [{"hi-IN": "0.00004", "en": "0.99996"}] * 3
         mock_sox.return_value = 10
 
         mock_subprocess_check_output.side_effect = [
@@ -194,6 +261,8 @@ class SNRTests(unittest.TestCase):
             hash_code,
         )
 
+        mock_infer_language.assert_called_once_with(input_file_list)
+
         mock_calls = [call("file1.wav"), call("file2.wav"), call("file3.wav")]
 
         # assert mock calls
@@ -225,3 +294,83 @@ class SNRTests(unittest.TestCase):
         print("meta_data_contents:" + meta_data_contents)
         print("expected_file_content:" + self.expected_file_content)
         self.assertEqual(expected_file_content, meta_data_contents)
+
+    @mock.patch("subprocess.check_output")
+    @mock.patch("sox.file_info.duration")
+    @mock.patch("shutil.move")
+    def test__given_valid_file_input_list__when_fit_and_move_is_invoked__then_write_the_metadata_file_once(
+        self, mock_shutil, mock_sox, mock_subprocess_check_output
+    ):
+        meta_data_file_name = "test_file.csv"
+        self.setup_meta_data_file(meta_data_file_name)
+
+        mock_sox.return_value = 10
+        mock_subprocess_check_output.side_effect = [
+            b"24.0 mock_output mock_output",
+            b"5.0 mock_output mock_output",
+            b"280.0 mock_output mock_output",
+        ]
+
+        with mock.patch.object(
+            self.snr, "write_metadata_file", wraps=self.snr.write_metadata_file
+        ) as mock_write_metadata_file:
+            self.snr.fit_and_move(
+                ["file1.wav", "file2.wav", "file3.wav"],
+                meta_data_file_name,
+                15,
+                "/tmp",
+                "17147714",
+                "dummy_hash",
+            )
+
+        self.assertEqual(mock_write_metadata_file.call_count, 1)
+        self.assertFalse(os.path.exists(f"{meta_data_file_name}.tmp"))
+
+        metadata = pd.read_csv(meta_data_file_name)
+        utterances = json.loads(metadata["utterances_files_list"][0])
+        self.assertEqual(
+            [utterance["status"] for utterance in utterances],
+            ["Clean", "Rejected", "Clean"],
+        )
+        self.assertEqual(metadata["cleaned_duration"][0], 0.33)
+
+    @mock.patch("subprocess.check_output")
+    @mock.patch("sox.file_info.duration")
+    @mock.patch("shutil.move")
+    def test__given_chunk_manifest__when_fit_and_move_is_invoked__then_take_durations_from_the_manifest(
+        self, mock_shutil, mock_sox, mock_subprocess_check_output
+    ):
+        meta_data_file_name = "test_file.csv"
+        self.setup_meta_data_file(meta_data_file_name)
+
+        mock_sox.return_value = 10
+        mock_subprocess_check_output.side_effect = [
+            b"24.0 mock_output mock_output",
+            b"25.0 mock_output mock_output",
+        ]
+        chunk_manifest = {
+            "file1.wav": {
+                "frames": 48000,
+                "sample_rate": 16000,
+                "duration": 3.0,
+                "byte_offset": 0,
+            }
+        }
+
+        self.snr.fit_and_move(
+            ["chunks/file1.wav", "chunks/file2.wav"],
+            meta_data_file_name,
+            15,
+            "/tmp",
+            "17147714",
+            "dummy_hash",
+            chunk_manifest=chunk_manifest,
+        )
+
+        mock_sox.assert_called_once_with("chunks/file2.wav")
+
+        metadata = pd.read_csv(meta_data_file_name)
+        utterances = json.loads(metadata["utterances_files_list"][0])
+        self.assertEqual(
+            [utterance["duration"] for utterance in utterances], ["3.0", "10"]
+        )
@@ -44,12 +44,9 @@ class TestAzureTranscriptionClient(unittest.TestCase):
         mock_speechrecongnizer.return_value.recognize_once.return_value = result
 
         audio_file_path = "chunk-2.wav"
-        self.assertRaises(
-            AzureTranscriptionClientError,
-            self.azure_client.generate_transcription,
-            "hi-IN",
-            audio_file_path,
-        )
+        with self.assertRaises(AzureTranscriptionClientError) as context:
+            self.azure_client.generate_transcription("hi-IN", audio_file_path)
+        self.assertFalse(context.exception.retryable)
 
     @mock.patch("azure.cognitiveservices.speech.SpeechRecognizer")
     def test__speech_to_text_cancelled(self, mock_speechrecongnizer):
@@ -65,3 +62,20 @@ class TestAzureTranscriptionClient(unittest.TestCase):
             "hi-IN",
             audio_file_path,
         )
+
+    @mock.patch("azure.cognitiveservices.speech.SpeechRecognizer")
+    def test__speech_to_text_cancelled_by_a_connection_failure_is_retryable(
+        self, mock_speechrecongnizer
+    ):
+        result = mock.Mock()
+        result.text = None
+        result.reason = speech.ResultReason.Canceled
+        result.cancellation_details.reason = speech.CancellationReason.Error
+        result.cancellation_details.error_code = (
+            speech.CancellationErrorCode.ConnectionFailure
+        )
+        mock_speechrecongnizer.return_value.recognize_once.return_value = result
+
+        with self.assertRaises(AzureTranscriptionClientError) as context:
+            self.azure_client.generate_transcription("hi-IN", "chunk-2.wav")
+        self.assertTrue(context.exception.retryable)
@@ -1,11 +1,18 @@
 import sys
+import threading
+import time
 import unittest
 from unittest import mock
 from unittest.mock import Mock
 
+from google.api_core.exceptions import ServiceUnavailable
+
 from ekstep_data_pipelines.common.audio_commons.transcription_clients.google_transcription_client import (
     GoogleTranscriptionClient,
 )
+from ekstep_data_pipelines.common.audio_commons.transcription_clients.transcription_client_errors import (
+    GoogleTranscriptionClientError,
+)
 
 sys.path.insert(0, "..")
 
@@ -48,3 +55,35 @@ class TestGoogleTranscriptionClient(unittest.TestCase):
         self.assertEqual(
             actual_result, " कोरोना के प्रभाव से हमारी मन की बात भी अछूती नहीं रही है।"
         )
+
+    def test_unavailable_service_should_raise_a_retryable_error(self):
+        mock_client = Mock()
+        mock_client.long_running_recognize.side_effect = ServiceUnavailable("busy")
+        self.google_client._client = mock_client
+
+        with self.assertRaises(GoogleTranscriptionClientError) as context:
+            self.google_client.generate_transcription(
+                "test_language", "input_file_path"
+            )
+        self.assertTrue(context.exception.retryable)
+
+    @mock.patch(
+        "ekstep_data_pipelines.common.audio_commons.transcription_clients.google_transcription_client.speech_v1.SpeechClient"
+    )
+    def test_client_should_be_created_once_by_concurrent_calls(
+        self, mock_speech_client
+    ):
+        mock_speech_client.side_effect = lambda: time.sleep(0.05) or Mock()
+        clients = []
+
+        threads = [
+            threading.Thread(target=lambda: clients.append(self.google_client.client))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(mock_speech_client.call_count, 1)
+        self.assertEqual(len(set(map(id, clients))), 1)
@@ -0,0 +1,78 @@
+import math
+import unittest
+
+import numpy as np
+
+from ekstep_data_pipelines.common.audio_commons.wada_snr import WadaSNR
+
+
+class WadaSNRTests(unittest.TestCase):
+
+    TABLE_FILE_PATH = "ekstep_pipelines_tests/resources/wada_snr/Alpha0.400000.txt"
+
+    # values reported by the WADASNR binary for the same inputs
+    EXPECTED_FILE_SNRS = {
+        "ekstep_pipelines_tests/resources/chunk.wav": 29.0,
+        "ekstep_pipelines_tests/resources/test1.wav": 21.0,
+        "ekstep_pipelines_tests/resources/test2.wav": 26.0,
+        "ekstep_pipelines_tests/resources/test3.wav": 23.0,
+    }
+    EXPECTED_SYNTHETIC_SNRS = [14.0, 24.0, 34.582929, 4.0, -6.362322, 43.0]
+
+    def setUp(self):
+        self.wada_snr = WadaSNR(self.TABLE_FILE_PATH)
+
+    def synthetic_pcm_batch(self):
+        random_state = np.random.RandomState(0)
+        pcm_batch = []
+        for length, noise in [
+            (250000, 300),
+            (105000, 100),
+            (1234567, 30),
+            (300001, 1000),
+            (160000, 3000),
+            (99999, 10),
+        ]:
+            speech = random_state.choice([-1, 1], length) * random_state.gamma(
+                0.4, 2000, length
+            )
+            noisy_speech = speech + random_state.normal(0, noise, length)
+            pcm_batch.append(np.clip(noisy_speech, -32768, 32767).astype("<i2"))
+        return pcm_batch
+
+    def test_read_table_should_read_all_snr_levels(self):
+        self.assertEqual(len(self.wada_snr.snr_levels), 121)
+        self.assertEqual(self.wada_snr.snr_levels[0], -20.0)
+        self.assertEqual(self.wada_snr.snr_levels[-1], 100.0)
+        self.assertEqual(self.wada_snr.alphas[0], 0.409747739)
+
+    def test_compute_files_snr_should_match_the_binary_for_wav_files(self):
+        file_paths = list(self.EXPECTED_FILE_SNRS.keys())
+
+        snrs = self.wada_snr.compute_files_snr(file_paths)
+
+        self.assertEqual(snrs, list(self.EXPECTED_FILE_SNRS.values()))
+
+    def test_compute_batch_snr_should_match_the_binary_for_multi_block_audio(self):
+        snrs = self.wada_snr.compute_batch_snr(self.synthetic_pcm_batch())
+
+        self.assertEqual(snrs, self.EXPECTED_SYNTHETIC_SNRS)
+
+    def test_compute_batch_snr_should_fail_like_the_binary_on_full_blocks(self):
+        pcm_batch = [np.ones(WadaSNR.BLOCK_SIZE, dtype="<i2"), np.array([], "<i2")]
+
+        snrs = self.wada_snr.compute_batch_snr(pcm_batch)
+
+        self.assertEqual(snrs, [WadaSNR.ERROR_SNR, WadaSNR.ERROR_SNR])
+
+    def test_compute_batch_snr_should_return_nan_when_audio_is_too_short(self):
+        snrs = self.wada_snr.compute_batch_snr([np.ones(7999, dtype="<i2")])
+
+        self.assertTrue(math.isnan(snrs[0]))
+
+    def test_compute_file_snr_should_return_error_snr_when_file_is_missing(self):
+        snr = self.wada_snr.compute_file_snr(
+            "ekstep_pipelines_tests/resources/none.wav"
+        )
+
+        self.assertEqual(snr, WadaSNR.ERROR_SNR)
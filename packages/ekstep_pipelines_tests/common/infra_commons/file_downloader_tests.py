@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+from ekstep_data_pipelines.common.infra_commons.storage import RemoteFile, md5_checksum
+from ekstep_data_pipelines.common.infra_commons.storage.exceptions import (
+    FileNotFoundException,
+)
+from ekstep_data_pipelines.common.infra_commons.storage.file_downloader import (
+    FileDownloader,
+)
+from ekstep_data_pipelines.common.infra_commons.storage.local_storage import (
+    LocalStorage,
+)
+
+
+class FileDownloaderTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.remote_dir = f"{self.tmp_dir.name}/remote"
+        self.local_dir = f"{self.tmp_dir.name}/local"
+        os.makedirs(self.remote_dir)
+        os.makedirs(self.local_dir)
+        for index in range(5):
+            with open(f"{self.remote_dir}/batch_{index}.npz", "wb") as remote_file:
+                remote_file.write(bytes([index]) * (index + 1) * 100)
+
+        self.fs_interface = LocalStorage()
+        self.remote_files = self.fs_interface.list_files_with_checksums(self.remote_dir)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_md5_checksum_should_be_base64_encoded_like_gcs(self):
+        with open(f"{self.tmp_dir.name}/abc", "w") as file:
+            file.write("abc")
+
+        self.assertEqual(
+            md5_checksum(f"{self.tmp_dir.name}/abc"), "kAFQmDzST7DWlj99KOF/cg=="
+        )
+
+    def test_should_download_all_files_in_order(self):
+        downloader = FileDownloader.get_instance(self.fs_interface, max_workers=3)
+
+        names = downloader.download(self.remote_files, self.local_dir)
+
+        self.assertEqual(names, [f"batch_{index}.npz" for index in range(5)])
+        self.assertEqual(sorted(os.listdir(self.local_dir)), names)
+        for name in names:
+            self.assertEqual(
+                md5_checksum(f"{self.local_dir}/{name}"),
+                md5_checksum(f"{self.remote_dir}/{name}"),
+            )
+        self.assertEqual(downloader.downloaded, 5)
+        self.assertEqual(downloader.skipped, 0)
+        self.assertEqual(downloader.bytes_downloaded, 1500)
+
+    def test_should_skip_files_already_downloaded_and_replace_changed_ones(self):
+        FileDownloader(self.fs_interface).download(self.remote_files, self.local_dir)
+        with open(f"{self.local_dir}/batch_1.npz", "wb") as changed_file:
+            changed_file.write(bytes([9]) * 200)
+        with open(f"{self.local_dir}/batch_2.npz", "wb") as truncated_file:
+            truncated_file.write(bytes([2]) * 10)
+
+        downloader = FileDownloader(self.fs_interface)
+        names = downloader.download(self.remote_files, self.local_dir)
+
+        self.assertEqual(len(names), 5)
+        self.assertEqual(downloader.downloaded, 2)
+        self.assertEqual(downloader.skipped, 3)
+        self.assertEqual(
+            md5_checksum(f"{self.local_dir}/batch_1.npz"),
+            md5_checksum(f"{self.remote_dir}/batch_1.npz"),
+        )
+
+    def test_should_not_trust_a_file_without_remote_checksum(self):
+        FileDownloader(self.fs_interface).download(self.remote_files, self.local_dir)
+        remote_files = [
+            RemoteFile(remote_file.path, remote_file.size, None)
+            for remote_file in self.remote_files
+        ]
+
+        downloader = FileDownloader(self.fs_interface)
+        downloader.download(remote_files, self.local_dir)
+
+        self.assertEqual(downloader.downloaded, 5)
+        self.assertEqual(downloader.skipped, 0)
+
+    def test_should_raise_after_downloading_the_other_files_when_one_fails(self):
+        remote_files = self.remote_files + [
+            RemoteFile(f"{self.remote_dir}/missing.npz", 10, "abc")
+        ]
+        downloader = FileDownloader(self.fs_interface, max_workers=2)
+
+        with self.assertRaises(FileNotFoundException):
+            downloader.download(remote_files, self.local_dir)
+
+        self.assertEqual(downloader.downloaded, 5)
+        self.assertEqual(downloader.failed, 1)
+        self.assertEqual(
+            sorted(os.listdir(self.local_dir)),
+            [f"batch_{index}.npz" for index in range(5)],
+        )
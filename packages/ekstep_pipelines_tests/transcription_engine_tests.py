@@ -0,0 +1,341 @@
+import glob
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import wave
+from concurrent import futures
+from unittest.mock import Mock
+
+import grpc
+
+from ekstep_data_pipelines.audio_transcription.audio_transcription import (
+    AudioTranscription,
+)
+from ekstep_data_pipelines.audio_transcription.transcription_engine import (
+    TokenBucket,
+    TranscriptionEngine,
+)
+from ekstep_data_pipelines.common.audio_commons.transcription_clients.ekstepmodel_transcription_client import (
+    EkstepTranscriptionClient,
+)
+from ekstep_data_pipelines.common.audio_commons.transcription_clients.stub.speech_recognition_open_api_pb2 import (
+    SpeechRecognitionResult,
+)
+from ekstep_data_pipelines.common.audio_commons.transcription_clients.stub.speech_recognition_open_api_pb2_grpc import (
+    SpeechRecognizerServicer,
+    add_SpeechRecognizerServicer_to_server,
+)
+from ekstep_data_pipelines.common.audio_commons.transcription_clients.transcription_client_errors import (
+    AzureTranscriptionClientError,
+    EkstepTranscriptionClientError,
+)
+from ekstep_data_pipelines.common.infra_commons.storage.exceptions import (
+    FileNotFoundException,
+)
+from ekstep_data_pipelines.common.infra_commons.storage.local_storage import (
+    LocalStorage,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeSpeechRecognizer(SpeechRecognizerServicer):
+    """
+    Answers with the transcript registered for the length of the audio,
+    after failing the first failures_left calls with failure_code.
+    """
+
+    def __init__(
+        self,
+        transcripts,
+        failures_left=0,
+        delay=0.05,
+        failure_code=grpc.StatusCode.UNAVAILABLE,
+    ):
+        self.transcripts = transcripts
+        self.failures_left = failures_left
+        self.failure_code = failure_code
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def recognize(self, request, context):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            should_fail = self.failures_left > 0
+            self.failures_left -= 1
+        try:
+            time.sleep(self.delay)
+            if should_fail:
+                context.abort(self.failure_code, "failed")
+            return SpeechRecognitionResult(
+                transcript=self.transcripts[len(request.audio.audioContent)]
+            )
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_should_allow_a_burst_and_then_wait_for_tokens(self):
+        clock = FakeClock()
+        token_bucket = TokenBucket(2, clock=clock.time, sleep=clock.sleep)
+
+        for _ in range(4):
+            token_bucket.acquire()
+
+        self.assertEqual(clock.sleeps, [0.5, 0.5])
+
+    def test_should_not_wait_without_a_rate(self):
+        clock = FakeClock()
+        token_bucket = TokenBucket(None, clock=clock.time, sleep=clock.sleep)
+
+        for _ in range(100):
+            token_bucket.acquire()
+
+        self.assertEqual(clock.sleeps, [])
+
+
+class TranscriptionEngineTests(unittest.TestCase):
+    def test_should_retry_client_errors_with_exponential_backoff(self):
+        clock = FakeClock()
+        engine = TranscriptionEngine(
+            max_retries=3, backoff_seconds=1, max_backoff_seconds=3, sleep=clock.sleep
+        )
+        function = Mock(
+            side_effect=[
+                EkstepTranscriptionClientError("busy", retryable=True),
+                EkstepTranscriptionClientError("busy", retryable=True),
+                EkstepTranscriptionClientError("busy", retryable=True),
+                "transcript",
+            ]
+        )
+
+        self.assertEqual(engine.call(function, "hindi", "a.wav"), "transcript")
+        self.assertEqual(clock.sleeps, [1, 2, 3])
+        function.assert_called_with("hindi", "a.wav")
+
+    def test_should_raise_once_retries_are_exhausted_or_error_is_not_retryable(self):
+        engine = TranscriptionEngine(max_retries=1, sleep=Mock())
+        function = Mock(
+            side_effect=EkstepTranscriptionClientError("busy", retryable=True)
+        )
+
+        with self.assertRaises(EkstepTranscriptionClientError):
+            engine.call(function)
+        self.assertEqual(function.call_count, 2)
+
+        function = Mock(side_effect=ValueError("bad audio"))
+        with self.assertRaises(ValueError):
+            engine.call(function)
+        self.assertEqual(function.call_count, 1)
+
+    def test_should_not_retry_client_errors_that_are_not_transient(self):
+        clock = FakeClock()
+        engine = TranscriptionEngine(max_retries=3, sleep=clock.sleep)
+        function = Mock(
+            side_effect=AzureTranscriptionClientError(
+                RuntimeError("No speech could be recognized: silence")
+            )
+        )
+
+        with self.assertRaises(AzureTranscriptionClientError):
+            engine.call(function, "hindi", "silence.wav")
+        self.assertEqual(function.call_count, 1)
+        self.assertEqual(clock.sleeps, [])
+
+    def test_map_should_keep_the_order_of_the_items(self):
+        engine = TranscriptionEngine(max_concurrency=4)
+
+        def slow_square(item):
+            time.sleep(0.01 * (10 - item))
+            if item == 3:
+                raise ValueError(item)
+            return item * item
+
+        outcomes = engine.map(slow_square, list(range(10)))
+
+        self.assertEqual(
+            [outcome.value for outcome in outcomes],
+            [0, 1, 4, None, 16, 25, 36, 49, 64, 81],
+        )
+        self.assertIsInstance(outcomes[3].error, ValueError)
+        self.assertEqual(engine.utterances, 10)
+        self.assertGreater(engine.utterances_per_second, 0)
+
+    def test_run_all_should_cancel_the_calls_not_started_after_an_error(self):
+        engine = TranscriptionEngine(max_concurrency=2)
+        called = []
+
+        def download(item):
+            called.append(item)
+            time.sleep(0.01)
+            if item == 1:
+                raise ValueError(item)
+
+        with self.assertRaises(ValueError):
+            engine.run_all(download, list(range(20)))
+
+        self.assertLess(len(called), 20)
+
+
+class AudioTranscriptionWithFakeServerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.remote_dir = f"{self.tmp_dir}/1234/clean"
+        os.makedirs(self.remote_dir)
+        wav_files = sorted(glob.glob("ekstep_pipelines_tests/resources/test*.wav"))
+        texts = ["अलग अलग होते है", "कोरोना के प्रभाव से", "not hindi"]
+        self.transcripts = {}
+        for wav_file, text in zip(wav_files, texts):
+            shutil.copy(wav_file, self.remote_dir)
+            with wave.open(wav_file, "rb") as audio:
+                num_bytes = len(audio.readframes(audio.getnframes()))
+            self.transcripts[num_bytes] = text
+        self.file_names = [os.path.basename(wav_file) for wav_file in wav_files]
+        self.assertEqual(len(self.transcripts), len(self.file_names))
+
+        self.catalogue_dao = Mock()
+        self.audio_transcription = AudioTranscription(
+            Mock(), Mock(), {"transcription_clients": {}}, self.catalogue_dao
+        )
+        self.audio_transcription.fs_interface = LocalStorage()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        shutil.rmtree(f"/tmp/{self.tmp_dir}", ignore_errors=True)
+
+    def start_server(self, servicer):
+        server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+        add_SpeechRecognizerServicer_to_server(servicer, server)
+        port = server.add_insecure_port("localhost:0")
+        server.start()
+        self.addCleanup(server.stop, None)
+        return EkstepTranscriptionClient(
+            server_host="localhost", port=str(port), language="hi"
+        )
+
+    def test_should_transcribe_concurrently_and_update_utterances_in_file_order(self):
+        servicer = FakeSpeechRecognizer(self.transcripts, failures_left=2)
+        transcription_client = self.start_server(servicer)
+        self.audio_transcription.audio_transcription_config = {
+            "transcription_engine": {
+                "ekstep": {
+                    "max_concurrency": 3,
+                    "requests_per_second": 100,
+                    "max_retries": 2,
+                    "backoff_seconds": 0.01,
+                }
+            }
+        }
+        utterances = {
+            name: {"name": name, "status": "Clean", "reason": None, "duration": 3}
+            for name in self.file_names
+        }
+        self.catalogue_dao.find_utterance_by_name.side_effect = (
+            lambda all_utterances, name: all_utterances[name]
+        )
+        statuses = []
+        self.catalogue_dao.update_utterance_statuses.side_effect = (
+            lambda audio_id, all_utterances: statuses.extend(
+                (utterance["name"], utterance["status"]) for utterance in all_utterances
+            )
+        )
+
+        local_clean_folder, local_rejected_folder = (
+            self.audio_transcription.generate_transcription_for_all_utterenaces(
+                1234,
+                self.file_names,
+                "hindi",
+                transcription_client,
+                utterances,
+                False,
+                self.remote_dir,
+                "ekstep",
+            )
+        )
+
+        self.assertEqual(
+            statuses,
+            [
+                (self.file_names[0], "Clean"),
+                (self.file_names[1], "Clean"),
+                (self.file_names[2], "Rejected"),
+            ],
+        )
+        with open(f"{local_clean_folder}/{self.file_names[1][:-4]}.txt") as text:
+            self.assertEqual(text.read(), "कोरोना के प्रभाव से")
+        self.assertEqual(os.listdir(local_rejected_folder), [self.file_names[2]])
+        self.assertEqual(self.catalogue_dao.update_utterance_statuses.call_count, 1)
+        self.assertEqual(servicer.calls, 5)
+        self.assertGreater(servicer.max_in_flight, 1)
+        self.assertLessEqual(servicer.max_in_flight, 3)
+        engine = self.audio_transcription.get_transcription_engine("ekstep")
+        self.assertEqual(engine.utterances, 3)
+
+    def test_should_retry_only_transient_server_errors(self):
+        engine = TranscriptionEngine(max_retries=2, backoff_seconds=0.01)
+        wav_file = f"{self.remote_dir}/{self.file_names[0]}"
+
+        for failure_code, calls in [
+            (grpc.StatusCode.UNAVAILABLE, 2),
+            (grpc.StatusCode.DEADLINE_EXCEEDED, 2),
+            (grpc.StatusCode.INVALID_ARGUMENT, 1),
+        ]:
+            servicer = FakeSpeechRecognizer(
+                self.transcripts, failures_left=1, failure_code=failure_code
+            )
+            transcription_client = self.start_server(servicer)
+            try:
+                engine.call(transcription_client.generate_transcription, "hi", wav_file)
+            except EkstepTranscriptionClientError as error:
+                self.assertFalse(error.retryable)
+            self.assertEqual(servicer.calls, calls, failure_code)
+
+    def test_should_make_no_stt_call_when_a_download_fails(self):
+        servicer = FakeSpeechRecognizer(self.transcripts)
+        transcription_client = self.start_server(servicer)
+        self.audio_transcription.audio_transcription_config = {
+            "transcription_engine": {"ekstep": {"max_concurrency": 3}}
+        }
+        utterances = {
+            name: {"name": name, "status": "Clean", "reason": None, "duration": 3}
+            for name in self.file_names
+        }
+        self.catalogue_dao.find_utterance_by_name.side_effect = (
+            lambda all_utterances, name: all_utterances[name]
+        )
+        os.remove(f"{self.remote_dir}/{self.file_names[1]}")
+
+        with self.assertRaises(FileNotFoundException):
+            self.audio_transcription.generate_transcription_for_all_utterenaces(
+                1234,
+                self.file_names,
+                "hindi",
+                transcription_client,
+                utterances,
+                False,
+                self.remote_dir,
+                "ekstep",
+            )
+
+        self.assertEqual(servicer.calls, 0)
+        self.catalogue_dao.update_utterance_statuses.assert_not_called()
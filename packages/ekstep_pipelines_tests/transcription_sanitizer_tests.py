@@ -86,6 +86,48 @@ class TestTrancriptionSanitizer(unittest.TestCase):
             with self.assertRaises(TranscriptionSanitizationError):
                 transcript_obj.sanitize(each_transcription)
 
+    def test_sanitizers_should_be_created_once(self):
+        transcription_sanitizers = get_transcription_sanitizers()
+
+        self.assertIs(transcription_sanitizers, get_transcription_sanitizers())
+        self.assertIs(
+            self.hindi_transcription_sanitizers, transcription_sanitizers.get("hindi")
+        )
+
+    def test_transcription_errors_should_be_checked_in_order(self):
+        transcript_obj = self.hindi_transcription_sanitizers
+        transcripts = [
+            ("x:।", "transcription has :"),
+            (" ।.- ", "transcription is empty"),
+            ("अलग x", transcript_obj.INVALID_CHARS_ERROR),
+            ("।x", transcript_obj.INVALID_CHARS_ERROR),
+        ]
+        for each_transcript, error in transcripts:
+            with self.assertRaises(TranscriptionSanitizationError) as context:
+                transcript_obj.sanitize(each_transcript)
+            self.assertEqual(context.exception.args, (error,))
+
+    def test_transcription_should_keep_whitespace_inside(self):
+        transcript_obj = self.hindi_transcription_sanitizers
+        self.assertEqual(transcript_obj.sanitize("\tअलग\nअलग, "), "अलग\nअलग")
+        self.assertEqual(transcript_obj.shouldReject("अलग\tअलग"), False)
+
+    def test_sanitize_many_should_return_a_result_for_each_transcription(self):
+        transcript_obj = self.hindi_transcription_sanitizers
+
+        results = transcript_obj.sanitize_many(
+            ["अलग-अलग होते हैं ", "", "8:00 से", "होते है।"]
+        )
+
+        self.assertEqual(
+            [result.transcription for result in results],
+            ["अलग अलग होते हैं", None, None, "होते है"],
+        )
+        self.assertEqual(
+            [result.error.args if result.error else None for result in results],
+            [None, ("transcription is empty",), ("transcription has :",), None],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()